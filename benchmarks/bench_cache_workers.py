@@ -0,0 +1,94 @@
+"""
+Cache hit rate and lookup latency at 1, 2, 4 and 8 worker processes,
+for the per-process memory backend and the host-shared SQLite backend.
+
+Each worker replays the same skewed (Zipf-like) address stream the way a
+load balancer spreads requests across uvicorn workers; a miss counts as one
+upstream lookup and stores the result.
+
+    python benchmarks/bench_cache_workers.py [--requests 20000] [--keys 5000]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gx_kadena.cache import TTLCache, MemoryBackend, SQLiteBackend
+
+
+def _decode(v):
+    total, found, per_chain = v
+    return total, found, {int(k): x for k, x in per_chain.items()}
+
+
+def _worker(backend_name, db_path, n_requests, n_keys, seed, out):
+    rng = random.Random(seed)
+    if backend_name == "sqlite":
+        backend = SQLiteBackend("bench", path=db_path, max_entries=n_keys * 2, decode=_decode)
+    else:
+        backend = MemoryBackend(max_entries=n_keys * 2)
+    cache = TTLCache("bench", ttl=300, negative_ttl=5, backend=backend)
+    hits = 0
+    lat = []
+    for _ in range(n_requests):
+        key = f"k:{int(rng.paretovariate(1.2)) % n_keys:064x}"
+        t0 = time.perf_counter()
+        state, _ = cache.lookup(key)
+        if state == "fresh":
+            hits += 1
+        else:
+            cache.set(key, (1.0, 0, {0: 1.0}))
+        lat.append(time.perf_counter() - t0)
+    out.put((hits, lat))
+
+
+def run(backend_name, workers, total_requests, n_keys):
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    out = mp.Queue()
+    per_worker = total_requests // workers
+    procs = [
+        mp.Process(target=_worker, args=(backend_name, db_path, per_worker, n_keys, i, out))
+        for i in range(workers)
+    ]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - t0
+    hits = sum(h for h, _ in results)
+    lat = sorted(x for _, ls in results for x in ls)
+    n = len(lat)
+    return {
+        "backend": backend_name,
+        "workers": workers,
+        "hit_rate": hits / n,
+        "upstream_lookups": n - hits,
+        "p50_us": statistics.median(lat) * 1e6,
+        "p99_us": lat[int(n * 0.99) - 1] * 1e6,
+        "wall_s": wall,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=20000, help="total requests across all workers")
+    ap.add_argument("--keys", type=int, default=5000, help="distinct addresses")
+    args = ap.parse_args()
+    print(f"{'backend':8} {'workers':>7} {'hit_rate':>9} {'upstream':>9} {'p50_us':>8} {'p99_us':>8}")
+    for backend_name in ("memory", "sqlite"):
+        for workers in (1, 2, 4, 8):
+            r = run(backend_name, workers, args.requests, args.keys)
+            print(f"{r['backend']:8} {r['workers']:>7} {r['hit_rate']:>9.3f} {r['upstream_lookups']:>9}"
+                  f" {r['p50_us']:>8.1f} {r['p99_us']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
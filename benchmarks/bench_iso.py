@@ -0,0 +1,79 @@
+"""
+ISO 20022 single-document rendering: lxml tree builder vs fast path.
+
+Reports documents/second and the tracemalloc peak (Python heap) per
+document for xml_pacs008 / xml_camt053 and their fast_* counterparts
+(precompiled skeletons), plus schema validation cost when ISO_XSD_DIR is set.
+
+    python benchmarks/bench_iso.py [--docs 20000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gx_kadena.config import ISO_XSD_DIR
+from gx_kadena.iso.camt053 import xml_camt053
+from gx_kadena.iso.pacs008 import xml_pacs008
+from gx_kadena.iso.fast import fast_camt053, fast_pacs008
+
+ADDR = "k:" + "ab" * 32
+RWA = {"address": ADDR, "assets": [{"type": "bond", "amount": 12.5, "unit": "oz"}]}
+NOW = "2025-01-02T03:04:05Z"
+
+CASES = {
+    "pacs008": (
+        lambda: xml_pacs008(ADDR, "GX-TEST-001", "12.50", "KDA", 70, RWA, now=NOW),
+        lambda: fast_pacs008(ADDR, "GX-TEST-001", "12.50", "KDA", 70, RWA, now=NOW),
+    ),
+    "camt053": (
+        lambda: xml_camt053(ADDR, 1234.5, 70, RWA, now=NOW),
+        lambda: fast_camt053(ADDR, 1234.5, 70, RWA, now=NOW),
+    ),
+}
+
+
+def rate(fn, n):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - t0)
+
+
+def python_peak(fn):
+    """Peak Python-heap bytes while rendering one document (libxml2's own C allocations are not traced)."""
+    fn()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--docs", type=int, default=20000)
+    args = ap.parse_args()
+    for kind, (slow, fast) in CASES.items():
+        assert slow() == fast(), f"{kind}: fast path output differs"
+        r_slow, r_fast = rate(slow, args.docs), rate(fast, args.docs)
+        p_slow, p_fast = python_peak(slow), python_peak(fast)
+        print(f"{kind}:")
+        print(f"  lxml tree:  {r_slow:10.0f} docs/s  python peak {p_slow:6d} B/doc")
+        print(f"  fast path:  {r_fast:10.0f} docs/s  python peak {p_fast:6d} B/doc")
+        print(f"  speedup:    {r_fast / r_slow:10.1f}x")
+        if ISO_XSD_DIR:
+            from gx_kadena.iso.schema import load_schema, validation_errors
+            doc = fast()
+            load_schema(kind)  # compiled once, outside the timed loop
+            r_val = rate(lambda kind=kind, doc=doc: validation_errors(kind, doc), max(1, args.docs // 10))
+            print(f"  validate:   {r_val:10.0f} docs/s (cached XMLSchema)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Per-request overhead of the per-client rate limiter.
+
+Measures GCRALimiter.hit alone and the full security_headers_mw path
+(client key extraction + limiter + header) with a no-op downstream app,
+over a configurable number of distinct clients.
+
+    python benchmarks/bench_ratelimit.py [--requests 200000] [--clients 5000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from gx_kadena import security_mw
+from gx_kadena.security_mw import GCRALimiter
+
+
+def bench_limiter(n, clients):
+    lim = GCRALimiter(rate=1e9, burst=1e9, max_clients=clients)
+    keys = [f"ip:10.0.{i // 256}.{i % 256}" for i in range(clients)]
+    t0 = time.perf_counter()
+    for i in range(n):
+        lim.hit(keys[i % clients])
+    return (time.perf_counter() - t0) / n
+
+
+def bench_middleware(n, clients):
+    security_mw._expensive = GCRALimiter(rate=1e9, burst=1e9, max_clients=clients)
+
+    def make_request(i):
+        return Request({
+            "type": "http", "method": "GET", "path": "/validate/k:00", "headers": [],
+            "query_string": b"", "client": (f"10.0.{(i % clients) // 256}.{i % 256}", 1234),
+        })
+
+    async def call_next(_):
+        return Response(b"")
+
+    async def run():
+        requests = [make_request(i) for i in range(min(n, clients))]
+        t0 = time.perf_counter()
+        for i in range(n):
+            await security_mw.security_headers_mw(requests[i % len(requests)], call_next)
+        return (time.perf_counter() - t0) / n
+
+    async def baseline():
+        req = make_request(0)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            resp = await call_next(req)
+            resp.headers["Content-Security-Policy"] = "default-src 'self'"
+        return (time.perf_counter() - t0) / n
+
+    return asyncio.run(run()), asyncio.run(baseline())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=200000)
+    ap.add_argument("--clients", type=int, default=5000)
+    args = ap.parse_args()
+    per_hit = bench_limiter(args.requests, args.clients)
+    per_mw, per_base = bench_middleware(args.requests, args.clients)
+    print(f"GCRALimiter.hit:          {per_hit * 1e9:8.0f} ns/request ({args.clients} clients)")
+    print(f"security_headers_mw:      {per_mw * 1e9:8.0f} ns/request")
+    print(f"  no-limit baseline:      {per_base * 1e9:8.0f} ns/request")
+    print(f"  limiter overhead:       {(per_mw - per_base) * 1e9:8.0f} ns/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Risk scoring throughput: scalar risk_score in a loop vs risk_score_batch
+(NumPy columns) over the same synthetic account set.
+
+    python benchmarks/bench_risk.py [--accounts 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gx_kadena.risk import risk_score, risk_score_batch
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--accounts", type=int, default=1_000_000)
+    args = ap.parse_args()
+    rng = random.Random(1)
+    n = args.accounts
+    balances = [0.0 if rng.random() < 0.3 else 10 ** rng.uniform(-4, 8) for _ in range(n)]
+    tx24 = [None if rng.random() < 0.1 else rng.randint(0, 60) for _ in range(n)]
+    is_contract = [rng.random() < 0.05 for _ in range(n)]
+
+    t0 = time.perf_counter()
+    scalar = [risk_score(b, t, c)[0] for b, t, c in zip(balances, tx24, is_contract)]
+    t_scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scores, _ = risk_score_batch(balances, tx24, is_contract)
+    t_batch = time.perf_counter() - t0
+
+    assert scores.tolist() == scalar
+    print(f"accounts:          {n}")
+    print(f"scalar risk_score: {n / t_scalar:12.0f} accounts/s")
+    print(f"risk_score_batch:  {n / t_batch:12.0f} accounts/s (incl. list -> array conversion)")
+    print(f"speedup:           {t_scalar / t_batch:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Closed-loop load test of a running gx_kadena app against the upstream
+stand-in (benchmarks/standin.py).
+
+At each concurrency level, that many clients send requests back to back
+for --duration seconds. Reports p50/p95/p99 latency, requests/sec, non-2xx
+responses and upstream calls per request (from the stand-in's /_stats).
+
+    # start the stand-in and the app with matching env, then measure
+    python benchmarks/loadtest.py --spawn --concurrency 1,8,32 --save before.json
+    git checkout my-branch
+    python benchmarks/loadtest.py --spawn --concurrency 1,8,32 --compare before.json
+
+Without --spawn, --app-url and --standin-url point at servers you started
+yourself (the app must use the stand-in as every upstream, see standin.py).
+"""
+import argparse
+import asyncio
+import datetime as dt
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+ROUTES = {
+    "validate": lambda a: f"/validate/{a}",
+    "risk": lambda a: f"/risk/{a}",
+    "camt053": lambda a: f"/iso/camt053.xml?address={a}",
+    "pacs008": lambda a: f"/iso/pacs008.xml?address={a}&amount=1.5",
+}
+
+
+def make_addresses(n: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [f"k:{rng.getrandbits(256):064x}" for _ in range(n)]
+
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return float("nan")
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+async def upstream_calls(client: httpx.AsyncClient, standin_url: str) -> int:
+    r = await client.get(f"{standin_url}/_stats")
+    return int(r.json().get("upstream_calls", 0))
+
+
+async def run_level(app_url: str, standin_url: str, route: str, concurrency: int, duration: float,
+                    addresses: List[str], seed: int) -> Dict:
+    path_for = ROUTES[route]
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency + 2, max_keepalive_connections=concurrency + 2)
+    async with httpx.AsyncClient(base_url=app_url, timeout=30.0, limits=limits) as client:
+        before = await upstream_calls(client, standin_url)
+        stop_at = time.perf_counter() + duration
+
+        async def worker(i: int) -> None:
+            nonlocal errors
+            rng = random.Random(seed * 1000 + i)
+            while time.perf_counter() < stop_at:
+                path = path_for(rng.choice(addresses))
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    ok = r.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - t0)
+                if not ok:
+                    errors += 1
+
+        t_start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - t_start
+        after = await upstream_calls(client, standin_url)
+
+    lat = sorted(latencies)
+    n = len(lat)
+    return {
+        "route": route,
+        "concurrency": concurrency,
+        "requests": n,
+        "errors": errors,
+        "rps": n / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(lat, 50) * 1000,
+        "p95_ms": percentile(lat, 95) * 1000,
+        "p99_ms": percentile(lat, 99) * 1000,
+        "upstream_per_request": (after - before) / n if n else 0.0,
+    }
+
+
+def git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                             check=False)
+        return out.stdout.strip() if out.returncode == 0 and out.stdout.strip() else None
+    except OSError:
+        return None
+
+
+def print_table(results: List[Dict]) -> None:
+    print(f"{'route':<9} {'conc':>5} {'reqs':>7} {'err':>5} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'up/req':>7}")
+    for r in results:
+        print(f"{r['route']:<9} {r['concurrency']:>5} {r['requests']:>7} {r['errors']:>5} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['upstream_per_request']:>7.2f}")
+
+
+def print_comparison(baseline: Dict, results: List[Dict]) -> None:
+    base = {(r["route"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nvs {baseline.get('git') or 'baseline'} ({baseline.get('timestamp', '?')}); "
+          "negative latency / positive rps = better")
+    print(f"{'route':<9} {'conc':>5} {'rps':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'up/req':>8}")
+
+    def delta(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+7.1f}%" if old else "     n/a"
+
+    for r in results:
+        b = base.get((r["route"], r["concurrency"]))
+        if b is None:
+            print(f"{r['route']:<9} {r['concurrency']:>5}  (not in baseline)")
+            continue
+        print(f"{r['route']:<9} {r['concurrency']:>5} {delta(r['rps'], b['rps']):>9} "
+              f"{delta(r['p50_ms'], b['p50_ms']):>8} {delta(r['p95_ms'], b['p95_ms']):>8} "
+              f"{delta(r['p99_ms'], b['p99_ms']):>8} "
+              f"{r['upstream_per_request'] - b['upstream_per_request']:>+8.2f}")
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"process serving {url} exited with {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def spawn(args) -> List[subprocess.Popen]:
+    """Start the stand-in and the app (pointed at it) on local ports."""
+    standin = f"http://127.0.0.1:{args.standin_port}"
+    procs = [subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "standin.py"), "--port", str(args.standin_port)]
+        + args.standin_args.split(),
+        cwd=ROOT,
+    )]
+    env = dict(
+        os.environ,
+        KADENA_PACT_BASES=standin,
+        KADINDEXER_BASE=f"{standin}/kadindexer/",
+        KADINDEXER_API_KEY=os.environ.get("KADINDEXER_API_KEY", "bench"),
+        KADENA_EXPLORER_BASE=f"{standin}/explorer",
+        RATE_LIMIT_RPS="1000000",
+        RATE_LIMIT_CHEAP_RPS="1000000",
+    )
+    procs.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "gx_kadena.main:app", "--port", str(args.app_port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env,
+    ))
+    try:
+        _wait_ready(f"{standin}/_stats", procs[0])
+        _wait_ready(f"http://127.0.0.1:{args.app_port}/health", procs[1])
+    except Exception:
+        for p in procs:
+            p.terminate()
+        raise
+    args.standin_url = standin
+    args.app_url = f"http://127.0.0.1:{args.app_port}"
+    return procs
+
+
+async def run_all(args) -> List[Dict]:
+    addresses = make_addresses(args.addresses, args.seed)
+    results = []
+    for route in args.route.split(","):
+        for conc in (int(c) for c in args.concurrency.split(",")):
+            if args.warmup > 0:
+                await run_level(args.app_url, args.standin_url, route, conc, args.warmup, addresses, args.seed + 1)
+            results.append(await run_level(args.app_url, args.standin_url, route, conc, args.duration,
+                                           addresses, args.seed))
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--app-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--standin-url", default="http://127.0.0.1:9100")
+    ap.add_argument("--spawn", action="store_true", help="start the stand-in and the app for this run")
+    ap.add_argument("--app-port", type=int, default=8765)
+    ap.add_argument("--standin-port", type=int, default=9100)
+    ap.add_argument("--standin-args", default="", help='extra stand-in flags, e.g. "--pact-errors 0.02"')
+    ap.add_argument("--route", default="validate", help=f"comma-separated: {', '.join(ROUTES)}")
+    ap.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    ap.add_argument("--warmup", type=float, default=0.0, help="seconds of unmeasured load before each level")
+    ap.add_argument("--addresses", type=int, default=1000,
+                    help="size of the address pool (smaller pool = more cache hits)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--save", help="write results (with the git revision) to this JSON file")
+    ap.add_argument("--compare", help="baseline JSON from an earlier --save")
+    args = ap.parse_args()
+    unknown = set(args.route.split(",")) - set(ROUTES)
+    if unknown:
+        ap.error(f"unknown route(s): {', '.join(sorted(unknown))}")
+
+    procs = spawn(args) if args.spawn else []
+    try:
+        results = asyncio.run(run_all(args))
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+
+    print_table(results)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(json.load(f), results)
+    if args.save:
+        doc = {
+            "git": git_rev(),
+            "timestamp": dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "args": {k: getattr(args, k) for k in ("route", "concurrency", "duration", "addresses", "standin_args")},
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"\nsaved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Local stand-in for the upstreams gx_kadena talks to, for benchmarks.
+
+Emulates Pact /local on all 20 chains (coin.get-balance, coin.details,
+the batched balance query, RWA module holdings), the chainweb cut, the Kadindexer balance / txcount24h
+routes and the explorer transactions route. Balances and transactions are
+derived deterministically from the address. Latency distributions, error
+rates, the /local body format the node accepts and payload quirks seen on
+real upstreams (Pact {"decimal": ...} numbers, ISO or millisecond
+timestamps on the explorer) are configurable.
+GET /_stats returns request counters, POST /_stats/reset clears them.
+
+    python benchmarks/standin.py --port 9100 --pact-latency lognormal:40:0.5 --pact-errors 0.01
+
+Point the app at it with:
+
+    KADENA_PACT_BASES=http://127.0.0.1:9100
+    KADINDEXER_BASE=http://127.0.0.1:9100/kadindexer/  KADINDEXER_API_KEY=bench
+    KADENA_EXPLORER_BASE=http://127.0.0.1:9100/explorer
+"""
+import argparse
+import asyncio
+import datetime as dt
+import hashlib
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+CHAINS = 20
+QUIRKS = ("decimal-objects", "iso-timestamps", "ms-timestamps")
+_ACCOUNT = re.compile(r'coin\.get-balance "([^"]+)"')
+_MODULE_READ = re.compile(r'\(([\w.\-]+)\.get-balance \(read-msg "account"\)\)')
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """fixed:MS | uniform:LO_MS:HI_MS | lognormal:MEDIAN_MS:SIGMA -> sampler returning seconds."""
+    kind, *args = spec.split(":")
+    vals = [float(a) for a in args]
+    if kind == "fixed":
+        return lambda rng: vals[0] / 1000.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(vals[0], vals[1]) / 1000.0
+    if kind == "lognormal":
+        import math
+        mu = math.log(max(vals[0], 1e-3))
+        return lambda rng: rng.lognormvariate(mu, vals[1]) / 1000.0
+    raise ValueError(f"unknown latency spec {spec!r}")
+
+
+def _h(*parts) -> int:
+    return int.from_bytes(hashlib.sha256("|".join(map(str, parts)).encode()).digest()[:8], "big")
+
+
+def balance_of(address: str, chain: int) -> Optional[float]:
+    """Deterministic balance; None = account does not exist on that chain."""
+    h = _h(address, chain)
+    if h % 4:
+        return None
+    return round((h % 10_000_000) / 1000.0, 6)
+
+
+def guard_of(address: str) -> dict:
+    """Keyset for most accounts, a module guard for about one in ten."""
+    if _h(address, "guard") % 10 == 0:
+        return {"moduleName": {"name": "dex", "namespace": "n_standin"}, "name": "bank"}
+    return {"keys": [address[2:] if address.startswith("k:") else "00" * 32], "pred": "keys-all"}
+
+
+def transactions_of(address: str, now: float):
+    """Newest-first (requestKey, epoch seconds) over the last ~30h."""
+    n = _h(address, "tx") % 300
+    return [(f"{_h(address, i):016x}", int(now - (i + 1) * (108000 / max(n, 1)))) for i in range(n)]
+
+
+def _timestamp(ts: int, quirks) -> object:
+    if "iso-timestamps" in quirks:
+        return dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    if "ms-timestamps" in quirks:
+        return ts * 1000
+    return ts
+
+
+class Config:
+    def __init__(self, args):
+        self.pact_latency = parse_latency(args.pact_latency)
+        self.indexer_latency = parse_latency(args.indexer_latency)
+        self.explorer_latency = parse_latency(args.explorer_latency)
+        self.pact_errors = args.pact_errors
+        self.indexer_errors = args.indexer_errors
+        self.explorer_errors = args.explorer_errors
+        self.pact_format = args.pact_format
+        self.block_time = args.block_time
+        self.quirks = set(filter(None, args.quirks.split(",")))
+        unknown = self.quirks - set(QUIRKS)
+        if unknown:
+            raise ValueError(f"unknown quirks: {', '.join(sorted(unknown))}")
+        self.rng = random.Random(args.seed)
+
+
+def create_app(cfg: Config) -> FastAPI:
+    app = FastAPI(title="gx_kadena upstream stand-in")
+    stats: Counter = Counter()
+    t0 = time.time()
+
+    async def delay_or_fail(sampler, error_rate: float, kind: str) -> Optional[Response]:
+        stats[kind] += 1
+        await asyncio.sleep(sampler(cfg.rng))
+        if cfg.rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        return None
+
+    def pact_number(value: float):
+        return {"decimal": repr(value)} if "decimal-objects" in cfg.quirks else value
+
+    def unwrap(body):
+        """The command, if the body uses the configured format."""
+        fmt = "raw" if "payload" in body else ("cmd-string" if isinstance(body.get("cmd"), str) else "cmd")
+        if cfg.pact_format not in ("any", fmt):
+            return None
+        if fmt == "raw":
+            return body
+        return json.loads(body["cmd"]) if fmt == "cmd-string" else body["cmd"]
+
+    @app.post("/chainweb/0.0/{network}/chain/{chain}/pact/api/v1/local")
+    async def local(network: str, chain: int, request: Request):
+        failed = await delay_or_fail(cfg.pact_latency, cfg.pact_errors, "pact-local")
+        if failed:
+            return failed
+        cmd = unwrap(await request.json())
+        if cmd is None:
+            stats["format-rejected"] += 1
+            return JSONResponse({"error": "could not parse body"}, status_code=400)
+        code = cmd["payload"]["exec"]["code"]
+        data = cmd["payload"]["exec"].get("data") or {}
+        meta = {"blockHeight": 5_000_000 + int((time.time() - t0) / cfg.block_time)}
+        if 'read-msg "accounts"' in code:
+            vals = [balance_of(a, chain) for a in data.get("accounts", [])]
+            result = {"status": "success", "data": [-1.0 if v is None else pact_number(v) for v in vals]}
+        elif 'coin.details (read-msg "account")' in code:
+            account = data.get("account", "")
+            bal = balance_of(account, chain)
+            result = {"status": "success",
+                      "data": {} if bal is None else {"account": account, "balance": pact_number(bal),
+                                                      "guard": guard_of(account)}}
+        elif 'read-msg "account"' in code:
+            # RWA holdings: one balance per registered module, -1.0 without a row
+            account = data.get("account", "")
+            vals = [balance_of(f"{module}:{account}", chain) for module in _MODULE_READ.findall(code)]
+            result = {"status": "success", "data": [-1.0 if v is None else pact_number(v) for v in vals]}
+        else:
+            m = _ACCOUNT.search(code)
+            if m:
+                bal = balance_of(m.group(1), chain)
+                result = ({"status": "failure", "error": {"message": "with-read: row not found"}}
+                          if bal is None else {"status": "success", "data": pact_number(bal)})
+            else:
+                result = {"status": "success", "data": None}
+        return {"result": result, "metaData": meta, "gas": 20}
+
+    @app.get("/chainweb/0.0/{network}/cut")
+    async def cut(network: str):
+        stats["cut"] += 1
+        elapsed = time.time() - t0
+        hashes = {
+            str(c): {"height": 5_000_000 + int((elapsed + c * cfg.block_time / CHAINS) / cfg.block_time), "hash": "x"}
+            for c in range(CHAINS)
+        }
+        return {"hashes": hashes, "height": sum(h["height"] for h in hashes.values()), "instance": network}
+
+    @app.get("/kadindexer/account/{address}/balance")
+    async def indexer_balance(address: str):
+        failed = await delay_or_fail(cfg.indexer_latency, cfg.indexer_errors, "kadindexer-balance")
+        if failed:
+            return failed
+        per_chain = {str(c): b for c in range(CHAINS) if (b := balance_of(address, c))}
+        return {"total": sum(per_chain.values()), "per_chain": per_chain}
+
+    @app.get("/kadindexer/account/{address}/txcount24h")
+    async def indexer_txcount(address: str):
+        failed = await delay_or_fail(cfg.indexer_latency, cfg.indexer_errors, "kadindexer-txcount")
+        if failed:
+            return failed
+        now = time.time()
+        return {"txcount24h": sum(1 for _, ts in transactions_of(address, now) if ts >= now - 86400)}
+
+    @app.get("/explorer/transactions")
+    async def explorer(search: str, limit: int = 200, offset: int = 0):
+        failed = await delay_or_fail(cfg.explorer_latency, cfg.explorer_errors, "explorer")
+        if failed:
+            return failed
+        page = transactions_of(search, time.time())[offset:offset + limit]
+        return {"items": [{"requestKey": key, "creationTime": _timestamp(ts, cfg.quirks)} for key, ts in page]}
+
+    @app.get("/_stats")
+    async def get_stats():
+        upstream = sum(v for k, v in stats.items() if k not in ("errors", "format-rejected"))
+        return {"upstream_calls": upstream, **stats}
+
+    @app.post("/_stats/reset")
+    async def reset_stats():
+        stats.clear()
+        return {"ok": True}
+
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9100)
+    ap.add_argument("--pact-latency", default="lognormal:40:0.5")
+    ap.add_argument("--indexer-latency", default="lognormal:60:0.4")
+    ap.add_argument("--explorer-latency", default="lognormal:120:0.6")
+    ap.add_argument("--pact-errors", type=float, default=0.0, help="fraction of /local calls answered 503")
+    ap.add_argument("--indexer-errors", type=float, default=0.0)
+    ap.add_argument("--explorer-errors", type=float, default=0.0)
+    ap.add_argument("--pact-format", choices=("any", "raw", "cmd", "cmd-string"), default="any",
+                    help="only this /local body format is accepted (others get a 400)")
+    ap.add_argument("--quirks", default="", help=f"comma-separated payload quirks: {', '.join(QUIRKS)}")
+    ap.add_argument("--block-time", type=float, default=30.0, help="seconds between blocks per chain")
+    ap.add_argument("--seed", type=int, default=1)
+    return ap
+
+
+def main():
+    import uvicorn
+    args = build_parser().parse_args()
+    uvicorn.run(create_app(Config(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
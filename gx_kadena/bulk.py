@@ -0,0 +1,277 @@
+"""
+Offline bulk validation, without the HTTP layer.
+
+    python -m gx_kadena.bulk addresses.txt --out results.ndjson [--iso camt053]
+
+Reads one address per line as a stream and writes one NDJSON line per
+address, in input order (same shape as POST /validate/batch). Lookups run
+through validator.validate_address with at most --concurrency in flight;
+balances are read BATCH_PREFETCH lines at a time with one call per chain
+(validator.prefetch_balances). Optional ISO XML rendering runs in a process
+pool. Progress is checkpointed next to the output (input line + output
+byte offset), so a
+rerun after a crash truncates the output to the last checkpoint and
+resumes from there. Throughput and ETA are reported on stderr.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from typing import BinaryIO, Deque, Dict, Iterator, Optional, Tuple
+
+from .config import BATCH_CONCURRENCY, BATCH_PREFETCH, VALIDATE_DEADLINE, ISO_FAST_PATH
+from .deadline import Deadline
+from .http_pool import shutdown as shutdown_http_pool
+from .iso.bulk import validate_with_rwa
+from .logs import get_logger
+from .validator import missing_inputs, prefetch_balances, validate_address
+
+logger = get_logger("bulk")
+
+CHECKPOINT_EVERY = 1000  # lines
+CHECKPOINT_INTERVAL = 5.0  # seconds
+PROGRESS_INTERVAL = 2.0  # seconds
+
+
+def render_iso(kind: str, address: str, balance: float, risk: int, rwa_block: dict) -> str:
+    """ISO document for one result (runs in a worker process)."""
+    if kind == "camt053":
+        from .iso.camt053 import xml_camt053
+        from .iso.fast import fast_camt053
+        render_camt = fast_camt053 if ISO_FAST_PATH else xml_camt053
+        return render_camt(address, balance, risk, rwa_block).decode("utf-8")
+    from .iso.pacs008 import xml_pacs008
+    from .iso.fast import fast_pacs008
+    from .iso.camt053 import format_amount
+    render_pacs = fast_pacs008 if ISO_FAST_PATH else xml_pacs008
+    return render_pacs(address, "GX-BULK", format_amount(balance), "KDA", risk, rwa_block).decode("utf-8")
+
+
+class Checkpoint:
+    """{"input", "line", "offset", "done"} in a JSON file, replaced atomically."""
+
+    def __init__(self, path: str, input_path: str):
+        self.path = path
+        self.input_path = os.path.abspath(input_path)
+
+    def load(self) -> Optional[dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get("input") == self.input_path else None
+
+    def save(self, line: int, offset: int, done: bool = False) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"input": self.input_path, "line": line, "offset": offset, "done": done}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class Progress:
+    def __init__(self, total: int, done: int, stream=sys.stderr):
+        self.total = total
+        self.start_done = done
+        self.done = done
+        self.t0 = time.monotonic()
+        self.last = 0.0
+        self.stream = stream
+
+    def update(self, done: int, force: bool = False) -> None:
+        self.done = done
+        now = time.monotonic()
+        if not force and now - self.last < PROGRESS_INTERVAL:
+            return
+        self.last = now
+        elapsed = max(1e-9, now - self.t0)
+        rate = (done - self.start_done) / elapsed
+        left = max(0, self.total - done)
+        eta = left / rate if rate > 0 else float("inf")
+        eta_s = "--:--" if eta == float("inf") else f"{int(eta // 60):02d}:{int(eta % 60):02d}"
+        self.stream.write(f"\r{done}/{self.total} lines  {rate:8.1f}/s  ETA {eta_s}   ")
+        self.stream.flush()
+
+
+def count_lines(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+
+def read_lines(path: str, skip: int) -> Iterator[Tuple[int, str]]:
+    """(line number, stripped line) from `skip` on, read lazily."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for n, line in enumerate(f):
+            if n >= skip:
+                yield n, line.strip().strip('"')
+
+
+def _resume_point(state: Optional[dict], out_path: str) -> Tuple[int, int]:
+    """
+    (input line, output offset) to continue from. Starts over if the output
+    is missing or shorter than the checkpointed offset, since resuming would
+    otherwise pad it with NUL bytes and lose the lines before the offset.
+    """
+    if not state:
+        return 0, 0
+    try:
+        size = os.path.getsize(out_path)
+    except OSError:
+        size = -1
+    if size < state["offset"]:
+        logger.warning("[bulk] %s is missing or shorter than its checkpoint; starting over", out_path)
+        return 0, 0
+    return state["line"], state["offset"]
+
+
+@contextmanager
+def _output(path: str, offset: int) -> Iterator[BinaryIO]:
+    """The output file, truncated to `offset` (dropping any torn write) and positioned there."""
+    with open(path, "r+b" if offset else "wb") as out:
+        out.truncate(offset)
+        out.seek(offset)
+        yield out
+
+
+async def _process(address: str, deadline_s: float, iso: Optional[str], pool) -> str:
+    """
+    One output line; any failure (lookup, RWA, rendering, a broken pool)
+    becomes an error line, and so does a result missing an input when an
+    ISO document was asked for (see validator.missing_inputs).
+    """
+    try:
+        if not iso:
+            res = await validate_address(address, deadline=Deadline(deadline_s))
+            return json.dumps(res.model_dump(mode="json"))
+        # validation and RWA holdings share the per-address budget
+        res, rwa_block = await validate_with_rwa(address, Deadline(deadline_s))
+        missing = missing_inputs(res)
+        if missing:
+            return json.dumps({"address": res.address, "error": "upstream data unavailable", "flags": missing})
+        doc = res.model_dump(mode="json")
+        loop = asyncio.get_running_loop()
+        doc["iso_xml"] = await loop.run_in_executor(
+            pool, render_iso, iso, res.address, res.total_balance, res.risk_score, rwa_block
+        )
+        return json.dumps(doc)
+    except Exception as e:
+        return json.dumps({"address": address, "error": str(e) or type(e).__name__})
+
+
+async def run(input_path: str, out_path: str, concurrency: int = BATCH_CONCURRENCY,
+              deadline_s: float = VALIDATE_DEADLINE, iso: Optional[str] = None, workers: Optional[int] = None,
+              checkpoint_path: Optional[str] = None, restart: bool = False, progress: bool = True) -> int:
+    """Validate every line of `input_path` into `out_path`; returns the number of lines written."""
+    ckpt = Checkpoint(checkpoint_path or out_path + ".ckpt", input_path)
+    state = None if restart else ckpt.load()
+    if state and state.get("done"):
+        logger.warning("[bulk] %s already complete (use --restart to redo)", out_path)
+        return 0
+    start_line, offset = _resume_point(state, out_path)
+
+    total = count_lines(input_path)
+    prog = Progress(total, start_line) if progress else None
+    with _output(out_path, offset) as out:
+        window = max(1, concurrency) * 4  # lines ahead of the oldest unwritten one
+        in_flight: Dict[asyncio.Task, int] = {}
+        ready: Dict[int, Optional[str]] = {}
+        next_write = next_read = start_line
+        written = 0
+        last_ckpt = (start_line, time.monotonic())
+        lines = read_lines(input_path, start_line)
+        queued: Deque[Tuple[int, str]] = deque()  # read, balances prefetched, not yet started
+        exhausted = False
+
+        pool = None
+        if iso:
+            pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        try:
+            while True:
+                # Bounded read-ahead: memory stays flat however long the input is
+                # and however slow the oldest unwritten address is.
+                while len(in_flight) < max(1, concurrency) and next_read - next_write < window:
+                    if not queued and not exhausted:
+                        queued.extend(islice(lines, max(1, BATCH_PREFETCH)))
+                        exhausted = len(queued) < max(1, BATCH_PREFETCH)
+                        await prefetch_balances([a for _, a in queued if a])
+                    if not queued:
+                        break
+                    n, address = queued.popleft()
+                    next_read = n + 1
+                    if not address:
+                        ready[n] = None  # blank line: nothing to write
+                        continue
+                    in_flight[asyncio.ensure_future(_process(address, deadline_s, iso, pool))] = n
+
+                while next_write in ready:
+                    line = ready.pop(next_write)
+                    if line is not None:
+                        out.write(line.encode("utf-8") + b"\n")
+                        written += 1
+                    next_write += 1
+                if prog:
+                    prog.update(next_write)
+                if next_write - last_ckpt[0] >= CHECKPOINT_EVERY or time.monotonic() - last_ckpt[1] >= CHECKPOINT_INTERVAL:
+                    out.flush()
+                    os.fsync(out.fileno())
+                    ckpt.save(next_write, out.tell())
+                    last_ckpt = (next_write, time.monotonic())
+
+                if not in_flight:
+                    if exhausted and not queued and not ready:
+                        break
+                    continue
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    ready[in_flight.pop(task)] = task.result()
+
+            out.flush()
+            os.fsync(out.fileno())
+            ckpt.save(next_write, out.tell(), done=True)
+            if prog:
+                prog.update(next_write, force=True)
+                prog.stream.write("\n")
+            return written
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            await shutdown_http_pool()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m gx_kadena.bulk", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("input", help="file with one address per line")
+    ap.add_argument("--out", required=True, help="NDJSON output file")
+    ap.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="addresses validated at once")
+    ap.add_argument("--deadline", type=float, default=VALIDATE_DEADLINE, help="seconds per address")
+    ap.add_argument("--iso", choices=("camt053", "pacs008"), help="also render an ISO 20022 document per address")
+    ap.add_argument("--workers", type=int, default=None, help="ISO rendering processes (default: CPU count)")
+    ap.add_argument("--checkpoint", help="checkpoint file (default: <out>.ckpt)")
+    ap.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    ap.add_argument("--quiet", action="store_true", help="no progress output")
+    args = ap.parse_args(argv)
+    written = asyncio.run(run(
+        args.input, args.out, concurrency=args.concurrency, deadline_s=args.deadline, iso=args.iso,
+        workers=args.workers, checkpoint_path=args.checkpoint, restart=args.restart, progress=not args.quiet,
+    ))
+    if not args.quiet:
+        sys.stderr.write(f"{written} results written to {args.out}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
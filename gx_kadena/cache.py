@@ -0,0 +1,322 @@
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Set, Tuple
+
+from .config import CACHE_BACKEND, CACHE_SQLITE_PATH, CACHE_SQLITE_BUSY_TIMEOUT, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+from .logs import get_logger
+from .metrics import CACHE_EVENTS
+from .singleflight import SingleFlight
+
+logger = get_logger("cache")
+
+FRESH, STALE, MISS = "fresh", "stale", "miss"
+
+# A stored record: (value, stored_at, ttl, stale_ttl)
+Record = Tuple[Any, float, float, float]
+
+
+def approx_size(value: Any) -> int:
+    """Rough deep size in bytes of the small tuples/dicts we cache."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approx_size(v) for v in value)
+    return size
+
+
+class MemoryBackend:
+    """Per-process LRU store bounded by entry count and approximate bytes."""
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, Tuple[Record, int]]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Record]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        record = entry[0]
+        if self.clock() - record[1] >= record[2] + record[3]:  # past its stale window
+            self.delete(key)
+            return None
+        self._data.move_to_end(key)
+        return record
+
+    def set(self, key: Hashable, record: Record) -> None:
+        self.delete(key)
+        size = approx_size(record[0])
+        self._data[key] = (record, size)
+        self._bytes += size
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, old_size) = self._data.popitem(last=False)
+            self._bytes -= old_size
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "entries": len(self._data), "bytes": self._bytes, "evictions": self.evictions}
+
+
+class SQLiteBackend:
+    """
+    Host-wide store shared by all uvicorn workers through one SQLite file in
+    WAL mode. Readers never block each other or the writer, so the hot path
+    (a point SELECT) does not contend on a lock. Reads do not write: expired
+    rows are ignored and purged every _TRIM_EVERY writes, and eviction beyond
+    `max_entries` is oldest-stored-first rather than strict LRU.
+    Values are stored as JSON; `decode` rebuilds the cached Python value.
+
+    Queries run on the event loop, so a locked database is waited on for at
+    most `busy_timeout` seconds. Any sqlite3 error is logged and counted: a
+    failed read is a miss and a failed write is dropped, never a failed request.
+    """
+
+    clock = staticmethod(time.time)
+    _TRIM_EVERY = 256  # writes between expiry/size sweeps
+
+    def __init__(self, namespace: str, path: str = CACHE_SQLITE_PATH, max_entries: int = CACHE_MAX_ENTRIES,
+                 decode: Optional[Callable[[Any], Any]] = None, busy_timeout: float = CACHE_SQLITE_BUSY_TIMEOUT):
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self.decode = decode
+        self.busy_timeout = busy_timeout
+        self.evictions = 0
+        self.errors = 0
+        self._writes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per process (workers are forked/spawned after import).
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " stored_at REAL NOT NULL, ttl REAL NOT NULL, stale_ttl REAL NOT NULL, PRIMARY KEY (ns, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_age ON cache (ns, stored_at)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _failed(self, op: str, e: sqlite3.Error) -> None:
+        self.errors += 1
+        logger.warning("[cache] sqlite %s failed for %s: %r", op, self.namespace, e)
+
+    def _count(self, db: sqlite3.Connection) -> int:
+        return db.execute("SELECT COUNT(*) FROM cache WHERE ns = ?", (self.namespace,)).fetchone()[0]
+
+    def __len__(self) -> int:
+        try:
+            return self._count(self._db())
+        except sqlite3.Error as e:
+            self._failed("count", e)
+            return 0
+
+    def get(self, key: Hashable) -> Optional[Record]:
+        try:
+            row = self._db().execute(
+                "SELECT value, stored_at, ttl, stale_ttl FROM cache"
+                " WHERE ns = ? AND key = ? AND stored_at + ttl + stale_ttl > ?",
+                (self.namespace, str(key), self.clock()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._failed("read", e)
+            return None
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        if self.decode is not None:
+            value = self.decode(value)
+        return value, row[1], row[2], row[3]
+
+    def set(self, key: Hashable, record: Record) -> None:
+        value, stored_at, ttl, stale_ttl = record
+        try:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO cache (ns, key, value, stored_at, ttl, stale_ttl) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, str(key), json.dumps(value), stored_at, ttl, stale_ttl),
+            )
+            self._writes += 1
+            if self._writes % self._TRIM_EVERY == 0:
+                self._trim(db)
+        except sqlite3.Error as e:
+            self._failed("write", e)
+
+    def _trim(self, db: sqlite3.Connection) -> None:
+        cur = db.execute(
+            "DELETE FROM cache WHERE ns = ? AND stored_at + ttl + stale_ttl < ?", (self.namespace, self.clock())
+        )
+        self.evictions += cur.rowcount
+        excess = self._count(db) - self.max_entries
+        if excess > 0:
+            cur = db.execute(
+                "DELETE FROM cache WHERE ns = ? AND key IN"
+                " (SELECT key FROM cache WHERE ns = ? ORDER BY stored_at LIMIT ?)",
+                (self.namespace, self.namespace, excess),
+            )
+            self.evictions += cur.rowcount
+
+    def delete(self, key: Hashable) -> None:
+        try:
+            self._db().execute("DELETE FROM cache WHERE ns = ? AND key = ?", (self.namespace, str(key)))
+        except sqlite3.Error as e:
+            self._failed("delete", e)
+
+    def clear(self) -> None:
+        self._db().execute("DELETE FROM cache WHERE ns = ?", (self.namespace,))
+
+    def stats(self) -> dict:
+        return {"backend": "sqlite", "entries": len(self), "path": self.path, "evictions": self.evictions,
+                "errors": self.errors}
+
+
+def make_backend(namespace: str, decode: Optional[Callable[[Any], Any]] = None):
+    """Backend selected by CACHE_BACKEND: "memory" (default, per process) or "sqlite" (per host)."""
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteBackend(namespace, decode=decode)
+    if CACHE_BACKEND != "memory":
+        logger.warning("[cache] unknown CACHE_BACKEND=%r; using memory", CACHE_BACKEND)
+    return MemoryBackend()
+
+
+class TTLCache:
+    """
+    Result cache for upstream lookups on top of a pluggable backend.
+
+    - positive results live `ttl` seconds, negative/failed ones `negative_ttl`
+    - a positive entry past its TTL is still served for `stale_ttl` seconds
+      while a background refresh runs (stale-while-revalidate)
+    - size bounds and eviction are handled by the backend
+      (MemoryBackend by default: LRU by entry count and approximate bytes)
+    """
+
+    def __init__(self, name: str, ttl: float, negative_ttl: float, stale_ttl: float = 0.0,
+                 max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES, backend=None):
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.backend = backend if backend is not None else MemoryBackend(max_entries, max_bytes)
+        self._refreshing: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    @property
+    def evictions(self) -> int:
+        return self.backend.evictions
+
+    def lookup(self, key: Hashable) -> Tuple[str, Any]:
+        """Return (FRESH|STALE|MISS, value) without touching the counters."""
+        record = self.backend.get(key)
+        if record is None:
+            return MISS, None
+        value, stored_at, ttl, stale_ttl = record
+        age = self.backend.clock() - stored_at
+        if age < ttl:
+            return FRESH, value
+        if age < ttl + stale_ttl:
+            return STALE, value
+        return MISS, None  # expired: the backend drops it (sqlite: on a later write, never on a read)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        state, value = self.lookup(key)
+        return value if state == FRESH else default
+
+    def remaining_ttl(self, key: Hashable) -> float:
+        """Seconds until the entry for `key` stops being fresh (0 if absent/stale)."""
+        record = self.backend.get(key)
+        if record is None:
+            return 0.0
+        return max(0.0, record[1] + record[2] - self.backend.clock())
+
+    def set(self, key: Hashable, value: Any, negative: bool = False) -> None:
+        ttl, stale_ttl = (self.negative_ttl, 0.0) if negative else (self.ttl, self.stale_ttl)
+        if ttl <= 0:
+            self.backend.delete(key)
+            return
+        evicted = self.backend.evictions
+        self.backend.set(key, (value, self.backend.clock(), ttl, stale_ttl))
+        if self.backend.evictions != evicted:
+            CACHE_EVENTS.labels(self.name, "eviction").inc(self.backend.evictions - evicted)
+
+    def delete(self, key: Hashable) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                          is_negative: Callable[[Any], bool], flight: Optional[SingleFlight] = None) -> Any:
+        """
+        Serve `key` from cache, loading it with `loader()` on a miss. A stale
+        hit returns immediately and schedules one background refresh. Loads go
+        through `flight` (if given) so concurrent misses share one call.
+        """
+        async def load_and_store():
+            value = await loader()
+            self.set(key, value, negative=is_negative(value))
+            return value
+
+        async def load():
+            if flight is None:
+                return await load_and_store()
+            return await flight.do(key, load_and_store)
+
+        state, value = self.lookup(key)
+        if state == FRESH:
+            self.hits += 1
+            CACHE_EVENTS.labels(self.name, "hit").inc()
+            return value
+        if state == STALE:
+            self.stale_hits += 1
+            CACHE_EVENTS.labels(self.name, "stale").inc()
+            task = asyncio.get_running_loop().create_task(load())
+            self._refreshing.add(task)
+            task.add_done_callback(self._refresh_done)
+            return value
+        self.misses += 1
+        CACHE_EVENTS.labels(self.name, "miss").inc()
+        return await load()
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refreshing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("[cache:%s] background refresh failed: %r", self.name, task.exception())
+
+    def stats(self) -> dict:
+        return {
+            **self.backend.stats(),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
@@ -1,8 +1,22 @@
 import os
+import tempfile
 
 ALLOWED_ORIGIN = os.getenv("ALLOWED_ORIGIN", "*")
 API_TIMEOUT = float(os.getenv("API_TIMEOUT", "8.0"))
+# Per-client limits (keyed by client IP, or by X-API-Key when the key is one of
+# RATE_LIMIT_API_KEYS). RATE_LIMIT_RPS applies to
+# upstream-heavy routes (/validate, /risk, /iso, /rwa, /watch), the CHEAP pair to the rest.
 RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "10"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", str(RATE_LIMIT_RPS)))
+RATE_LIMIT_CHEAP_RPS = float(os.getenv("RATE_LIMIT_CHEAP_RPS", "50"))
+RATE_LIMIT_CHEAP_BURST = float(os.getenv("RATE_LIMIT_CHEAP_BURST", str(RATE_LIMIT_CHEAP_RPS)))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+# Comma-separated API keys that get their own limit; any other X-API-Key is ignored.
+RATE_LIMIT_API_KEYS = frozenset(k.strip() for k in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if k.strip())
+# Limits are enforced per process; set to the worker count to split them across workers.
+RATE_LIMIT_WORKERS = max(1, int(os.getenv("RATE_LIMIT_WORKERS", "1")))
+# Only enable behind a trusted reverse proxy that sets X-Forwarded-For.
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
 
 # ---------- Kadena Public RPC Nodes ----------
 # Default ONLY to the official public node. Override via env if necessary,
@@ -16,8 +30,31 @@ KADENA_PACT_BASES = [
     if base.strip()
 ]
 
+# Bases are ordered per call by observed latency (EWMA) inflated by error rate.
+NODE_EWMA_ALPHA = float(os.getenv("NODE_EWMA_ALPHA", "0.2"))
+NODE_ERROR_PENALTY = float(os.getenv("NODE_ERROR_PENALTY", "4.0"))
+NODE_LATENCY_WINDOW = int(os.getenv("NODE_LATENCY_WINDOW", "200"))  # samples kept for p95
+# Circuit breaker per base: open after N consecutive failures, probe again after RESET seconds.
+NODE_BREAKER_FAILURES = int(os.getenv("NODE_BREAKER_FAILURES", "5"))
+NODE_BREAKER_RESET = float(os.getenv("NODE_BREAKER_RESET", "30"))
+# Hedged requests: if the preferred base is slower than its p95, also ask the next one.
+PACT_HEDGE = os.getenv("PACT_HEDGE", "true").lower() in ("1", "true", "yes")
+PACT_HEDGE_MAX = int(os.getenv("PACT_HEDGE_MAX", "1"))
+PACT_HEDGE_MIN_DELAY = float(os.getenv("PACT_HEDGE_MIN_DELAY", "0.05"))
+PACT_HEDGE_DEFAULT_DELAY = float(os.getenv("PACT_HEDGE_DEFAULT_DELAY", "1.0"))  # until p95 is known
+
 MAINNET = os.getenv("MAINNET", "mainnet01")
 CHAINS = list(range(0, 20))
+# Max number of chains queried at the same time during a balance fan-out.
+CHAIN_CONCURRENCY = int(os.getenv("CHAIN_CONCURRENCY", "20"))
+
+# ---------- Pact /local limits ----------
+PACT_GAS_LIMIT = int(os.getenv("PACT_GAS_LIMIT", "150000"))
+# Multi-address balance queries: accounts per /local call are bounded by the
+# gas budget (estimated gas per account) and by the request payload size.
+PACT_BATCH_GAS_PER_ACCOUNT = int(os.getenv("PACT_BATCH_GAS_PER_ACCOUNT", "500"))
+PACT_BATCH_MAX_BYTES = int(os.getenv("PACT_BATCH_MAX_BYTES", "48000"))
+PACT_BATCH_MAX_SIZE = int(os.getenv("PACT_BATCH_MAX_SIZE", "250"))
 
 # Kadena explorer (legacy)
 KADENA_EXPLORER_BASE = os.getenv(
@@ -28,6 +65,98 @@ KADENA_EXPLORER_BASE = os.getenv(
 KADINDEXER_API_KEY = os.getenv("KADINDEXER_API_KEY", "")
 KADINDEXER_BASE = os.getenv("KADINDEXER_BASE", "https://api.mainnet.kadindexer.io/v1/")
 
+# ---------- 24h tx counting (explorer fallback) ----------
+# The explorer is paged TXCOUNT_PAGE_SIZE items at a time, at most TXCOUNT_MAX_PAGES
+# per query; per-address 24h windows are kept for TXCOUNT_MAX_ADDRESSES addresses.
+TXCOUNT_PAGE_SIZE = int(os.getenv("TXCOUNT_PAGE_SIZE", "200"))
+TXCOUNT_MAX_PAGES = int(os.getenv("TXCOUNT_MAX_PAGES", "50"))
+TXCOUNT_MAX_ADDRESSES = int(os.getenv("TXCOUNT_MAX_ADDRESSES", "10000"))
+
+# ---------- Block-height-aware caching ----------
+# A background task polls the chainweb cut every CUT_POLL_INTERVAL seconds.
+# While its data is younger than CUT_MAX_AGE, per-chain balances stay fresh
+# until that chain's height moves; otherwise the time-based TTLs below apply.
+CUT_WATCHER = os.getenv("CUT_WATCHER", "true").lower() in ("1", "true", "yes")
+CUT_POLL_INTERVAL = float(os.getenv("CUT_POLL_INTERVAL", "10.0"))
+CUT_MAX_AGE = float(os.getenv("CUT_MAX_AGE", "30.0"))
+
+# ---------- Result caches (per process, bounded LRU) ----------
+BALANCE_CACHE_TTL = float(os.getenv("BALANCE_CACHE_TTL", "20"))         # positive results, seconds
+BALANCE_CACHE_NEG_TTL = float(os.getenv("BALANCE_CACHE_NEG_TTL", "5"))  # zero / not found
+TXCOUNT_CACHE_TTL = float(os.getenv("TXCOUNT_CACHE_TTL", "30"))
+TXCOUNT_CACHE_NEG_TTL = float(os.getenv("TXCOUNT_CACHE_NEG_TTL", "5"))  # upstream failed
+GUARD_CACHE_TTL = float(os.getenv("GUARD_CACHE_TTL", "3600"))         # contract-like verdict per address
+GUARD_CACHE_NEG_TTL = float(os.getenv("GUARD_CACHE_NEG_TTL", "5"))    # some chain did not answer
+# Expired positive entries are still served this long while a refresh runs.
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# "memory" = per worker process; "sqlite" = one WAL-mode file shared by all workers on the host
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "gx_kadena_cache.db"))
+# How long a query waits for a locked database before it counts as a miss / dropped write, seconds.
+CACHE_SQLITE_BUSY_TIMEOUT = float(os.getenv("CACHE_SQLITE_BUSY_TIMEOUT", "0.05"))
+
+# HTTP caching for /validate, /risk and /iso/*.xml: Cache-Control max-age is
+# the remaining freshness of the cached inputs, capped at this many seconds.
+HTTP_CACHE_MAX_AGE = float(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+# ---------- Per-request deadlines (seconds) ----------
+# Balance, tx-count and contract lookups run concurrently; whatever has not
+# answered by the deadline is reported as unavailable in the result flags.
+VALIDATE_DEADLINE = float(os.getenv("VALIDATE_DEADLINE", "6.0"))
+RISK_DEADLINE = float(os.getenv("RISK_DEADLINE", "4.0"))
+ISO_DEADLINE = float(os.getenv("ISO_DEADLINE", "8.0"))
+
+# ---------- Batch validation ----------
+# Lookups run at most BATCH_CONCURRENCY at a time per batch request.
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Balances of up to BATCH_PREFETCH queued addresses are read with one /local call
+# per chain (kadena_client.get_balances_batch) before they are validated; 0 = off.
+BATCH_PREFETCH = int(os.getenv("BATCH_PREFETCH", "100"))
+VALIDATE_BATCH_MAX = int(os.getenv("VALIDATE_BATCH_MAX", "10000"))
+
+# ---------- ISO 20022 export ----------
+# Fast path renders single documents from precompiled skeletons (same bytes as lxml).
+ISO_FAST_PATH = os.getenv("ISO_FAST_PATH", "true").lower() in ("1", "true", "yes")
+# Directory with camt.053.001.02.xsd / pacs.008.001.02.xsd; when ISO_VALIDATE is
+# on, every exported document is checked against the (cached) compiled schema.
+ISO_XSD_DIR = os.getenv("ISO_XSD_DIR", "")
+ISO_VALIDATE = os.getenv("ISO_VALIDATE", "false").lower() in ("1", "true", "yes")
+
+# ---------- Watch subscriptions (GET /watch) ----------
+# One poller refreshes every watched address per interval (sooner on new block heights).
+WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "30"))
+# New block heights refresh watched addresses early, but at most this often (seconds).
+WATCH_MIN_INTERVAL = float(os.getenv("WATCH_MIN_INTERVAL", "10"))
+WATCH_CONCURRENCY = int(os.getenv("WATCH_CONCURRENCY", "16"))
+WATCH_MAX_ADDRESSES = int(os.getenv("WATCH_MAX_ADDRESSES", "10000"))   # distinct, across all clients
+WATCH_MAX_PER_CLIENT = int(os.getenv("WATCH_MAX_PER_CLIENT", "1000"))     # addresses per subscription
+WATCH_MAX_SUBSCRIBERS = int(os.getenv("WATCH_MAX_SUBSCRIBERS", "1000"))
+WATCH_MAX_STREAMS_PER_CLIENT = int(os.getenv("WATCH_MAX_STREAMS_PER_CLIENT", "4"))  # open subscriptions per client key
+WATCH_KEEPALIVE = float(os.getenv("WATCH_KEEPALIVE", "15"))  # SSE comment line when idle, seconds
+
+# ---------- RWA holdings ----------
+# JSON file listing the RWA token modules to read (see rwa/contracts.py); unset = none.
+RWA_REGISTRY = os.getenv("RWA_REGISTRY", "")
+RWA_CACHE_TTL = float(os.getenv("RWA_CACHE_TTL", "60"))
+RWA_CACHE_NEG_TTL = float(os.getenv("RWA_CACHE_NEG_TTL", "5"))  # some chain did not answer
+
+# ---------- Shared HTTP client pools (one per upstream) ----------
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 multiplexing needs the optional `h2` package (pip install "httpx[http2]").
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# ---------- Logging ----------
+# WARNING by default so nothing is written on the normal request path.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records beyond this are dropped
+# Repetitive messages: at most BURST records per message template per WINDOW seconds.
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "5"))
+LOG_SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW", "10"))
+
 # Debug helper
 def debug_config():
     print("[CONFIG] ALLOWED_ORIGIN:", ALLOWED_ORIGIN)
@@ -36,3 +165,4 @@ def debug_config():
     print("[CONFIG] KADINDEXER_BASE:", KADINDEXER_BASE)
     print("[CONFIG] CHAINS:", CHAINS)
     print("[CONFIG] TIMEOUT:", API_TIMEOUT)
+    print("[CONFIG] HTTP POOL:", HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, "http2" if HTTP2_ENABLED else "http1.1")
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from .config import (
+    KADENA_PACT_BASES, MAINNET, API_TIMEOUT, CUT_POLL_INTERVAL, CUT_MAX_AGE, CACHE_MAX_ENTRIES
+)
+from .http_pool import get_client
+from .logs import get_logger
+from .metrics import CACHE_EVENTS
+
+logger = get_logger("cut_watcher")
+
+
+class CutWatcher:
+    """
+    Polls the chainweb `cut` endpoint (one call covers every chain) and keeps
+    the latest block height per chain. Consumers treat data read at a chain's
+    current height as fresh until that height moves.
+    """
+
+    def __init__(self, bases: Optional[List[str]] = None, interval: float = CUT_POLL_INTERVAL,
+                 max_age: float = CUT_MAX_AGE):
+        self.bases = bases if bases is not None else KADENA_PACT_BASES
+        self.interval = interval
+        self.max_age = max_age
+        self.heights: Dict[int, int] = {}
+        self.updated_at = 0.0
+        self.polls = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def live(self) -> bool:
+        """Heights are known and recent enough to drive cache freshness."""
+        return bool(self.heights) and time.monotonic() - self.updated_at < self.max_age
+
+    def height(self, chain: int) -> Optional[int]:
+        return self.heights.get(chain) if self.live() else None
+
+    async def poll_once(self) -> bool:
+        """Fetch the cut from the first base that answers; True on success."""
+        self.polls += 1
+        for base in self.bases:
+            url = f"{base}/chainweb/0.0/{MAINNET}/cut"
+            try:
+                r = await get_client("pact").get(url, timeout=API_TIMEOUT)
+                if r.status_code != 200:
+                    logger.warning("[cut_watcher] %s status %s", url, r.status_code)
+                    continue
+                hashes = r.json().get("hashes") or {}
+                heights = {int(c): int(h["height"]) for c, h in hashes.items()}
+            except Exception as e:
+                logger.warning("[cut_watcher] %s error %r", url, e)
+                continue
+            if heights:
+                self.heights = heights
+                self.updated_at = time.monotonic()
+                return True
+        self.errors += 1
+        return False
+
+    async def run(self) -> None:
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "live": self.live(),
+            "max_height": max(self.heights.values()) if self.heights else None,
+            "age_s": round(time.monotonic() - self.updated_at, 1) if self.updated_at else None,
+            "polls": self.polls,
+            "errors": self.errors,
+        }
+
+
+class HeightCache:
+    """
+    Per-chain values tagged with the block height they were read at:
+    key -> {chain: (value, height)}. An entry is valid while the chain's
+    current height equals its tag. LRU-bounded by key count.
+    """
+
+    def __init__(self, name: str, max_entries: int = CACHE_MAX_ENTRIES):
+        self.name = name
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Dict[int, Tuple[object, int]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, chain: int, height: Optional[int]):
+        """Cached value for `chain` if it was read at `height`, else None."""
+        entry = self._data.get(key, {}).get(chain)
+        if height is not None and entry is not None and entry[1] == height:
+            self._data.move_to_end(key)
+            self.hits += 1
+            CACHE_EVENTS.labels(self.name, "hit").inc()
+            return entry[0]
+        self.misses += 1
+        CACHE_EVENTS.labels(self.name, "miss").inc()
+        return None
+
+    def is_current(self, key: Hashable, chain: int, height: Optional[int]) -> bool:
+        """Was `chain`'s entry for `key` read at `height`? (no hit/miss accounting)"""
+        entry = self._data.get(key, {}).get(chain)
+        return height is not None and entry is not None and entry[1] == height
+
+    def set(self, key: Hashable, chain: int, value, height: int) -> None:
+        self._data.setdefault(key, {})[chain] = (value, height)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            CACHE_EVENTS.labels(self.name, "eviction").inc()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
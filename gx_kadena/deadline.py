@@ -0,0 +1,52 @@
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+from .config import API_TIMEOUT
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The request's time budget ran out before the lookup could finish."""
+
+
+class Deadline:
+    """
+    Time budget of one request. Created at the endpoint and passed down to
+    every upstream call, which takes its timeout from what is left instead
+    of a fixed API_TIMEOUT, so the request as a whole stays within budget.
+    """
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def check(self) -> None:
+        """Raise DeadlineExceeded if the budget is spent."""
+        if self.expired:
+            raise DeadlineExceeded(f"deadline of {self.budget:.2f}s exceeded")
+
+
+def timeout_for(deadline: Optional[Deadline], cap: float = API_TIMEOUT) -> float:
+    """Timeout for the next upstream call: `cap`, or less if the budget is nearly spent."""
+    return cap if deadline is None else min(cap, deadline.remaining())
+
+
+def expired(deadline: Optional[Deadline]) -> bool:
+    return deadline is not None and deadline.expired
+
+
+async def bounded(aw: Awaitable[T], deadline: Optional[Deadline], cap: float = API_TIMEOUT) -> T:
+    """
+    Await `aw` for at most timeout_for(deadline, cap) seconds in total.
+    (httpx timeouts apply per connect/read/write phase, not to the whole call.)
+    """
+    return await asyncio.wait_for(aw, timeout_for(deadline, cap))
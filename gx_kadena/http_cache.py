@@ -0,0 +1,60 @@
+"""
+Conditional GET support for the per-address endpoints.
+
+The ETag hashes what a response is computed from (balances, tx count,
+contract flag, risk result, RWA block, request parameters) rather than the
+body, so it is known before the body is built and ignores per-request
+fields such as timestamp, duration_ms or the ISO CreDtTm. A matching
+If-None-Match is answered with 304 without serializing anything.
+"""
+import hashlib
+import json
+from typing import Dict
+
+from fastapi import Request, Response
+
+from .config import HTTP_CACHE_MAX_AGE
+from .kadena_client import freshness
+from .rwa.assets import freshness as rwa_freshness
+
+
+def validation_inputs(res) -> list:
+    """The fields of a ValidationResult that depend on upstream data."""
+    per_chain = sorted((res.balances_per_chain or {}).items())
+    return [res.address, res.total_balance, res.balance, res.chain_found, per_chain,
+            res.tx_total_24h, res.is_contract, res.risk_score, res.flags, res.traction]
+
+
+def etag_for(kind: str, *parts) -> str:
+    """Strong ETag over `kind` and the JSON-serializable `parts`."""
+    raw = json.dumps([kind, *parts], default=str, separators=(",", ":"), sort_keys=True)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def cache_headers(etag: str, address: str, complete: bool = True, with_rwa: bool = False) -> Dict[str, str]:
+    """
+    ETag plus Cache-Control. max-age is how long the cached inputs stay
+    fresh (capped by HTTP_CACHE_MAX_AGE), including the RWA holdings for
+    responses built from them (`with_rwa`); results missing an input are
+    not stored by shared caches at all.
+    """
+    if not complete:
+        return {"ETag": etag, "Cache-Control": "no-store"}
+    fresh = freshness(address)
+    if with_rwa:
+        fresh = min(fresh, rwa_freshness(address))
+    max_age = int(min(HTTP_CACHE_MAX_AGE, fresh))
+    return {"ETag": etag, "Cache-Control": f"max-age={max_age}" if max_age > 0 else "no-cache"}
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True if If-None-Match lists `etag` (weak comparison, as RFC 9110 requires) or is *."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip() for t in header.split(",")}
+    return "*" in tags or etag in tags or "W/" + etag in tags
+
+
+def response_304(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,139 @@
+import asyncio
+from typing import Dict, Optional, Set, Tuple
+
+import httpx
+
+from .logs import get_logger
+from .config import (
+    API_TIMEOUT, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY, HTTP2_ENABLED
+)
+
+logger = get_logger("http_pool")
+
+# One pooled client per upstream so keep-alive connections (and TLS sessions)
+# are reused across requests instead of re-handshaking on every lookup.
+UPSTREAMS = ("pact", "kadindexer", "explorer")
+
+_clients: Dict[str, Tuple[Optional[asyncio.AbstractEventLoop], httpx.AsyncClient]] = {}
+_closing: Set["asyncio.Future[None]"] = set()  # replaced clients being closed
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _new_client() -> httpx.AsyncClient:
+    http2 = HTTP2_ENABLED and _http2_available()
+    if HTTP2_ENABLED and not http2:
+        logger.warning("[http_pool] HTTP2_ENABLED set but 'h2' is not installed; using HTTP/1.1")
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=API_TIMEOUT, http2=http2)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_client(upstream: str) -> httpx.AsyncClient:
+    """
+    Return the shared client for `upstream` ("pact", "kadindexer", "explorer").
+    Normally created once in the app lifespan; created lazily otherwise (tests,
+    scripts). Connections are bound to an event loop, so a client created on a
+    different loop is replaced rather than reused, and the old one is closed.
+    """
+    loop = _running_loop()
+    entry = _clients.get(upstream)
+    if entry is not None:
+        owner, client = entry
+        if not client.is_closed and (owner is None or owner is loop):
+            return client
+        _retire(owner, client, loop)
+    client = _new_client()
+    _clients[upstream] = (loop, client)
+    return client
+
+
+async def _close_quietly(client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except Exception as e:  # its loop is gone: the sockets go with the client
+        logger.debug("[http_pool] closing a replaced client failed: %r", e)
+
+
+def _retire(owner: Optional[asyncio.AbstractEventLoop], client: httpx.AsyncClient,
+            loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """
+    Close a client that get_client is replacing: on its own loop if that is
+    still running (another thread), otherwise on the current one.
+    """
+    if client.is_closed:
+        return
+    if owner is not None and owner.is_running() and not owner.is_closed():
+        asyncio.run_coroutine_threadsafe(_close_quietly(client), owner)
+        return
+    if loop is None:
+        logger.debug("[http_pool] replaced client left to the garbage collector (no running loop)")
+        return
+    task = loop.create_task(_close_quietly(client))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+async def startup() -> None:
+    for name in UPSTREAMS:
+        get_client(name)
+
+
+async def shutdown() -> None:
+    loop = _running_loop()
+    entries = list(_clients.values())
+    _clients.clear()
+    for owner, client in entries:
+        if owner is None or owner is loop:
+            await client.aclose()
+        else:
+            _retire(owner, client, loop)
+
+
+def _occupancy(client: httpx.AsyncClient) -> dict:
+    # Reads httpcore's private pool state; pool_stats() guards against it changing.
+    pool = getattr(client._transport, "_pool", None)
+    conns = list(getattr(pool, "connections", []) or [])
+    requests = list(getattr(pool, "_requests", []) or [])
+    return {
+        "http2": bool(getattr(pool, "_http2", False)),
+        "connections": len(conns),
+        "in_use": sum(1 for c in conns if not c.is_idle() and not c.is_closed()),
+        "idle": sum(1 for c in conns if c.is_idle()),
+        "waiting": sum(1 for r in requests if r.is_queued()),
+    }
+
+
+def pool_stats() -> Dict[str, dict]:
+    """
+    Connection pool occupancy per upstream, for sizing HTTP_MAX_* settings:
+    connections in use, idle keep-alive connections and requests waiting
+    for a free connection. If an httpx/httpcore upgrade changes the pool
+    internals, the upstream is reported as unavailable instead of failing.
+    """
+    stats: Dict[str, dict] = {}
+    for name, (_, client) in _clients.items():
+        try:
+            entry = _occupancy(client)
+        except Exception as e:
+            logger.warning("[http_pool] pool stats unavailable for %s: %r", name, e)
+            entry = {"unavailable": True}
+        entry.update(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive=HTTP_MAX_KEEPALIVE)
+        stats[name] = entry
+    return stats
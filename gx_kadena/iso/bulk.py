@@ -0,0 +1,169 @@
+"""
+Streaming multi-account ISO 20022 documents: one camt.053 with a Stmt per
+account, or one pacs.008 with a CdtTrfTxInf per account.
+
+Elements are built and serialized one at a time through etree.xmlfile, so
+memory does not grow with the number of accounts. Entries are
+(address, amount, risk, rwa_block) tuples from any async source; see
+validated_entries() for the bounded-concurrency validator source. Accounts
+that source leaves out are counted in an `omitted` Counter, which the
+writers report in a comment closing the document.
+"""
+import asyncio
+import datetime as dt
+import json
+import tempfile
+from collections import Counter
+from decimal import Decimal
+from typing import AsyncIterable, AsyncIterator, Iterable, Optional, Tuple
+
+from lxml import etree
+
+from ..config import BATCH_CONCURRENCY, ISO_DEADLINE
+from ..deadline import Deadline
+from ..logs import get_logger
+from ..rwa.assets import get_rwa_assets
+from ..validator import ValidationResult, is_kadena_address, missing_inputs, validate_address, validate_many
+from .camt053 import NSMAP_C, build_grp_hdr as camt_grp_hdr, build_stmt, format_amount
+from .pacs008 import NSMAP_P, build_grp_hdr as pacs_grp_hdr, build_cdt_trf_tx_inf
+
+logger = get_logger("iso.bulk")
+
+Entry = Tuple[str, float, int, dict]
+
+class _Chunks:
+    """Write target for etree.xmlfile that hands the written bytes back to the generator."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> None:
+        self._parts.append(bytes(data))
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _now() -> str:
+    return dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _omitted_comment(omitted: Counter) -> etree._Comment:
+    """<!-- N accounts omitted: reason=count, ... --> for the end of a bulk document."""
+    reasons = ", ".join(f"{reason}={n}" for reason, n in sorted(omitted.items()))
+    return etree.Comment(f" {sum(omitted.values())} accounts omitted: {reasons} ")
+
+
+async def camt053_stream(entries: AsyncIterable[Entry], now: Optional[str] = None,
+                         msg_id: str = "GXKAD-STMT", omitted: Optional[Counter] = None) -> AsyncIterator[bytes]:
+    """camt.053 with one Stmt per entry, yielded as it is written."""
+    now = now or _now()
+    holder = etree.Element("Document", nsmap=NSMAP_C)  # scratch parent, keeps the RWA prefix
+    out = _Chunks()
+    with etree.xmlfile(out, encoding="UTF-8", buffered=False) as xf:
+        xf.write_declaration()
+        with xf.element("Document", nsmap=NSMAP_C):
+            xf.write("\n")
+            with xf.element("BkToCstmrStmt"):
+                xf.write("\n")
+                xf.write(camt_grp_hdr(holder, now, msg_id), pretty_print=True)
+                holder.clear()
+                yield out.take()
+                n = 0
+                async for address, amount, risk, rwa_block in entries:
+                    n += 1
+                    stmt = build_stmt(holder, address, amount, risk, rwa_block, now, stmt_id=f"DAILY-{n:03d}")
+                    xf.write(stmt, pretty_print=True)
+                    holder.clear()
+                    yield out.take()
+            xf.write("\n")
+            if omitted:
+                xf.write(_omitted_comment(omitted))
+                xf.write("\n")
+    yield out.take()
+
+
+async def pacs008_stream(entries: AsyncIterable[Entry], ref_id: str = "GX-BULK", ccy: str = "KDA",
+                         now: Optional[str] = None, spool_dir: Optional[str] = None,
+                         omitted: Optional[Counter] = None) -> AsyncIterator[bytes]:
+    """
+    pacs.008 with one CdtTrfTxInf per entry. The group header (NbOfTxs,
+    CtrlSum) precedes the transactions, so entries are first spooled to a
+    temporary NDJSON file while counting and summing, then written out.
+    """
+    now = now or _now()
+    n = 0
+    total = Decimal(0)
+    with tempfile.TemporaryFile("w+", encoding="utf-8", dir=spool_dir) as spool:
+        async for address, amount, risk, rwa_block in entries:
+            amt = format_amount(amount)
+            n += 1
+            total += Decimal(amt)
+            spool.write(json.dumps([address, amt, risk, rwa_block]) + "\n")
+        spool.seek(0)
+
+        holder = etree.Element("Document", nsmap=NSMAP_P)
+        out = _Chunks()
+        with etree.xmlfile(out, encoding="UTF-8", buffered=False) as xf:
+            xf.write_declaration()
+            with xf.element("Document", nsmap=NSMAP_P):
+                xf.write("\n")
+                with xf.element("FIToFICstmrCdtTrf"):
+                    xf.write("\n")
+                    hdr = pacs_grp_hdr(holder, f"GXKAD-{ref_id}", now, nb_of_txs=n, ctrl_sum=format(total, "f"))
+                    xf.write(hdr, pretty_print=True)
+                    holder.clear()
+                    yield out.take()
+                    for i, line in enumerate(spool, 1):
+                        address, amt, risk, rwa_block = json.loads(line)
+                        tx = build_cdt_trf_tx_inf(holder, address, f"{ref_id}-{i:06d}", amt, ccy, risk, rwa_block)
+                        xf.write(tx, pretty_print=True)
+                        holder.clear()
+                        yield out.take()
+                xf.write("\n")
+                if omitted:
+                    xf.write(_omitted_comment(omitted))
+                    xf.write("\n")
+        yield out.take()
+
+
+async def validate_with_rwa(address: str, deadline: Optional[Deadline] = None) -> Tuple[ValidationResult, dict]:
+    """
+    Validation result and RWA holdings of one address, looked up concurrently
+    under one budget (a fresh ISO_DEADLINE if not given). Raises ValueError
+    for an invalid address.
+    """
+    if not is_kadena_address(address):
+        raise ValueError("Invalid Kadena address format")
+    if deadline is None:
+        deadline = Deadline(ISO_DEADLINE)
+    res, rwa_block = await asyncio.gather(
+        validate_address(address, deadline=deadline), get_rwa_assets(address, deadline=deadline)
+    )
+    return res, rwa_block
+
+
+async def validated_entries(addresses: Iterable[str], concurrency: int = BATCH_CONCURRENCY,
+                            omitted: Optional[Counter] = None) -> AsyncIterator[Entry]:
+    """
+    Entries for the bulk writers from validate_many running validate_with_rwa
+    (at most `concurrency` lookups in flight), in completion order. Invalid
+    addresses, failed lookups and results missing an input
+    (validator.missing_inputs) are skipped and counted by reason in `omitted`.
+    """
+    async for _, address, found in validate_many(addresses, concurrency=concurrency, lookup=validate_with_rwa):
+        if isinstance(found, Exception):
+            logger.warning("[iso.bulk] skipping %s: %s", address, found)
+            reason = "invalid-address" if isinstance(found, ValueError) else "lookup-failed"
+        else:
+            res, rwa_block = found
+            missing = missing_inputs(res)
+            if not missing:
+                yield res.address, res.total_balance, res.risk_score, rwa_block
+                continue
+            logger.warning("[iso.bulk] skipping %s: %s", address, ", ".join(missing))
+            reason = "+".join(missing)
+        if omitted is not None:
+            omitted[reason] += 1
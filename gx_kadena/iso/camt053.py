@@ -1,38 +1,85 @@
 import datetime as dt
+from decimal import Decimal, ROUND_DOWN
+from typing import Dict, Optional, Sequence, Tuple
+
 from lxml import etree
 
 NS_CAMT = "urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"
 NS_RWA  = "urn:adcx:rwa:1"
 NSMAP_C = {None: NS_CAMT, "RWA": NS_RWA}
 
-def xml_camt053(address: str, balance: int, risk: int, rwa_block: dict) -> bytes:
-    now = dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-    doc = etree.Element("Document", nsmap=NSMAP_C)
-    root = etree.SubElement(doc, "BkToCstmrStmt")
-    grp = etree.SubElement(root, "GrpHdr")
-    etree.SubElement(grp, "MsgId").text = f"GXKAD-STMT"
+# ISO 20022 amounts allow at most 5 fraction digits
+_AMOUNT_QUANTUM = Decimal("0.00001")
+
+def format_amount(value) -> str:
+    """Amount as an ISO decimal string, truncated (never rounded up) to 5 places."""
+    amount = Decimal(str(value)).quantize(_AMOUNT_QUANTUM, rounding=ROUND_DOWN)
+    return format(amount.normalize(), "f") if amount else "0"
+
+# Bookings written into every Stmt as (amount, CdtDbtInd). Balances are read,
+# not booked, so a statement carries a single zero-amount credit.
+STMT_ENTRIES: Tuple[Tuple[str, str], ...] = (("0", "CRDT"),)
+
+def entry_totals(entries: Sequence[Tuple[str, str]]) -> Dict[str, str]:
+    """TtlNtries fields of `entries`: their count, sum, net amount and its direction."""
+    credits = sum((Decimal(amt) for amt, ind in entries if ind == "CRDT"), Decimal(0))
+    debits = sum((Decimal(amt) for amt, ind in entries if ind == "DBIT"), Decimal(0))
+    net = credits - debits
+    return {
+        "NbOfNtries": str(len(entries)),
+        "Sum": format_amount(credits + debits),
+        "TtlNetNtryAmt": format_amount(abs(net)),
+        "CdtDbtInd": "CRDT" if net >= 0 else "DBIT",
+    }
+
+def build_tokenization(parent, address: str, risk: int, rwa_block: dict):
+    """RWA extension: address, risk score and one Holding per RWA asset."""
+    ext = etree.SubElement(parent, "{%s}Tokenization" % NS_RWA)
+    etree.SubElement(ext, "{%s}Address" % NS_RWA).text = address
+    etree.SubElement(ext, "{%s}RiskScore" % NS_RWA).text = str(risk)
+    for aset in (rwa_block or {}).get("assets") or []:
+        holding = etree.SubElement(ext, "{%s}Holding" % NS_RWA)
+        if "module" in aset:
+            etree.SubElement(holding, "{%s}Module" % NS_RWA).text = aset["module"]
+        etree.SubElement(holding, "{%s}AssetType" % NS_RWA).text = aset.get("type","unknown")
+        etree.SubElement(holding, "{%s}Amount" % NS_RWA).text = str(aset.get("amount","0"))
+        if "unit" in aset:
+            etree.SubElement(holding, "{%s}Unit" % NS_RWA).text = aset["unit"]
+    return ext
+
+def build_grp_hdr(parent, now: str, msg_id: str = "GXKAD-STMT"):
+    grp = etree.SubElement(parent, "GrpHdr")
+    etree.SubElement(grp, "MsgId").text = msg_id
     etree.SubElement(grp, "CreDtTm").text = now
-    stmt = etree.SubElement(root, "Stmt")
-    etree.SubElement(stmt, "Id").text = "DAILY-001"
+    return grp
+
+def build_stmt(parent, address: str, balance, risk: int, rwa_block: dict, now: str, stmt_id: str = "DAILY-001"):
+    stmt = etree.SubElement(parent, "Stmt")
+    etree.SubElement(stmt, "Id").text = stmt_id
     acct = etree.SubElement(stmt, "Acct")
     etree.SubElement(acct, "Ccy").text = "KDA"
     bal = etree.SubElement(stmt, "Bal")
     amt = etree.SubElement(bal, "Amt")
     amt.set("Ccy", "KDA")
-    amt.text = str(balance)
-    ntry = etree.SubElement(stmt, "Ntry")
-    amt2 = etree.SubElement(ntry, "Amt")
-    amt2.set("Ccy", "KDA")
-    amt2.text = "0"
-    etree.SubElement(ntry, "CdtDbtInd").text = "CRDT"
-    etree.SubElement(ntry, "BookgDt").text = now
-    ext = etree.SubElement(stmt, "{%s}Tokenization" % NS_RWA)
-    etree.SubElement(ext, "{%s}Address" % NS_RWA).text = address
-    etree.SubElement(ext, "{%s}RiskScore" % NS_RWA).text = str(risk)
-    if rwa_block and rwa_block.get("assets"):
-        aset = rwa_block["assets"][0]
-        etree.SubElement(ext, "{%s}AssetType" % NS_RWA).text = aset.get("type","unknown")
-        etree.SubElement(ext, "{%s}Amount" % NS_RWA).text = str(aset.get("amount","0"))
-        if "unit" in aset:
-            etree.SubElement(ext, "{%s}Unit" % NS_RWA).text = aset["unit"]
-    return etree.tostring(doc, pretty_print=True, xml_declaration=True, encoding="UTF-8")
\ No newline at end of file
+    amt.text = format_amount(balance)
+    # Totals of the Ntry elements written below
+    ttl = etree.SubElement(etree.SubElement(stmt, "TxsSummry"), "TtlNtries")
+    for tag, text in entry_totals(STMT_ENTRIES).items():
+        etree.SubElement(ttl, tag).text = text
+    for entry_amt, indicator in STMT_ENTRIES:
+        ntry = etree.SubElement(stmt, "Ntry")
+        amt2 = etree.SubElement(ntry, "Amt")
+        amt2.set("Ccy", "KDA")
+        amt2.text = entry_amt
+        etree.SubElement(ntry, "CdtDbtInd").text = indicator
+        etree.SubElement(ntry, "BookgDt").text = now
+    build_tokenization(stmt, address, risk, rwa_block)
+    return stmt
+
+def xml_camt053(address: str, balance: float, risk: int, rwa_block: dict, now: Optional[str] = None) -> bytes:
+    now = now or dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    doc = etree.Element("Document", nsmap=NSMAP_C)
+    root = etree.SubElement(doc, "BkToCstmrStmt")
+    build_grp_hdr(root, now)
+    build_stmt(root, address, balance, risk, rwa_block, now)
+    return etree.tostring(doc, pretty_print=True, xml_declaration=True, encoding="UTF-8")
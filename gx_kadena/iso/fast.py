@@ -0,0 +1,169 @@
+"""
+Fast-path ISO 20022 serializers.
+
+Same bytes as xml_camt053 / xml_pacs008 (lxml, pretty-printed), produced
+from precompiled document skeletons: only the variable fields are escaped
+and filled in, no element tree is built. tests/test_iso.py checks the two
+paths stay byte-identical.
+"""
+import datetime as dt
+import re
+from typing import Optional
+
+from .camt053 import NS_CAMT, NS_RWA, STMT_ENTRIES, entry_totals, format_amount
+from .pacs008 import NS_PACS
+
+# Characters libxml2 refuses (lxml raises ValueError for them)
+_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff\ud800-\udfff]")
+_TEXT_SPECIAL = re.compile("[&<>\r]")
+_ATTR_SPECIAL = re.compile("[&<>\"\t\n\r]")
+_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "\t": "&#9;", "\n": "&#10;", "\r": "&#13;"}
+
+
+def _check(value: str) -> str:
+    if not isinstance(value, str):
+        raise TypeError(f"Argument must be bytes or unicode, got '{type(value).__name__}'")
+    if _INVALID.search(value):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    return value
+
+
+def esc_text(value: str) -> str:
+    """Escape element text the way libxml2 serializes it."""
+    _check(value)
+    if _TEXT_SPECIAL.search(value) is None:
+        return value
+    return _TEXT_SPECIAL.sub(lambda m: _ESCAPES[m.group()], value)
+
+
+def esc_attr(value: str) -> str:
+    """Escape an attribute value the way libxml2 serializes it."""
+    _check(value)
+    if _ATTR_SPECIAL.search(value) is None:
+        return value
+    return _ATTR_SPECIAL.sub(lambda m: _ESCAPES[m.group()], value)
+
+
+def _leaf(indent: str, tag: str, value: Optional[str]) -> str:
+    if value is None:
+        return f"{indent}<{tag}/>\n"
+    return f"{indent}<{tag}>{esc_text(value)}</{tag}>\n"
+
+
+def _tokenization(indent: str, address: str, risk: int, rwa_block: dict) -> str:
+    inner = indent + "  "
+    parts = [
+        f"{indent}<RWA:Tokenization>\n",
+        _leaf(inner, "RWA:Address", address),
+        _leaf(inner, "RWA:RiskScore", str(risk)),
+    ]
+    leaf = inner + "  "
+    for aset in (rwa_block or {}).get("assets") or []:
+        parts.append(f"{inner}<RWA:Holding>\n")
+        if "module" in aset:
+            parts.append(_leaf(leaf, "RWA:Module", aset["module"]))
+        parts.append(_leaf(leaf, "RWA:AssetType", aset.get("type", "unknown")))
+        parts.append(_leaf(leaf, "RWA:Amount", str(aset.get("amount", "0"))))
+        if "unit" in aset:
+            parts.append(_leaf(leaf, "RWA:Unit", aset["unit"]))
+        parts.append(f"{inner}</RWA:Holding>\n")
+    parts.append(f"{indent}</RWA:Tokenization>\n")
+    return "".join(parts)
+
+
+_DECL = "<?xml version='1.0' encoding='UTF-8'?>\n"
+
+_CAMT_HEAD = (
+    _DECL
+    + f'<Document xmlns="{NS_CAMT}" xmlns:RWA="{NS_RWA}">\n'
+    "  <BkToCstmrStmt>\n"
+    "    <GrpHdr>\n"
+    "      <MsgId>GXKAD-STMT</MsgId>\n"
+    "      <CreDtTm>{now}</CreDtTm>\n"
+    "    </GrpHdr>\n"
+    "    <Stmt>\n"
+    "      <Id>DAILY-001</Id>\n"
+    "      <Acct>\n"
+    "        <Ccy>KDA</Ccy>\n"
+    "      </Acct>\n"
+    "      <Bal>\n"
+    '        <Amt Ccy="KDA">{balance}</Amt>\n'
+    "      </Bal>\n"
+    "      <TxsSummry>\n"
+    "        <TtlNtries>\n"
+    + "".join(f"          <{tag}>{text}</{tag}>\n" for tag, text in entry_totals(STMT_ENTRIES).items())
+    + "        </TtlNtries>\n"
+    "      </TxsSummry>\n"
+    + "".join(
+        "      <Ntry>\n"
+        f'        <Amt Ccy="KDA">{amt}</Amt>\n'
+        f"        <CdtDbtInd>{indicator}</CdtDbtInd>\n"
+        "        <BookgDt>{now}</BookgDt>\n"
+        "      </Ntry>\n"
+        for amt, indicator in STMT_ENTRIES
+    )
+)
+_CAMT_TAIL = (
+    "    </Stmt>\n"
+    "  </BkToCstmrStmt>\n"
+    "</Document>\n"
+)
+
+_PACS_HEAD = (
+    _DECL
+    + f'<Document xmlns="{NS_PACS}" xmlns:RWA="{NS_RWA}">\n'
+    "  <FIToFICstmrCdtTrf>\n"
+    "    <GrpHdr>\n"
+    "      <MsgId>GXKAD-{ref_id}</MsgId>\n"
+    "      <CreDtTm>{now}</CreDtTm>\n"
+    "      <NbOfTxs>1</NbOfTxs>\n"
+    "      <SttlmInf>\n"
+    "        <SttlmMtd>CLRG</SttlmMtd>\n"
+    "      </SttlmInf>\n"
+    "    </GrpHdr>\n"
+    "    <CdtTrfTxInf>\n"
+    "      <PmtId>\n"
+    "        <EndToEndId>{ref_id}</EndToEndId>\n"
+    "      </PmtId>\n"
+    "      <Amt>\n"
+    '        {instd_amt}\n'
+    "      </Amt>\n"
+    "      <Dbtr>\n"
+    "        <Nm>Kadena Wallet</Nm>\n"
+    "      </Dbtr>\n"
+    "      <Cdtr>\n"
+    "        <Nm>Recipient</Nm>\n"
+    "      </Cdtr>\n"
+    "      <RmtInf>\n"
+    "        <Ustrd>{ustrd}</Ustrd>\n"
+    "      </RmtInf>\n"
+)
+_PACS_TAIL = (
+    "    </CdtTrfTxInf>\n"
+    "  </FIToFICstmrCdtTrf>\n"
+    "</Document>\n"
+)
+
+
+def _now() -> str:
+    return dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def fast_camt053(address: str, balance: float, risk: int, rwa_block: dict, now: Optional[str] = None) -> bytes:
+    """Byte-identical to xml_camt053(...) for the same `now`."""
+    now = esc_text(now or _now())
+    head = _CAMT_HEAD.format(now=now, balance=esc_text(format_amount(balance)))
+    return (head + _tokenization("      ", address, risk, rwa_block) + _CAMT_TAIL).encode("utf-8")
+
+
+def fast_pacs008(address: str, ref_id: str, amt: str, ccy: str, risk: int, rwa_block: dict,
+                 now: Optional[str] = None) -> bytes:
+    """Byte-identical to xml_pacs008(...) for the same `now`."""
+    now = esc_text(now or _now())
+    instd = f'<InstdAmt Ccy="{esc_attr(ccy)}">{esc_text(amt)}</InstdAmt>' if amt is not None \
+        else f'<InstdAmt Ccy="{esc_attr(ccy)}"/>'
+    head = _PACS_HEAD.format(
+        now=now, ref_id=esc_text(ref_id), instd_amt=instd,
+        ustrd=esc_text(f"Kadena address {address} | Risk {risk}"),
+    )
+    return (head + _tokenization("      ", address, risk, rwa_block) + _PACS_TAIL).encode("utf-8")
@@ -1,21 +1,27 @@
 import datetime as dt
+from typing import Optional
+
 from lxml import etree
 
+from .camt053 import build_tokenization
+
 NS_PACS = "urn:iso:std:iso:20022:tech:xsd:pacs.008.001.02"
 NS_RWA  = "urn:adcx:rwa:1"
 NSMAP_P = {None: NS_PACS, "RWA": NS_RWA}
 
-def xml_pacs008(address: str, ref_id: str, amt: str, ccy: str, risk: int, rwa_block: dict) -> bytes:
-    now = dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-    doc = etree.Element("Document", nsmap=NSMAP_P)
-    root = etree.SubElement(doc, "FIToFICstmrCdtTrf")
-    grp = etree.SubElement(root, "GrpHdr")
-    etree.SubElement(grp, "MsgId").text = f"GXKAD-{ref_id}"
+def build_grp_hdr(parent, msg_id: str, now: str, nb_of_txs: int = 1, ctrl_sum: Optional[str] = None):
+    grp = etree.SubElement(parent, "GrpHdr")
+    etree.SubElement(grp, "MsgId").text = msg_id
     etree.SubElement(grp, "CreDtTm").text = now
-    etree.SubElement(grp, "NbOfTxs").text = "1"
+    etree.SubElement(grp, "NbOfTxs").text = str(nb_of_txs)
+    if ctrl_sum is not None:
+        etree.SubElement(grp, "CtrlSum").text = ctrl_sum
     st = etree.SubElement(grp, "SttlmInf")
     etree.SubElement(st, "SttlmMtd").text = "CLRG"
-    tx = etree.SubElement(root, "CdtTrfTxInf")
+    return grp
+
+def build_cdt_trf_tx_inf(parent, address: str, ref_id: str, amt: str, ccy: str, risk: int, rwa_block: dict):
+    tx = etree.SubElement(parent, "CdtTrfTxInf")
     pmt = etree.SubElement(tx, "PmtId")
     etree.SubElement(pmt, "EndToEndId").text = ref_id
     amt_el = etree.SubElement(tx, "Amt")
@@ -28,13 +34,13 @@ def xml_pacs008(address: str, ref_id: str, amt: str, ccy: str, risk: int, rwa_bl
     etree.SubElement(cdtr, "Nm").text = "Recipient"
     rmt = etree.SubElement(tx, "RmtInf")
     etree.SubElement(rmt, "Ustrd").text = f"Kadena address {address} | Risk {risk}"
-    ext = etree.SubElement(tx, "{%s}Tokenization" % NS_RWA)
-    etree.SubElement(ext, "{%s}Address" % NS_RWA).text = address
-    etree.SubElement(ext, "{%s}RiskScore" % NS_RWA).text = str(risk)
-    if rwa_block and rwa_block.get("assets"):
-        aset = rwa_block["assets"][0]
-        etree.SubElement(ext, "{%s}AssetType" % NS_RWA).text = aset.get("type","unknown")
-        etree.SubElement(ext, "{%s}Amount" % NS_RWA).text = str(aset.get("amount","0"))
-        if "unit" in aset:
-            etree.SubElement(ext, "{%s}Unit" % NS_RWA).text = aset["unit"]
-    return etree.tostring(doc, pretty_print=True, xml_declaration=True, encoding="UTF-8")
\ No newline at end of file
+    build_tokenization(tx, address, risk, rwa_block)
+    return tx
+
+def xml_pacs008(address: str, ref_id: str, amt: str, ccy: str, risk: int, rwa_block: dict, now: Optional[str] = None) -> bytes:
+    now = now or dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    doc = etree.Element("Document", nsmap=NSMAP_P)
+    root = etree.SubElement(doc, "FIToFICstmrCdtTrf")
+    build_grp_hdr(root, f"GXKAD-{ref_id}", now)
+    build_cdt_trf_tx_inf(root, address, ref_id, amt, ccy, risk, rwa_block)
+    return etree.tostring(doc, pretty_print=True, xml_declaration=True, encoding="UTF-8")
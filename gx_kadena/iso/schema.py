@@ -0,0 +1,30 @@
+import functools
+import os
+from typing import List
+
+from lxml import etree
+
+from ..config import ISO_XSD_DIR
+
+# XSD file per document kind, looked up in ISO_XSD_DIR
+XSD_FILES = {
+    "camt053": "camt.053.001.02.xsd",
+    "pacs008": "pacs.008.001.02.xsd",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_schema(kind: str) -> etree.XMLSchema:
+    """Compiled XMLSchema for `kind`, parsed once per process."""
+    if not ISO_XSD_DIR:
+        raise RuntimeError("ISO_XSD_DIR is not set")
+    path = os.path.join(ISO_XSD_DIR, XSD_FILES[kind])
+    return etree.XMLSchema(etree.parse(path))
+
+
+def validation_errors(kind: str, xml_bytes: bytes) -> List[str]:
+    """Schema violations of a rendered document (empty list if valid)."""
+    schema = load_schema(kind)
+    if schema.validate(etree.fromstring(xml_bytes)):
+        return []
+    return [f"line {e.line}: {e.message}" for e in schema.error_log]
@@ -1,33 +1,104 @@
 # gx_kadena/kadena_client.py
 # (Only the file is shown here. Replace the existing file with this content.)
 
+import asyncio
 import time
-import datetime as dt
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List, Set
 import httpx
-import os
-import traceback
 import json
 
+from .http_pool import get_client
+from .logs import get_logger
+from .metrics import UPSTREAM_FALLBACKS, UPSTREAM_LATENCY, UPSTREAM_RETRIES
+from .singleflight import SingleFlight
+from .cache import FRESH, TTLCache, make_backend
+from .node_health import NodeHealth
+from .txcount import TxCounter
+from .cut_watcher import CutWatcher, HeightCache
+from .deadline import Deadline, DeadlineExceeded, bounded, expired, timeout_for
 from .config import (
-    KADENA_PACT_BASES, MAINNET, CHAINS, API_TIMEOUT, KADENA_EXPLORER_BASE,
-    KADINDEXER_API_KEY, KADINDEXER_BASE
+    KADENA_PACT_BASES, MAINNET, CHAINS, CHAIN_CONCURRENCY, API_TIMEOUT,
+    KADENA_EXPLORER_BASE, KADINDEXER_API_KEY, KADINDEXER_BASE,
+    PACT_GAS_LIMIT, PACT_BATCH_GAS_PER_ACCOUNT, PACT_BATCH_MAX_BYTES, PACT_BATCH_MAX_SIZE,
+    BALANCE_CACHE_TTL, BALANCE_CACHE_NEG_TTL, TXCOUNT_CACHE_TTL, TXCOUNT_CACHE_NEG_TTL,
+    CACHE_STALE_TTL, GUARD_CACHE_TTL, GUARD_CACHE_NEG_TTL, PACT_HEDGE, PACT_HEDGE_MAX, PACT_HEDGE_MIN_DELAY, PACT_HEDGE_DEFAULT_DELAY
 )
 
-# Simple in-memory TTL cache to reduce repeated calls when nodes are slow/blocked.
-_BALANCE_CACHE_TTL = int(os.getenv("BALANCE_CACHE_TTL", "20"))  # seconds
-_balance_cache: Dict[str, tuple] = {}  # address -> (ts, total, found, per_chain)
+def _decode_balance(val) -> Tuple[float, Optional[int], Dict[int, float]]:
+    # JSON-backed cache backends return lists and string chain keys
+    total, found, per_chain = val
+    return float(total), found, {int(c): float(v) for c, v in per_chain.items()}
+
+# Bounded caches to reduce repeated calls when nodes are slow/blocked.
+# Zero balances / failed tx counts are kept for a shorter (negative) TTL.
+# Storage is per process by default; CACHE_BACKEND=sqlite shares it across workers.
+_balance_cache = TTLCache(
+    "balance", ttl=BALANCE_CACHE_TTL, negative_ttl=BALANCE_CACHE_NEG_TTL, stale_ttl=CACHE_STALE_TTL,
+    backend=make_backend("balance", decode=_decode_balance),
+)  # address -> (total, found, per_chain)
+_txcount_cache = TTLCache(
+    "txcount", ttl=TXCOUNT_CACHE_TTL, negative_ttl=TXCOUNT_CACHE_NEG_TTL, stale_ttl=CACHE_STALE_TTL,
+    backend=make_backend("txcount"),
+)  # address -> tx count (None when upstream failed)
+
+_guard_cache = TTLCache(
+    "guard", ttl=GUARD_CACHE_TTL, negative_ttl=GUARD_CACHE_NEG_TTL, backend=make_backend("guard"),
+)  # address -> contract-like verdict (None when no chain answered)
+
+# Per-address 24h windows behind the explorer tx-count fallback.
+_tx_counter = TxCounter()
+
+# Latest block height per chain (started in the app lifespan) and per-chain
+# (balance, guard kind) tagged with the height they were read at.
+cut_watcher = CutWatcher()
+_chain_balances = HeightCache("chain-balance")
+
+def cache_stats() -> Dict[str, dict]:
+    """Hit / miss / eviction counters for the result caches."""
+    stats = {c.name: c.stats() for c in (_balance_cache, _txcount_cache, _guard_cache)}
+    stats["tx_windows"] = _tx_counter.stats()
+    stats["chain_balances"] = _chain_balances.stats()
+    return stats
+
+def freshness(address: str) -> float:
+    """
+    Seconds the cached balance and tx count of `address` both stay fresh
+    (0 if either is not cached, e.g. balances revalidated per block height).
+    """
+    return min(_balance_cache.remaining_ttl(address), _txcount_cache.remaining_ttl(address))
+
+# In-flight lookups keyed by address, shared by concurrent callers.
+_balance_flight = SingleFlight("balance")
+_txcount_flight = SingleFlight("txcount")
+# The per-chain account fan-out, shared by the balance and contract lookups.
+_account_flight = SingleFlight("account")
+
+def singleflight_stats() -> Dict[str, dict]:
+    """Calls / leaders / coalesced counters for the coalesced lookups."""
+    return {f.name: f.stats() for f in (_balance_flight, _txcount_flight, _account_flight)}
+
+logger = get_logger("kadena_client")
+
+# Per-base latency / error tracking used to order KADENA_PACT_BASES per call.
+_pact_health = NodeHealth()
+
+def node_stats() -> Dict[str, dict]:
+    """Observed EWMA latency, p95 and error rate per Pact base."""
+    return _pact_health.stats()
 
 def normalize_balance(val) -> float:
     """
     Normalize many Pact responses:
       - {"int": "100000000"} -> 100000000.0
+      - {"decimal": "1.000000000001"} -> float
       - "0.0" | 12345 -> float
       - invalid -> 0.0
     """
     try:
         if isinstance(val, dict) and "int" in val:
             return float(val["int"])
+        if isinstance(val, dict) and "decimal" in val:
+            return float(val["decimal"])
         if isinstance(val, (int, float)):
             return float(val)
         if isinstance(val, str):
@@ -36,216 +107,551 @@ def normalize_balance(val) -> float:
         return 0.0
     return 0.0
 
-async def pact_local(client: httpx.AsyncClient, chain: int, code: str, data: dict = None, base: str = None, timeout: float = None) -> dict:
+# Guard kinds by the keys of their JSON form, most specific first.
+_GUARD_KINDS = (
+    (("keys", "pred"), "keyset"),
+    (("keysetref",), "keyset-ref"),
+    (("cgName",), "capability"),
+    (("moduleName",), "module"),
+    (("pactId",), "pact"),
+    (("fun", "args"), "user"),
+)
+# Accounts whose funds are controlled by code rather than by signing keys.
+CONTRACT_GUARDS = frozenset({"capability", "module", "pact", "user"})
+_GUARD_UNKNOWN = "?"  # per-chain cache entry read without its guard (batch balances)
+
+class IncompleteFanOut(RuntimeError):
+    """Not every chain answered a per-chain lookup; `guards` holds what those that did reported."""
+
+    def __init__(self, message: str, guards: Dict[int, Optional[str]]):
+        super().__init__(message)
+        self.guards = guards
+
+def guard_kind(guard) -> Optional[str]:
+    """Kind of a Pact guard ("keyset", "module", ...); None if there is none."""
+    if not isinstance(guard, dict):
+        return None
+    for keys, kind in _GUARD_KINDS:
+        if all(k in guard for k in keys):
+            return kind
+    return "other"
+
+def parse_account(data) -> Tuple[float, Optional[str]]:
+    """
+    (balance, guard kind) from the fused per-chain query: coin.details
+    {"account", "balance", "guard"}, {} for a missing account, or a bare
+    balance from nodes answering the older single-value shape.
+    """
+    if isinstance(data, dict) and ("balance" in data or "guard" in data):
+        return normalize_balance(data.get("balance")), guard_kind(data.get("guard"))
+    return normalize_balance(data), None
+
+async def pact_local(client: httpx.AsyncClient, chain: int, code: str, data: Optional[dict] = None, base: Optional[str] = None, timeout: Optional[float] = None, gas_limit: Optional[int] = None,
+                     deadline: Optional[Deadline] = None) -> dict:
     """
     Stateless Pact local query with multi-base fallback and payload-format retries.
     Returns {} on failure (does not raise) to keep callers resilient.
-    This function will:
-      1) try the 'payload' wrapper format
-      2) if 400 mentioning missing 'cmd', retry with {"cmd": payload}
-      3) if still failing, retry with {"cmd": json.dumps(payload)}
+    Bases are tried best-first by observed latency / error rate. With
+    PACT_HEDGE enabled, if the preferred base has not answered within its
+    observed p95 the same query is also sent to the next-best base and the
+    first answer wins. Per base, the body format it accepted last time is
+    used directly (see _pact_local_base) and a circuit breaker stops
+    traffic to a base after repeated failures.
+    With a `deadline`, every attempt is bounded by the remaining budget and
+    no new attempt starts once it is spent.
     """
+    if expired(deadline):
+        return {}
     payload = {
         "networkId": MAINNET,
         "payload": {"exec": {"code": code, "data": data or {}}},
         "signers": [],
         "meta": {
             "chainId": str(chain),
-            "gasLimit": 150000,
+            "gasLimit": PACT_GAS_LIMIT if gas_limit is None else gas_limit,
             "gasPrice": 1e-6,
             "ttl": 600,
             "creationTime": int(time.time())
         }
     }
     t = API_TIMEOUT if timeout is None else timeout
-    bases = [base] if base else KADENA_PACT_BASES
+    # Bases with an open circuit breaker are skipped; if all are open this
+    # fails fast instead of waiting on timeouts.
+    bases = _pact_health.available([base] if base else KADENA_PACT_BASES)
+
+    if PACT_HEDGE and len(bases) > 1:
+        return await _pact_local_hedged(client, bases, chain, payload, t, deadline)
+    for i, b in enumerate(bases):
+        if expired(deadline):
+            break
+        if i:
+            UPSTREAM_FALLBACKS.labels("pact-base", "next-pact-base").inc()
+        res = await _pact_local_base(client, b, chain, payload, t, deadline)
+        if res is not None:
+            return res
+    # Return empty to signal failure gracefully (don't raise)
+    return {}
 
-    for b in bases:
-        url = f"{b}/chainweb/0.0/{MAINNET}/chain/{chain}/pact/api/v1/local"
+def _hedge_delay(base: str) -> float:
+    p95 = _pact_health.get(base).p95()
+    if p95 is None:
+        return PACT_HEDGE_DEFAULT_DELAY
+    return max(PACT_HEDGE_MIN_DELAY, p95)
 
-        # Attempt 1: standard payload format (existing)
-        try:
-            r = await client.post(url, json=payload, timeout=t)
-            if r.status_code == 200:
-                return r.json()
-            # Log the response body for diagnosis
-            body = (r.text or "")[:1000]
-            print(f"[pact_local] Non-200 from {url}: {r.status_code} {body}")
-            # If server complains about missing "cmd", we'll try alternative formats below
-            if r.status_code == 400 and "cmd" in body:
-                pass  # fall through to retry attempts
-            else:
-                # For other non-200 responses, still attempt alternative formats occasionally
-                # but continue to next base after retries below.
-                pass
-        except Exception as e:
-            print(f"[pact_local] {url} error (attempt 1): {repr(e)}")
-            traceback.print_exc()
+async def _pact_local_hedged(client: httpx.AsyncClient, bases: List[str], chain: int, payload: dict, t: float,
+                             deadline: Optional[Deadline] = None) -> dict:
+    """
+    Race bases best-first: the next base starts when the running one fails, or
+    (at most PACT_HEDGE_MAX times) when the preferred one exceeds its p95.
+    Losers are cancelled once an answer arrives.
+    """
+    pending = set()
+    next_idx = 0
+    hedges = 0
 
-        # Attempt 2: wrap full payload under "cmd" key (some proxies expect this)
-        try:
-            alt = {"cmd": payload}
-            r2 = await client.post(url, json=alt, timeout=t)
-            if r2.status_code == 200:
-                return r2.json()
-            body2 = (r2.text or "")[:1000]
-            print(f"[pact_local] Non-200 alt1 from {url}: {r2.status_code} {body2}")
-            # if 200 not returned, continue to attempt 3
-        except Exception as e:
-            print(f"[pact_local] {url} error (attempt 2): {repr(e)}")
-            traceback.print_exc()
+    def launch():
+        nonlocal next_idx
+        b = bases[next_idx]
+        next_idx += 1
+        pending.add(asyncio.ensure_future(_pact_local_base(client, b, chain, payload, t, deadline)))
+        return b
 
-        # Attempt 3: some gateways expect stringified cmd
-        try:
-            alt2 = {"cmd": json.dumps(payload)}
-            r3 = await client.post(url, json=alt2, timeout=t)
-            if r3.status_code == 200:
-                return r3.json()
-            body3 = (r3.text or "")[:1000]
-            print(f"[pact_local] Non-200 alt2 from {url}: {r3.status_code} {body3}")
-        except Exception as e:
-            print(f"[pact_local] {url} error (attempt 3): {repr(e)}")
-            traceback.print_exc()
+    preferred = launch()
+    try:
+        while pending:
+            can_hedge = next_idx < len(bases) and hedges < PACT_HEDGE_MAX and not expired(deadline)
+            done, _ = await asyncio.wait(
+                pending, timeout=min(_hedge_delay(preferred), timeout_for(deadline)) if can_hedge else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            pending.difference_update(done)
+            for task in done:
+                res = task.result()
+                if res is not None:
+                    return res
+            if expired(deadline):
+                continue  # running attempts end by the deadline; start no more
+            if not done:
+                hedges += 1
+                UPSTREAM_RETRIES.labels("pact", "hedge").inc()
+                launch()
+            elif not pending and next_idx < len(bases):
+                UPSTREAM_FALLBACKS.labels("pact-base", "next-pact-base").inc()
+                preferred = launch()
+        return {}
+    finally:
+        for task in pending:
+            task.cancel()
 
-        # if reached here, this base failed all attempts — continue to next base
-    # Return empty to signal failure gracefully (don't raise)
-    return {}
+# /local body shapes seen in the wild, in default try order:
+#   0) the command itself, 1) {"cmd": command}, 2) {"cmd": "<json string>"}
+_PAYLOAD_FORMATS = (
+    lambda p: p,
+    lambda p: {"cmd": p},
+    lambda p: {"cmd": json.dumps(p)},
+)
+
+async def _pact_local_base(client: httpx.AsyncClient, b: str, chain: int, payload: dict, t: float,
+                           deadline: Optional[Deadline] = None) -> Optional[dict]:
+    """
+    One base. The body format the base accepted last time is tried first;
+    the others only if it answers with a 4xx. Transport errors, timeouts and
+    5xx end the attempt at once (other formats would not help).
+    Returns None on failure.
+    """
+    url = f"{b}/chainweb/0.0/{MAINNET}/chain/{chain}/pact/api/v1/local"
+    health = _pact_health.get(b)
+    if not health.breaker.allow():
+        return None
+    learned = health.payload_format
+    order = [learned] if learned is not None else []
+    order += [i for i in range(len(_PAYLOAD_FORMATS)) if i != learned]
+    t0 = time.perf_counter()
+    res = None
+    try:
+        for n, fmt in enumerate(order):
+            if expired(deadline):
+                break
+            if n:
+                UPSTREAM_RETRIES.labels("pact", "payload-format").inc()
+            try:
+                r = await bounded(
+                    client.post(url, json=_PAYLOAD_FORMATS[fmt](payload), timeout=timeout_for(deadline, t)),
+                    deadline, t,
+                )
+            except Exception as e:
+                logger.warning("[pact_local] %s error (format %d): %r", url, fmt, e)
+                break
+            if r.status_code == 200:
+                try:
+                    res = r.json()
+                    health.payload_format = fmt
+                except ValueError as e:
+                    logger.warning("[pact_local] %s invalid JSON (format %d): %r", url, fmt, e)
+                break
+            # Log the response body for diagnosis
+            logger.warning("[pact_local] Non-200 (format %d) from %s: %s %s", fmt, url, r.status_code, (r.text or "")[:300])
+            if not 400 <= r.status_code < 500:
+                break
+    except asyncio.CancelledError:
+        # e.g. lost a hedge race: no verdict on this base
+        health.breaker.release()
+        raise
+    elapsed = time.perf_counter() - t0
+    if res is None and expired(deadline):
+        # Cut short by the caller's budget, not the base's fault: no verdict
+        health.breaker.release()
+        UPSTREAM_LATENCY.labels("pact", b, str(chain), "deadline").observe(elapsed)
+        return None
+    health.record(elapsed, res is not None)
+    UPSTREAM_LATENCY.labels("pact", b, str(chain), "ok" if res is not None else "error").observe(elapsed)
+    return res
+
+# Balance and guard of (read-msg "account") in one call; {} if it has no row.
+_ACCOUNT_CODE = '(try {} (coin.details (read-msg "account")))'
 
-async def _get_balance_from_nodes(address: str) -> Tuple[float, Optional[int], Dict[int, float]]:
+async def _get_balance_from_nodes(address: str, client: Optional[httpx.AsyncClient] = None,
+                                  deadline: Optional[Deadline] = None) -> Tuple[float, Optional[int], Dict[int, float]]:
     """
     Try direct node calls across chains. Returns total, found, per_chain.
     Does NOT use kadindexer. Caller can fallback to kadindexer if needed.
+    The per-chain query also reads the account guard (see
+    _get_accounts_from_nodes), which is how is_contract_address gets its
+    answer without extra calls.
+    """
+    total, found, per_chain, _ = await _account_flight.do(
+        address, lambda: _get_accounts_from_nodes(address, client, deadline)
+    )
+    return total, found, per_chain
+
+async def _get_accounts_from_nodes(address: str, client: Optional[httpx.AsyncClient] = None,
+                                   deadline: Optional[Deadline] = None
+                                   ) -> Tuple[float, Optional[int], Dict[int, float], Dict[int, Optional[str]]]:
+    """
+    One coin.details /local call per chain: (total, found, per_chain, {chain: guard kind}).
+    Chains are queried concurrently (at most CHAIN_CONCURRENCY at once), so a
+    cold lookup costs about one round trip instead of one per chain.
+    `found` is the lowest chain holding a balance, independent of reply order.
+    A partial sum would understate the balance, so if any chain did not
+    answer (node error, open circuit breaker) this raises: DeadlineExceeded
+    if the budget ran out, IncompleteFanOut otherwise. Nothing is cached
+    either way, and callers flag the balance as unavailable.
+    While the cut watcher is live, a chain whose height has not moved since
+    it was last read is answered from that reading.
+    The contract-like verdict is stored in the guard cache on the way out.
     """
+    sem = asyncio.Semaphore(max(1, CHAIN_CONCURRENCY))
+
+    async def query_chain(cl: httpx.AsyncClient, c: int) -> Tuple[int, float, Optional[str], bool]:
+        height = cut_watcher.height(c)
+        if height is not None:
+            cached = _chain_balances.get(address, c, height)
+            if cached is not None and cached[1] != _GUARD_UNKNOWN:
+                return c, cached[0], cached[1], True
+        async with sem:
+            try:
+                res = await pact_local(cl, c, _ACCOUNT_CODE, data={"account": address}, deadline=deadline)
+            except Exception as e:
+                logger.warning("[get_balance_any_chain] Error fetching chain %d: %r", c, e, exc_info=True)
+                return c, 0.0, None, False
+        if not res:
+            return c, 0.0, None, False
+        data = res.get("result", {}).get("data") if isinstance(res, dict) else None
+        bal, kind = parse_account(data)
+        if height is not None:
+            _chain_balances.set(address, c, (bal, kind), height)
+        return c, bal, kind, True
+
+    cl = client or get_client("pact")
+    results = await asyncio.gather(*(query_chain(cl, c) for c in CHAINS))
+    guards: Dict[int, Optional[str]] = {c: kind for c, _, kind, ok in results if ok}
+    complete = len(guards) == len(CHAINS)
+    contract = _contract_verdict(guards, complete)
+    _guard_cache.set(address, contract, negative=contract is None)
+    if not complete:
+        if expired(deadline):
+            raise DeadlineExceeded(f"balance lookup for {address} cut short by the deadline")
+        missing = sorted(set(CHAINS) - set(guards))
+        raise IncompleteFanOut(f"balance lookup for {address}: no answer from chains {missing}", guards)
+
     total = 0.0
     found = None
     per_chain: Dict[int, float] = {}
-    async with httpx.AsyncClient() as client:
-        code = f'(coin.get-balance "{address}")'
-        for c in CHAINS:
+    for c, val_f, _, _ in sorted(results):
+        if val_f and val_f > 0:
+            per_chain[c] = float(val_f)
+            total += float(val_f)
+            if found is None:
+                found = c
+    return total, found, per_chain, guards
+
+def _contract_verdict(guards: Dict[int, Optional[str]], complete: bool) -> Optional[bool]:
+    """True if any chain's guard is contract-like; False only if every chain answered."""
+    if any(kind in CONTRACT_GUARDS for kind in guards.values()):
+        return True
+    return False if complete else None
+
+# One /local call returns the details (balance and guard) of a whole list of
+# accounts. Accounts that do not exist on the chain yield {} instead of failing the call.
+_BATCH_ACCOUNT_CODE = '(map (lambda (a) (try {} (coin.details a))) (read-msg "accounts"))'
+_BATCH_ENVELOPE_BYTES = 512  # networkId/meta/code overhead of a /local payload
+
+def _batch_size(addresses: List[str]) -> int:
+    """Accounts per /local call, limited by gas budget and payload size."""
+    if not addresses:
+        return 1
+    by_gas = PACT_GAS_LIMIT // max(1, PACT_BATCH_GAS_PER_ACCOUNT)
+    avg_len = sum(len(a) for a in addresses) / len(addresses) + 3  # quotes + comma
+    by_bytes = int((PACT_BATCH_MAX_BYTES - _BATCH_ENVELOPE_BYTES) // avg_len)
+    return max(1, min(PACT_BATCH_MAX_SIZE, by_gas, by_bytes))
+
+def _batch_entry(value) -> Tuple[float, Optional[str]]:
+    """(balance, guard kind) of one batch reply entry; a bare balance (-1.0 = no row) carries no guard."""
+    if isinstance(value, dict):
+        return parse_account(value)
+    bal = normalize_balance(value)
+    return (0.0, None) if bal < 0 else (bal, _GUARD_UNKNOWN)
+
+async def _pact_accounts_chunk(client: httpx.AsyncClient, chain: int, accounts: List[str]) -> Dict[str, Tuple[float, Optional[str]]]:
+    """
+    {account: (balance, guard kind)} for `accounts` on one chain via a single
+    /local call. If the node rejects the call (e.g. out of gas) the chunk is
+    halved and retried, so the effective batch size adapts to the real gas
+    cost. Raises RuntimeError if the chain gave no usable answer.
+    """
+    res = await pact_local(client, chain, _BATCH_ACCOUNT_CODE, data={"accounts": accounts})
+    result = res.get("result", {}) if isinstance(res, dict) else {}
+    vals = result.get("data")
+    if result.get("status") == "success" and isinstance(vals, list) and len(vals) == len(accounts):
+        return {a: _batch_entry(v) for a, v in zip(accounts, vals)}
+    if len(accounts) > 1 and result.get("status") == "failure":
+        mid = len(accounts) // 2
+        left = await _pact_accounts_chunk(client, chain, accounts[:mid])
+        right = await _pact_accounts_chunk(client, chain, accounts[mid:])
+        return {**left, **right}
+    raise RuntimeError(f"chain {chain}: no usable result for {len(accounts)} accounts")
+
+async def get_balances_batch(addresses: List[str], client: Optional[httpx.AsyncClient] = None
+                             ) -> Tuple[Dict[str, Tuple[float, Optional[int], Dict[int, float]]], Set[str]]:
+    """
+    Balances for many accounts at once: one /local call per chain per chunk
+    (chunk size from _batch_size), so N addresses that fit in one chunk cost
+    len(CHAINS) calls instead of len(CHAINS) * N.
+    Returns ({address: (total, chain_found, per_chain)}, partial): totals
+    shaped like get_balance_any_chain, and the addresses for which some
+    chain did not answer (their totals are lower bounds).
+    Complete results prime the balance and guard caches, so a following
+    get_balance_any_chain / is_contract_address for the same address costs
+    no calls; partial ones are never cached.
+    """
+    accounts = list(dict.fromkeys(addresses))
+    if not accounts:
+        return {}, set()
+    size = _batch_size(accounts)
+    chunks = [accounts[i:i + size] for i in range(0, len(accounts), size)]
+    sem = asyncio.Semaphore(max(1, CHAIN_CONCURRENCY))
+    cl = client or get_client("pact")
+
+    async def query(c: int, chunk: List[str]) -> Tuple[int, List[str], Optional[Dict[str, Tuple[float, Optional[str]]]]]:
+        async with sem:
+            height = cut_watcher.height(c)
             try:
-                res = await pact_local(client, c, code)
-                if not res:
-                    continue
-                val = res.get("result", {}).get("data") if isinstance(res, dict) else None
-                val_f = normalize_balance(val)
-                if val_f and val_f > 0:
-                    per_chain[c] = float(val_f)
-                    total += float(val_f)
-                    if found is None:
-                        found = c
+                entries = await _pact_accounts_chunk(cl, c, chunk)
             except Exception as e:
-                print(f"[get_balance_any_chain] Error fetching chain {c}: {repr(e)}")
-                traceback.print_exc()
-                continue
-    return total, found, per_chain
+                logger.warning("[get_balances_batch] Error fetching chain %d: %r", c, e)
+                return c, chunk, None
+            if height is not None:
+                for a, entry in entries.items():
+                    _chain_balances.set(a, c, entry, height)
+            return c, chunk, entries
+
+    results = await asyncio.gather(*(query(c, chunk) for c in CHAINS for chunk in chunks))
+
+    per_address: Dict[str, Dict[int, float]] = {a: {} for a in accounts}
+    guards: Dict[str, Dict[int, Optional[str]]] = {a: {} for a in accounts}
+    partial: Set[str] = set()
+    for c, chunk, entries in sorted(results, key=lambda r: r[0]):
+        if entries is None:
+            partial.update(chunk)
+            continue
+        for a, (val, kind) in entries.items():
+            if kind != _GUARD_UNKNOWN:
+                guards[a][c] = kind
+            if val > 0:
+                per_address[a][c] = float(val)
+
+    out: Dict[str, Tuple[float, Optional[int], Dict[int, float]]] = {}
+    for a, per_chain in per_address.items():
+        total = sum(per_chain.values())
+        found = min(per_chain) if per_chain else None
+        out[a] = (total, found, per_chain)
+        contract = _contract_verdict(guards[a], len(guards[a]) == len(CHAINS))
+        if contract is not None:
+            _guard_cache.set(a, contract)
+        if a in partial:
+            continue
+        # a zero total is only final when there is no indexer to fall back to
+        if total > 0.0 or not KADINDEXER_API_KEY:
+            _balance_cache.set(a, out[a], negative=total <= 0.0)
+    if partial:
+        logger.warning("[get_balances_batch] %d of %d accounts incomplete (not cached)", len(partial), len(accounts))
+    return out, partial
 
-async def get_balance_any_chain(address: str) -> Tuple[float, Optional[int], Dict[int, float]]:
+async def _upstream_get(upstream: str, base: str, url: str, deadline: Optional[Deadline] = None, **kwargs) -> httpx.Response:
+    """GET through the shared client for `upstream` within the remaining budget, recording its latency."""
+    if deadline is not None:
+        deadline.check()
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        resp = await bounded(get_client(upstream).get(url, timeout=timeout_for(deadline), **kwargs), deadline)
+        if resp.status_code == 200:
+            outcome = "ok"
+        return resp
+    finally:
+        UPSTREAM_LATENCY.labels(upstream, base, "-", outcome).observe(time.perf_counter() - t0)
+
+async def get_balance_any_chain(address: str, deadline: Optional[Deadline] = None) -> Tuple[float, Optional[int], Dict[int, float]]:
     """
     Public function to get total balance. Tries (1) cache, (2) direct nodes, (3) kadindexer fallback.
     Returns (total, chain_found, per_chain_dict).
+    Concurrent misses for the same address share one lookup (run under the
+    first caller's deadline). A lookup cut short by the deadline raises
+    DeadlineExceeded and is not cached.
+    While the cut watcher is live, a cached positive balance is also dropped
+    as soon as one of the chains holding it mines a block, and only chains
+    that moved are queried again (zero balances keep the short negative TTL
+    to spare the fallback). The per-chain heights live in this process
+    (_chain_balances), even with the sqlite cache backend: another worker
+    sharing the balance cache re-reads the account once before serving it.
     """
-    now = int(time.time())
-    cached = _balance_cache.get(address)
-    if cached:
-        ts, total, found, per_chain = cached
-        if now - ts < _BALANCE_CACHE_TTL:
-            print(f"[cache] hit for {address} total={total}")
-            return total, found, per_chain
-        else:
-            _balance_cache.pop(address, None)
+    if cut_watcher.live():
+        state, cached = _balance_cache.lookup(address)
+        if state == FRESH and (cached[0] <= 0.0 or not _chains_moved(address, cached[2])):
+            return cached
+        res = await _balance_flight.do(address, lambda: _fetch_balance(address, deadline))
+        _balance_cache.set(address, res, negative=res[0] <= 0.0)
+        return res
+    return await _balance_cache.get_or_load(
+        address, lambda: _fetch_balance(address, deadline),
+        is_negative=lambda res: res[0] <= 0.0, flight=_balance_flight,
+    )
+
+def _chains_moved(address: str, per_chain: Dict[int, float]) -> bool:
+    """Has any chain in `per_chain` mined a block since this process read it for `address`?"""
+    return not all(_chain_balances.is_current(address, c, cut_watcher.height(c)) for c in per_chain)
 
+async def _fetch_balance(address: str, deadline: Optional[Deadline] = None) -> Tuple[float, Optional[int], Dict[int, float]]:
     # 1) Try direct nodes
-    total, found, per_chain = await _get_balance_from_nodes(address)
+    incomplete: Optional[IncompleteFanOut] = None
+    try:
+        total, found, per_chain = await _get_balance_from_nodes(address, deadline=deadline)
+    except IncompleteFanOut as e:
+        incomplete = e
+        total = 0.0
     if total > 0.0:
-        _balance_cache[address] = (now, total, found, per_chain)
-        print("[get_balance_any_chain] direct node success", total, per_chain)
+        logger.debug("[get_balance_any_chain] direct node success %s %s", total, per_chain)
         return total, found, per_chain
 
     # 2) Fallback to Kadindexer if API key provided
     if KADINDEXER_API_KEY:
+        UPSTREAM_FALLBACKS.labels("pact", "kadindexer").inc()
         url = f"{KADINDEXER_BASE}account/{address}/balance"
         headers = {"x-api-key": KADINDEXER_API_KEY}
         try:
-            async with httpx.AsyncClient(timeout=API_TIMEOUT) as client:
-                resp = await client.get(url, headers=headers)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    total = float(data.get("total", 0) or 0)
-                    per_chain = {int(k): float(v) for k, v in (data.get("per_chain") or {}).items()}
-                    found = next((c for c, v in per_chain.items() if v > 0), None)
-                    _balance_cache[address] = (now, total, found, per_chain)
-                    print("[get_balance_any_chain] kadindexer fallback total", total)
-                    return total, found, per_chain
-                else:
-                    print("[get_balance_any_chain] kadindexer status", resp.status_code, resp.text[:200])
+            resp = await _upstream_get("kadindexer", KADINDEXER_BASE, url, deadline, headers=headers)
+            if resp.status_code == 200:
+                data = resp.json()
+                total = float(data.get("total", 0) or 0)
+                per_chain = {int(k): float(v) for k, v in (data.get("per_chain") or {}).items()}
+                found = next((c for c, v in per_chain.items() if v > 0), None)
+                logger.debug("[get_balance_any_chain] kadindexer fallback total %s", total)
+                return total, found, per_chain
+            else:
+                logger.warning("[get_balance_any_chain] kadindexer status %s %s", resp.status_code, resp.text[:200])
         except Exception as e:
-            print("[get_balance_any_chain] kadindexer error", repr(e))
-            traceback.print_exc()
+            if expired(deadline):
+                raise DeadlineExceeded(f"balance lookup for {address} cut short by the deadline") from e
+            logger.warning("[get_balance_any_chain] kadindexer error %r", e)
+
+    # Some chains never answered and nothing else did: the balance is unknown, not zero
+    if incomplete is not None:
+        raise incomplete
 
-    # 3) Nothing found — cache zero briefly to avoid hammer
-    _balance_cache[address] = (now, 0.0, None, {})
+    # 3) Nothing found — cached with the short negative TTL to avoid hammer
     return 0.0, None, {}
 
-async def get_tx_count_24h(address: str) -> Optional[int]:
+async def get_tx_count_24h(address: str, deadline: Optional[Deadline] = None) -> Optional[int]:
     """
     Try Kadindexer first (if available), else explorer. Handle 403 and JSON errors gracefully.
+    Results are cached; concurrent misses for the same address share one lookup.
+    Raises DeadlineExceeded (nothing cached) if the budget runs out first.
     """
+    return await _txcount_cache.get_or_load(
+        address, lambda: _fetch_tx_count_24h(address, deadline),
+        is_negative=lambda cnt: cnt is None, flight=_txcount_flight,
+    )
+
+async def _fetch_tx_count_24h(address: str, deadline: Optional[Deadline] = None) -> Optional[int]:
     # Kadindexer preferred for tx counts
     if KADINDEXER_API_KEY:
         url = f"{KADINDEXER_BASE}account/{address}/txcount24h"
         headers = {"x-api-key": KADINDEXER_API_KEY}
         try:
-            async with httpx.AsyncClient(timeout=API_TIMEOUT) as client:
-                resp = await client.get(url, headers=headers)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    return int(data.get("txcount24h", 0))
-                else:
-                    print("[get_tx_count_24h] kadindexer status", resp.status_code, resp.text[:200])
+            resp = await _upstream_get("kadindexer", KADINDEXER_BASE, url, deadline, headers=headers)
+            if resp.status_code == 200:
+                data = resp.json()
+                return int(data.get("txcount24h", 0))
+            else:
+                logger.warning("[get_tx_count_24h] kadindexer status %s %s", resp.status_code, resp.text[:200])
         except Exception as e:
-            print("[get_tx_count_24h] kadindexer error", repr(e))
-            traceback.print_exc()
+            if expired(deadline):
+                raise DeadlineExceeded(f"tx count for {address} cut short by the deadline") from e
+            logger.warning("[get_tx_count_24h] kadindexer error %r", e)
+
+    # Fallback: public explorer (legacy), paged and counted incrementally (see txcount.py)
+    if KADINDEXER_API_KEY:
+        UPSTREAM_FALLBACKS.labels("kadindexer", "explorer").inc()
+
+    async def fetch_page(offset: int, limit: int) -> List[dict]:
+        url = f"{KADENA_EXPLORER_BASE}/transactions?search={address}&limit={limit}&offset={offset}"
+        r = await _upstream_get("explorer", KADENA_EXPLORER_BASE, url, deadline)
+        if r.status_code != 200:
+            raise RuntimeError(f"explorer status {r.status_code} {r.text[:200]}")
+        # Some explorer endpoints may return non-JSON / 403.
+        data = r.json()
+        return data.get("items", []) if isinstance(data, dict) else []
 
-    # Fallback: public explorer (legacy). Some explorer endpoints may return non-JSON / 403.
-    url = f"{KADENA_EXPLORER_BASE}/transactions?search={address}&limit=200"
     try:
-        async with httpx.AsyncClient(timeout=API_TIMEOUT) as client:
-            r = await client.get(url)
-            if r.status_code != 200:
-                print(f"[get_tx_count_24h] explorer status {r.status_code} {r.text[:200]}")
-                return None
-            # Defensive JSON parse
-            try:
-                data = r.json()
-            except Exception as e:
-                print("[get_tx_count_24h] explorer json error", repr(e))
-                return None
-            items = data.get("items", []) if isinstance(data, dict) else []
-            cutoff = dt.datetime.utcnow() - dt.timedelta(hours=24)
-            cnt = 0
-            for it in items:
-                ts = it.get("creationTime") or it.get("timestamp")
-                if ts is None:
-                    continue
-                if isinstance(ts, str) and ts.isdigit():
-                    ts = int(ts)
-                if isinstance(ts, float):
-                    ts = int(ts)
-                if isinstance(ts, int):
-                    dt_obj = dt.datetime.utcfromtimestamp(ts)
-                else:
-                    try:
-                        dt_obj = dt.datetime.fromisoformat(ts.replace("Z", "+00:00")).replace(tzinfo=None)
-                    except Exception:
-                        continue
-                if dt_obj >= cutoff:
-                    cnt += 1
-            return cnt
+        return await _tx_counter.count(address, fetch_page)
     except Exception as e:
-        print("[get_tx_count_24h] HTTP error", repr(e))
-        traceback.print_exc()
+        if expired(deadline):
+            raise DeadlineExceeded(f"tx count for {address} cut short by the deadline") from e
+        logger.warning("[get_tx_count_24h] explorer error %r", e)
         return None
 
-async def is_contract_address(address: str) -> Optional[bool]:
-    # MVP: always False (stub). Could be extended to check registry via kadindexer.
-    return False
+async def is_contract_address(address: str, deadline: Optional[Deadline] = None) -> bool:
+    """
+    True if the account is guarded by code (module, capability, pact or user
+    guard) on any chain. The guard comes from the same per-chain query as
+    the balance, so a validation needing both costs one fan-out; the verdict
+    is cached for GUARD_CACHE_TTL (guards rarely change). If not every chain
+    answered and none of those that did is contract-like, the verdict is
+    unknown: raises DeadlineExceeded when the deadline ran out, RuntimeError
+    otherwise, so the caller flags it instead of scoring a non-contract.
+    """
+    async def load() -> Optional[bool]:
+        try:
+            _, _, _, guards = await _account_flight.do(
+                address, lambda: _get_accounts_from_nodes(address, deadline=deadline)
+            )
+        except IncompleteFanOut as e:
+            guards = e.guards
+        return _contract_verdict(guards, len(guards) == len(CHAINS))
+
+    verdict = await _guard_cache.get_or_load(address, load, is_negative=lambda v: v is None)
+    if verdict is None:
+        if expired(deadline):
+            raise DeadlineExceeded(f"guard lookup for {address} cut short by the deadline")
+        raise RuntimeError(f"guard of {address} unknown: not every chain answered")
+    return verdict
@@ -1,20 +1,17 @@
 import uuid
-import logging
 from fastapi import Request
+from .logs import get_logger, request_id_var
 
-logger = logging.getLogger("gx_kadena")
-handler = logging.StreamHandler()
-formatter = logging.Formatter(
-    '{"ts":"%(asctime)s","level":"%(levelname)s","msg":"%(message)s","request_id":"%(request_id)s"}'
-)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
-logger.setLevel(logging.INFO)
+logger = get_logger("http")
 
 async def logging_middleware(request: Request, call_next):
     request_id = str(uuid.uuid4())
     setattr(request.state, "request_id", request_id)
-    logger.info("Request received", extra={"request_id": request_id})
-    response = await call_next(request)
-    logger.info("Request completed", extra={"request_id": request_id})
-    return response
\ No newline at end of file
+    token = request_id_var.set(request_id)
+    try:
+        logger.info("Request received %s %s", request.method, request.url.path)
+        response = await call_next(request)
+        logger.info("Request completed %s", response.status_code)
+        return response
+    finally:
+        request_id_var.reset(token)
@@ -0,0 +1,120 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+from .config import LOG_LEVEL, LOG_QUEUE_SIZE, LOG_SAMPLE_BURST, LOG_SAMPLE_WINDOW
+
+# Request id of the request being served (set by logging_mw), "-" outside requests.
+request_id_var: contextvars.ContextVar = contextvars.ContextVar("request_id", default="-")
+
+ROOT = "gx_kadena"
+
+
+class ContextFilter(logging.Filter):
+    """Stamp every record with the current request id (runs in the caller's context)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let at most `burst` records per message template through every `window`
+    seconds, so a flapping upstream cannot flood the log. The number of
+    dropped records is reported on the next record that passes.
+    """
+
+    def __init__(self, burst: int = LOG_SAMPLE_BURST, window: float = LOG_SAMPLE_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._buckets: Dict[Tuple[str, int, str], list] = {}  # key -> [window_start, passed, dropped]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        b = self._buckets.get(key)
+        if b is None or now - b[0] >= self.window:
+            dropped = b[2] if b else 0
+            if len(self._buckets) > 10000:
+                self._buckets.clear()
+            self._buckets[key] = [now, 1, 0]
+            if dropped:
+                record.sampled_out = dropped
+            return True
+        if b[1] < self.burst:
+            b[1] += 1
+            return True
+        b[2] += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        doc = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        sampled_out = getattr(record, "sampled_out", 0)
+        if sampled_out:
+            doc["sampled_out"] = sampled_out
+        return json.dumps(doc, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never block the event loop: if the queue is full the record is dropped."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging() -> logging.Logger:
+    """
+    Configure the "gx_kadena" logger once: records are filtered/sampled in
+    the calling thread, then handed to a bounded queue; a background thread
+    formats them as JSON and writes to stdout.
+    """
+    global _listener
+    root = logging.getLogger(ROOT)
+    if _listener is not None:
+        return root
+    q: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    qh = _DroppingQueueHandler(q)
+    qh.addFilter(ContextFilter())
+    qh.addFilter(SamplingFilter())
+    out = logging.StreamHandler(sys.stdout)
+    out.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(q, out, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    root.handlers[:] = [qh]
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+    return root
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the "gx_kadena" namespace, e.g. get_logger("kadena_client")."""
+    setup_logging()
+    return logging.getLogger(f"{ROOT}.{name}")
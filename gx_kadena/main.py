@@ -1,30 +1,67 @@
-from fastapi import FastAPI, HTTPException, Response
-from fastapi.responses import RedirectResponse, FileResponse, HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse, FileResponse, HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from urllib.parse import unquote
+from collections import Counter
+from contextlib import asynccontextmanager
+import asyncio
 import datetime as dt
+import json
 import sys
+from typing import List
 
 # Core modules
-from .validator import validate_address, ValidationResult
-from .rwa.assets import get_rwa_assets
+from .validator import validate_address, validate_many, is_kadena_address, missing_inputs, ValidationResult
+from .config import (ISO_FAST_PATH, ISO_VALIDATE, CUT_WATCHER, BATCH_CONCURRENCY, VALIDATE_BATCH_MAX, VALIDATE_DEADLINE, RISK_DEADLINE,
+                     WATCH_MAX_PER_CLIENT, WATCH_KEEPALIVE)
+from .rwa.assets import get_rwa_assets, cache_stats as rwa_cache_stats
 from .iso.pacs008 import xml_pacs008
 from .iso.camt053 import xml_camt053
-from .security_mw import get_cors_middleware, security_headers_mw
+from .iso.fast import fast_pacs008, fast_camt053
+from .iso.schema import validation_errors
+from .iso.bulk import camt053_stream, pacs008_stream, validate_with_rwa, validated_entries
+from .security_mw import client_key, get_cors_middleware, security_headers_mw
 from .logging_mw import logging_middleware
+from .metrics import metrics_mw, get_metrics, mark_process_dead
+from .deadline import Deadline
+from .http_cache import validation_inputs, etag_for, cache_headers, not_modified, response_304
+from .logs import get_logger
+from .http_pool import startup as start_http_pool, shutdown as shutdown_http_pool, pool_stats
+from .kadena_client import cut_watcher, cache_stats, node_stats, singleflight_stats
+from .watch import WatchLimit, hub as watch_hub
+
+logger = get_logger("main")
+
+# ---------- LIFESPAN ----------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled upstream clients live for the whole app (keep-alive / HTTP/2 reuse)
+    await start_http_pool()
+    # Block heights per chain drive balance cache freshness (see cut_watcher.py)
+    if CUT_WATCHER:
+        cut_watcher.start()
+    try:
+        yield
+    finally:
+        await watch_hub.stop()
+        await cut_watcher.stop()
+        await shutdown_http_pool()
+        mark_process_dead()
 
 # ---------- APP CONFIG ----------
 app = FastAPI(
     title="GX-Kadena (Stateless Edition)",
     version="0.2.0",
-    description="ISO20022-ready, stateless validator for Kadena network (no DB, no cache, no session)."
+    description="ISO20022-ready, stateless validator for Kadena network (no DB, no cache, no session).",
+    lifespan=lifespan,
 )
 
 # ---------- MIDDLEWARE ----------
 get_cors_middleware(app)
 app.middleware("http")(security_headers_mw)
 app.middleware("http")(logging_middleware)
+app.middleware("http")(metrics_mw)
 
 # Add stateless compliance header
 @app.middleware("http")
@@ -41,10 +78,10 @@ REPO_DIR = GX_DIR.parent
 WEB_DIR  = REPO_DIR / "web"
 LEGACY   = GX_DIR / "static"
 
-print(f"[BOOT] GX_DIR={GX_DIR}")
-print(f"[BOOT] WEB_DIR exists? {WEB_DIR.exists()}")
-print(f"[BOOT] LEGACY exists? {LEGACY.exists()}")
-print(f"[BOOT] sys.path[0]={sys.path[0]}")
+logger.info("[BOOT] GX_DIR=%s", GX_DIR)
+logger.info("[BOOT] WEB_DIR exists? %s", WEB_DIR.exists())
+logger.info("[BOOT] LEGACY exists? %s", LEGACY.exists())
+logger.info("[BOOT] sys.path[0]=%s", sys.path[0])
 
 # ---------- UI MOUNT ----------
 MOUNTED = False
@@ -55,7 +92,7 @@ elif LEGACY.exists():
     app.mount("/app", StaticFiles(directory=str(LEGACY), html=True), name="ui")
     MOUNTED = True
 else:
-    print("⚠️ UI folder not found. Running API-only mode.")
+    logger.warning("⚠️ UI folder not found. Running API-only mode.")
 
 @app.get("/", include_in_schema=False)
 def root_redirect():
@@ -75,34 +112,111 @@ async def health():
 
 # ---------- VALIDATOR CORE ----------
 @app.get("/validate/{address}", response_model=ValidationResult, tags=["validate"])
-async def validate(address: str):
+async def validate(address: str, request: Request, response: Response):
     address = unquote(address)
     try:
-        return await validate_address(address)
+        res = await validate_address(address, deadline=Deadline(VALIDATE_DEADLINE))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    headers = cache_headers(etag_for("validate", validation_inputs(res)), res.address, not missing_inputs(res))
+    if not_modified(request, headers["ETag"]):
+        return response_304(headers)
+    response.headers.update(headers)
+    return res
+
+async def read_address_list(request: Request) -> List[str]:
+    """
+    Addresses from a JSON array body, or from a newline-delimited upload
+    (text/plain, application/x-ndjson, ...). Blank lines are skipped and
+    duplicates dropped, keeping first-seen order.
+    """
+    body = await request.body()
+    ctype = request.headers.get("content-type", "")
+    if "application/json" in ctype:
+        try:
+            items = json.loads(body or b"[]")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of addresses")
+        if not isinstance(items, list) or not all(isinstance(a, str) for a in items):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of addresses")
+    else:
+        items = body.decode("utf-8", errors="replace").splitlines()
+    addresses = list(dict.fromkeys(unquote(a.strip().strip('"')) for a in items if a.strip()))
+    if len(addresses) > VALIDATE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {VALIDATE_BATCH_MAX} addresses")
+    return addresses
+
+async def _ndjson_results(addresses: List[str]):
+    async for _, addr, res in validate_many(addresses, concurrency=BATCH_CONCURRENCY):
+        if isinstance(res, ValidationResult):
+            yield res.model_dump_json() + "\n"
+        else:
+            yield json.dumps({"address": addr, "error": str(res) or type(res).__name__}) + "\n"
+
+@app.post("/validate/batch", tags=["validate"])
+async def validate_batch(request: Request):
+    """Validate many addresses; one JSON result (or error) per line as each finishes."""
+    addresses = await read_address_list(request)
+    return StreamingResponse(_ndjson_results(addresses), media_type="application/x-ndjson")
 
 @app.get("/risk/{address}", tags=["validate"])
-async def risk_endpoint(address: str):
+async def risk_endpoint(address: str, request: Request, response: Response):
     address = unquote(address)
-    res = await validate_address(address)
+    res = await validate_address(address, deadline=Deadline(RISK_DEADLINE))
+    headers = cache_headers(etag_for("risk", validation_inputs(res)), res.address, not missing_inputs(res))
+    if not_modified(request, headers["ETag"]):
+        return response_304(headers)
+    response.headers.update(headers)
     return {"address": res.address, "risk_score": res.risk_score, "flags": res.flags, "stateless": True}
 
 # ---------- RWA ----------
 @app.get("/rwa/{address}", tags=["rwa"])
 async def rwa(address: str):
     address = unquote(address)
-    rwa_blk = get_rwa_assets(address)
+    if not is_kadena_address(address):
+        raise HTTPException(status_code=400, detail="Invalid Kadena address format")
+    rwa_blk = await get_rwa_assets(address, deadline=Deadline(VALIDATE_DEADLINE))
     return {"address": address, "assets": rwa_blk, "stateless": True}
 
 # ---------- ISO 20022 EXPORT ----------
+async def _validate_with_rwa(address: str):
+    """
+    Validation result and RWA holdings, looked up concurrently under one
+    deadline. A result missing an input is refused with 503 rather than
+    rendered, as a statement cannot report a balance or risk score it does
+    not know.
+    """
+    try:
+        res, rwa_blk = await validate_with_rwa(address)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    missing = missing_inputs(res)
+    if missing:
+        raise HTTPException(status_code=503, detail={"error": "upstream data unavailable", "flags": missing})
+    return res, rwa_blk
+
+render_pacs008 = fast_pacs008 if ISO_FAST_PATH else xml_pacs008
+render_camt053 = fast_camt053 if ISO_FAST_PATH else xml_camt053
+
+def _checked(kind: str, xml_bytes: bytes) -> bytes:
+    """With ISO_VALIDATE on, refuse to serve a document that fails its XSD."""
+    if ISO_VALIDATE:
+        errors = validation_errors(kind, xml_bytes)
+        if errors:
+            logger.warning("[iso] %s failed schema validation: %s", kind, errors[:5])
+            raise HTTPException(status_code=500, detail={"error": f"{kind} failed schema validation", "errors": errors[:20]})
+    return xml_bytes
+
 @app.get("/iso/pacs008.xml", tags=["iso20022"])
-async def iso_pacs(address: str, reference_id: str = "GX-TEST-001",
+async def iso_pacs(request: Request, address: str, reference_id: str = "GX-TEST-001",
                    amount: str = "0.00", ccy: str = "KDA"):
     address = unquote(address)
-    res = await validate_address(address)
-    rwa_blk = get_rwa_assets(address)
-    xml_bytes = xml_pacs008(
+    res, rwa_blk = await _validate_with_rwa(address)
+    etag = etag_for("pacs008", validation_inputs(res), rwa_blk, reference_id, amount, ccy)
+    headers = cache_headers(etag, res.address, complete=not rwa_blk.get("partial"), with_rwa=True)
+    if not_modified(request, etag):
+        return response_304(headers)
+    xml_bytes = render_pacs008(
         address=res.address,
         ref_id=reference_id,
         amt=amount,
@@ -111,34 +225,121 @@ async def iso_pacs(address: str, reference_id: str = "GX-TEST-001",
         rwa_block=rwa_blk
     )
     return Response(
-        content=xml_bytes,
+        content=_checked("pacs008", xml_bytes),
         media_type="application/xml",
         headers={
             "Content-Disposition": f'attachment; filename="pacs008_{reference_id}.xml"',
-            "X-Stateless-Mode": "true"
+            "X-Stateless-Mode": "true",
+            **headers,
         }
     )
 
 @app.get("/iso/camt053.xml", tags=["iso20022"])
-async def iso_camt(address: str):
+async def iso_camt(request: Request, address: str):
     address = unquote(address)
-    res = await validate_address(address)
-    rwa_blk = get_rwa_assets(address)
-    xml_bytes = xml_camt053(
+    res, rwa_blk = await _validate_with_rwa(address)
+    etag = etag_for("camt053", validation_inputs(res), rwa_blk)
+    headers = cache_headers(etag, res.address, complete=not rwa_blk.get("partial"), with_rwa=True)
+    if not_modified(request, etag):
+        return response_304(headers)
+    xml_bytes = render_camt053(
         address=res.address,
         balance=res.total_balance,
         risk=res.risk_score,
         rwa_block=rwa_blk
     )
     return Response(
-        content=xml_bytes,
+        content=_checked("camt053", xml_bytes),
         media_type="application/xml",
         headers={
             "Content-Disposition": f'attachment; filename="camt053_{res.address}.xml"',
+            "X-Stateless-Mode": "true",
+            **headers,
+        }
+    )
+
+@app.post("/iso/bulk/camt053.xml", tags=["iso20022"])
+async def iso_bulk_camt(request: Request):
+    """
+    One camt.053 with a Stmt per address (JSON array or newline-delimited
+    body), streamed. Accounts without a complete result are left out and
+    counted in a closing comment.
+    """
+    addresses = await read_address_list(request)
+    omitted: Counter = Counter()
+    return StreamingResponse(
+        camt053_stream(validated_entries(addresses, concurrency=BATCH_CONCURRENCY, omitted=omitted), omitted=omitted),
+        media_type="application/xml",
+        headers={
+            "Content-Disposition": 'attachment; filename="camt053_bulk.xml"',
+            "X-Stateless-Mode": "true"
+        }
+    )
+
+@app.post("/iso/bulk/pacs008.xml", tags=["iso20022"])
+async def iso_bulk_pacs(request: Request, reference_id: str = "GX-BULK", ccy: str = "KDA"):
+    """
+    One pacs.008 with a CdtTrfTxInf per address (amount = total balance),
+    streamed. Accounts without a complete result are left out of NbOfTxs and
+    CtrlSum and counted in a closing comment.
+    """
+    addresses = await read_address_list(request)
+    omitted: Counter = Counter()
+    return StreamingResponse(
+        pacs008_stream(validated_entries(addresses, concurrency=BATCH_CONCURRENCY, omitted=omitted),
+                       ref_id=reference_id, ccy=ccy, omitted=omitted),
+        media_type="application/xml",
+        headers={
+            "Content-Disposition": f'attachment; filename="pacs008_{reference_id}.xml"',
             "X-Stateless-Mode": "true"
         }
     )
 
+# ---------- WATCH (SSE) ----------
+async def _watch_events(addresses: List[str], client: str):
+    # The subscription lives exactly as long as this generator runs, so a
+    # response that is never streamed cannot leak one.
+    try:
+        box = watch_hub.subscribe(addresses, client)
+    except WatchLimit as e:  # filled up since the endpoint checked
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        return
+    try:
+        while True:
+            try:
+                updates = await asyncio.wait_for(box.get(), timeout=WATCH_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            for address, changes in updates:
+                yield f"event: update\ndata: {json.dumps({'address': address, **changes})}\n\n"
+    finally:
+        watch_hub.unsubscribe(box)
+
+@app.get("/watch", tags=["validate"])
+async def watch_addresses(request: Request, address: List[str] = Query(..., description="repeat for several addresses")):
+    """
+    Server-sent events: the current balance / tx count / risk score of each
+    address, then an `update` event whenever one of them changes.
+    """
+    addresses = list(dict.fromkeys(unquote(a.strip()) for a in address if a.strip()))
+    if not addresses:
+        raise HTTPException(status_code=400, detail="No address given")
+    if len(addresses) > WATCH_MAX_PER_CLIENT:
+        raise HTTPException(status_code=413, detail=f"At most {WATCH_MAX_PER_CLIENT} addresses per subscription")
+    bad = [a for a in addresses if not is_kadena_address(a)]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Invalid Kadena address format: {bad[0]}")
+    client = client_key(request)
+    try:
+        watch_hub.check(addresses, client)
+    except WatchLimit as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return StreamingResponse(
+        _watch_events(addresses, client), media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
 # ---------- STATUS ----------
 @app.get("/status", tags=["system"])
 async def status():
@@ -147,12 +348,26 @@ async def status():
         "version": "0.2.0",
         "network": "mainnet01",
         "stateless": True,
-        "time": dt.datetime.utcnow().isoformat() + "Z"
+        "time": dt.datetime.utcnow().isoformat() + "Z",
+        "coalescing": singleflight_stats(),
+        "caches": {**cache_stats(), "rwa": rwa_cache_stats()},
+        "pact_bases": node_stats(),
+        "cut": cut_watcher.stats(),
+        "watch": watch_hub.stats(),
     }
 
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+async def metrics_endpoint():
+    data, content_type = get_metrics()
+    return Response(content=data, media_type=content_type)
+
+@app.get("/status/pool", tags=["system"])
+async def status_pool():
+    """Upstream HTTP pool occupancy (in use / idle / waiting) per upstream."""
+    return {"pools": pool_stats(), "stateless": True}
+
 # ---------- TRACTION ----------
 from datetime import datetime
-from fastapi import Request
 
 # In-memory counter (stateless session → auto reset on restart)
 TRACTION_COUNT = 0
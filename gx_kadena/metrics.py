@@ -1,15 +1,95 @@
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+import os
+import time
+import weakref
+from prometheus_client import (
+    Counter, Gauge, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST, multiprocess
+)
+from starlette.routing import Match
+
+# Labels are bounded: route templates (not raw paths), configured bases, chain ids.
+REQ_COUNT = Counter("gx_requests_total", "Total requests", ["route", "method", "status"])
+LATENCY = Histogram("gx_latency_seconds", "Request latency", ["route"])
+IN_FLIGHT = Gauge("gx_requests_in_flight", "Requests being served", ["route"], multiprocess_mode="livesum")
+
+UPSTREAM_LATENCY = Histogram(
+    "gx_upstream_latency_seconds", "Upstream call latency",
+    ["upstream", "base", "chain", "outcome"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0),
+)
+UPSTREAM_RETRIES = Counter("gx_upstream_retries_total", "Extra upstream attempts", ["upstream", "reason"])
+UPSTREAM_FALLBACKS = Counter("gx_upstream_fallbacks_total", "Fallbacks to another source", ["source", "target"])
+BREAKER_TRANSITIONS = Counter("gx_circuit_breaker_transitions_total", "Circuit breaker state changes", ["base", "state"])
+CACHE_EVENTS = Counter("gx_cache_events_total", "Result cache hits / stale hits / misses / evictions", ["cache", "event"])
+COALESCED = Counter("gx_coalesced_calls_total", "Calls served by an in-flight lookup", ["lookup"])
+
+
+def route_template(request) -> str:
+    """Path template of the route serving `request` (e.g. /validate/{address})."""
+    partial = None
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+def _once(fn):
+    """`fn` wrapped to run on the first call only."""
+    done = False
+
+    def call():
+        nonlocal done
+        if not done:
+            done = True
+            fn()
+    return call
+
+
+async def _release_after(body, release):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        release()
 
-REQ_COUNT = Counter("gx_requests_total", "Total requests", ["path"])
-LATENCY = Histogram("gx_latency_seconds", "Request latency", ["path"])
 
 async def metrics_mw(request, call_next):
-    import time
+    route = route_template(request)
     start = time.time()
-    resp = await call_next(request)
-    LATENCY.labels(request.url.path).observe(time.time() - start)
-    REQ_COUNT.labels(request.url.path).inc()
+    status = 500
+    IN_FLIGHT.labels(route).inc()
+    # A request stays in flight until its body is sent (streamed responses
+    # outlive call_next); the finalizer covers a body that is never iterated.
+    release = _once(IN_FLIGHT.labels(route).dec)
+    try:
+        resp = await call_next(request)
+        status = resp.status_code
+    except BaseException:
+        release()
+        raise
+    finally:
+        LATENCY.labels(route).observe(time.time() - start)
+        REQ_COUNT.labels(route, request.method, str(status)).inc()
+    if getattr(resp, "body_iterator", None) is None:
+        release()
+        return resp
+    resp.body_iterator = _release_after(resp.body_iterator, release)
+    weakref.finalize(resp, release)
     return resp
 
+
 def get_metrics():
-    return generate_latest(), CONTENT_TYPE_LATEST
\ No newline at end of file
+    # uvicorn --workers N: aggregate every worker's samples (PROMETHEUS_MULTIPROC_DIR)
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the multiprocess directory on shutdown."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
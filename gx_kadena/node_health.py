@@ -0,0 +1,149 @@
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from .config import (
+    NODE_EWMA_ALPHA, NODE_ERROR_PENALTY, NODE_LATENCY_WINDOW, NODE_BREAKER_FAILURES, NODE_BREAKER_RESET
+)
+from .metrics import BREAKER_TRANSITIONS
+
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failures` consecutive failures. While open, calls
+    are refused until `reset_after` seconds pass; then one probe is let
+    through (half-open). A successful probe closes the breaker, a failed one
+    re-opens it.
+    """
+
+    def __init__(self, failures: int = NODE_BREAKER_FAILURES, reset_after: float = NODE_BREAKER_RESET, name: str = "-"):
+        self.name = name
+        self.failures = failures
+        self.reset_after = reset_after
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+
+    def ready(self) -> bool:
+        """Would a call be let through right now? (does not claim the probe)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_after:
+            self._transition(HALF_OPEN)
+        return self.state == HALF_OPEN and not self.probe_in_flight
+
+    def allow(self) -> bool:
+        """Claim permission for one call; in half-open only one probe at a time."""
+        if not self.ready():
+            return False
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = True
+        return True
+
+    def release(self) -> None:
+        """Give back a claimed probe without an outcome (e.g. the call was cancelled)."""
+        self.probe_in_flight = False
+
+    def record(self, ok: bool) -> None:
+        self.probe_in_flight = False
+        if ok:
+            self._transition(CLOSED)
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failures:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self._transition(OPEN)
+            self.opened_at = time.monotonic()
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            BREAKER_TRANSITIONS.labels(self.name, state).inc()
+            self.state = state
+
+
+class BaseHealth:
+    """Observed latency / error rate of one Pact base (EWMA + recent samples)."""
+
+    def __init__(self, base: str):
+        self.base = base
+        self.breaker = CircuitBreaker(name=base)
+        # Index of the /local body format this base last accepted (None = unknown)
+        self.payload_format: Optional[int] = None
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error = 0.0
+        self.samples: deque = deque(maxlen=NODE_LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.last_used = 0.0
+
+    def record(self, latency: float, ok: bool) -> None:
+        a = NODE_EWMA_ALPHA
+        self.breaker.record(ok)
+        self.requests += 1
+        self.last_used = time.monotonic()
+        self.ewma_error = (1 - a) * self.ewma_error + a * (0.0 if ok else 1.0)
+        if ok:
+            self.samples.append(latency)
+            self.ewma_latency = latency if self.ewma_latency is None else (1 - a) * self.ewma_latency + a * latency
+        else:
+            self.errors += 1
+
+    def p95(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def score(self) -> float:
+        # Lower is better. Unmeasured bases score 0 so they get tried early.
+        if self.ewma_latency is None:
+            return 0.0 if self.ewma_error == 0.0 else NODE_ERROR_PENALTY * self.ewma_error
+        return self.ewma_latency * (1.0 + NODE_ERROR_PENALTY * self.ewma_error)
+
+    def stats(self) -> dict:
+        p95 = self.p95()
+        return {
+            "ewma_latency_ms": None if self.ewma_latency is None else round(self.ewma_latency * 1000, 1),
+            "p95_ms": None if p95 is None else round(p95 * 1000, 1),
+            "error_rate": round(self.ewma_error, 3),
+            "requests": self.requests,
+            "errors": self.errors,
+            "breaker": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "payload_format": self.payload_format,
+        }
+
+
+class NodeHealth:
+    """Health registry for a set of upstream bases; orders bases best-first."""
+
+    def __init__(self):
+        self._bases: Dict[str, BaseHealth] = {}
+
+    def get(self, base: str) -> BaseHealth:
+        h = self._bases.get(base)
+        if h is None:
+            h = self._bases[base] = BaseHealth(base)
+        return h
+
+    def record(self, base: str, latency: float, ok: bool) -> None:
+        self.get(base).record(latency, ok)
+
+    def ordered(self, bases: List[str]) -> List[str]:
+        """`bases` sorted by score; ties keep the configured order."""
+        ranked = sorted(enumerate(bases), key=lambda ib: (self.get(ib[1]).score(), ib[0]))
+        return [b for _, b in ranked]
+
+    def available(self, bases: List[str]) -> List[str]:
+        """Best-first bases whose circuit breaker currently lets a call through."""
+        return [b for b in self.ordered(bases) if self.get(b).breaker.ready()]
+
+    def stats(self) -> Dict[str, dict]:
+        return {b: h.stats() for b, h in self._bases.items()}
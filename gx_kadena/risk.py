@@ -1,21 +1,169 @@
 import math
-from typing import List, Optional, Tuple
+import struct
+from functools import lru_cache
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+# ---------- Rules (data) ----------
+# Each rule reads one input field. risk_score (one account) and
+# risk_score_batch (columns of accounts) both evaluate the same RULES, so a
+# new factor is one more entry here.
+
+class LogScale(NamedTuple):
+    """+min(cap, int(log10(value + 1) * scale)) points when value > 0."""
+    field: str
+    scale: float
+    cap: int
+
+class Steps(NamedTuple):
+    """Points of the first (threshold, points) pair with value >= threshold; none if value is unknown."""
+    field: str
+    steps: Tuple[Tuple[float, int], ...]
+
+class Flag(NamedTuple):
+    """+points (may be negative) and `flag` when value is truthy."""
+    field: str
+    points: int
+    flag: str
+
+class ZeroOrUnknown(NamedTuple):
+    """`flag` (after scoring) when the first field is 0 and the others are 0 or unknown."""
+    fields: Tuple[str, ...]
+    flag: str
+
+BASE_SCORE = 50
+SCORE_RANGE = (0, 100)
+
+RULES = (
+    LogScale("balance", scale=6, cap=15),
+    Steps("tx24", steps=((20, 10), (5, 5))),
+    Flag("is_contract", points=-10, flag="contract-like"),
+)
+POST_FLAGS = (
+    ZeroOrUnknown(("balance", "tx24"), flag="dormant-or-new"),
+)
+FLAG_NAMES = tuple(r.flag for r in RULES if isinstance(r, Flag)) + tuple(r.flag for r in POST_FLAGS)
+
+
+def _log_points(rule: LogScale, value) -> int:
+    return min(rule.cap, int(math.log10(value + 1) * rule.scale))
+
+
+def _rule_points(rule, value) -> Tuple[int, Optional[str]]:
+    if isinstance(rule, LogScale):
+        return (_log_points(rule, value), None) if value > 0 else (0, None)
+    if isinstance(rule, Steps):
+        if value is not None:
+            for threshold, points in rule.steps:
+                if value >= threshold:
+                    return points, None
+        return 0, None
+    if isinstance(rule, Flag):
+        return (rule.points, rule.flag) if value else (0, None)
+    raise TypeError(f"unknown rule {rule!r}")
+
 
 def risk_score(balance: int, tx24: Optional[int], is_contract: Optional[bool]) -> Tuple[int, List[str]]:
-    score = 50
+    inputs = {"balance": balance, "tx24": tx24, "is_contract": is_contract}
+    score = BASE_SCORE
     flags: List[str] = []
 
-    if balance > 0:
-        score += min(15, int(math.log10(balance + 1) * 6))
-    if tx24 is not None:
-        if tx24 >= 20:
-            score += 10
-        elif tx24 >= 5:
-            score += 5
-    if is_contract:
-        score -= 10
-        flags.append("contract-like")
-    score = max(0, min(100, score))
-    if balance == 0 and (tx24 is None or tx24 == 0):
-        flags.append("dormant-or-new")
-    return score, flags
\ No newline at end of file
+    for rule in RULES:
+        points, flag = _rule_points(rule, inputs[rule.field])
+        score += points
+        if flag:
+            flags.append(flag)
+    score = max(SCORE_RANGE[0], min(SCORE_RANGE[1], score))
+    for post in POST_FLAGS:
+        first, *rest = post.fields
+        if inputs[first] == 0 and all(inputs[f] is None or inputs[f] == 0 for f in rest):
+            flags.append(post.flag)
+    return score, flags
+
+
+# ---------- Batch scoring (NumPy) ----------
+
+def _float_from_bits(bits: int) -> float:
+    return struct.unpack("<d", struct.pack("<q", bits))[0]
+
+
+@lru_cache(maxsize=None)
+def log_thresholds(rule: LogScale) -> Tuple[float, ...]:
+    """
+    Smallest positive double reaching each point level 1..cap of `rule`,
+    found by bisection over the scalar formula itself. Counting thresholds
+    <= value then gives exactly the scalar points, with no vector log10
+    whose last-bit rounding could differ from math.log10.
+    """
+    lo_bits, hi_bits = 1, 0x7FEFFFFFFFFFFFFF  # smallest subnormal .. largest finite
+    out = []
+    for level in range(1, rule.cap + 1):
+        if _log_points(rule, _float_from_bits(hi_bits)) < level:
+            out.append(math.inf)
+            continue
+        lo, hi = lo_bits, hi_bits
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _log_points(rule, _float_from_bits(mid)) >= level:
+                hi = mid
+            else:
+                lo = mid + 1
+        out.append(_float_from_bits(lo))
+        lo_bits = lo
+    return tuple(out)
+
+
+def _rule_points_batch(np, rule, col):
+    zeros = np.zeros(len(col), dtype=np.int64)
+    if isinstance(rule, LogScale):
+        thresholds = np.asarray(log_thresholds(rule))
+        points = np.searchsorted(thresholds, col, side="right").astype(np.int64)
+        return np.where(col > 0, points, 0), None
+    if isinstance(rule, Steps):
+        conds = [col >= threshold for threshold, _ in rule.steps]  # NaN (unknown) matches nothing
+        return np.select(conds, [points for _, points in rule.steps], default=0).astype(np.int64), None
+    if isinstance(rule, Flag):
+        mask = col.astype(bool)
+        return np.where(mask, rule.points, zeros), mask
+    raise TypeError(f"unknown rule {rule!r}")
+
+
+def risk_score_batch(balances, tx24, is_contract):
+    """
+    Score many accounts at once. Takes equal-length columns: balances,
+    tx counts (NaN or None = unknown) and contract flags (None = False).
+    Returns (scores int64 array, {flag name: bool array}); row i equals
+    risk_score(balances[i], tx24[i], is_contract[i]) exactly.
+    Requires numpy (imported on first use).
+    """
+    import numpy as np
+
+    columns = {
+        "balance": np.asarray(balances, dtype=np.float64),
+        "tx24": np.asarray(tx24, dtype=np.float64),
+        "is_contract": np.asarray(is_contract, dtype=bool),
+    }
+    n = len(columns["balance"])
+    if any(len(c) != n for c in columns.values()):
+        raise ValueError("balances, tx24 and is_contract must have the same length")
+
+    scores = np.full(n, BASE_SCORE, dtype=np.int64)
+    flags: Dict[str, "np.ndarray"] = {}
+    for rule in RULES:
+        points, mask = _rule_points_batch(np, rule, columns[rule.field])
+        scores += points
+        if mask is not None:
+            flags[rule.flag] = mask
+    np.clip(scores, SCORE_RANGE[0], SCORE_RANGE[1], out=scores)
+    for rule in POST_FLAGS:
+        first, *rest = rule.fields
+        mask = columns[first] == 0
+        for f in rest:
+            col = columns[f]
+            mask &= (np.isnan(col) | (col == 0)) if col.dtype.kind == "f" else (col == 0)
+        flags[rule.flag] = mask
+    return scores, flags
+
+
+def flag_lists(flags: Mapping[str, Sequence[bool]], n: int) -> List[List[str]]:
+    """Per-row flag lists (same order as risk_score) from risk_score_batch flags."""
+    return [[name for name in FLAG_NAMES if flags[name][i]] for i in range(n)]
@@ -1,6 +1,113 @@
-def get_rwa_assets(address: str):
-    # Stub: structure real, ready for Pact, but empty for MVP
-    return {
-        "address": address,
-        "assets": []
-    }
\ No newline at end of file
+"""
+RWA holdings of an address across the registered token modules.
+
+One /local call per chain reads the address's balance in every module
+deployed on that chain (chains without RWA modules are skipped), and the
+assembled holdings are cached per address.
+"""
+import asyncio
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+from ..cache import TTLCache, make_backend
+from ..config import RWA_CACHE_TTL, RWA_CACHE_NEG_TTL, CACHE_STALE_TTL
+from ..deadline import Deadline
+from ..http_pool import get_client
+from ..kadena_client import normalize_balance, pact_local
+from ..logs import get_logger
+from ..singleflight import SingleFlight
+from .contracts import RwaContract, modules_by_chain, registry
+
+logger = get_logger("rwa.assets")
+
+_rwa_cache = TTLCache(
+    "rwa", ttl=RWA_CACHE_TTL, negative_ttl=RWA_CACHE_NEG_TTL, stale_ttl=CACHE_STALE_TTL,
+    backend=make_backend("rwa"),
+)  # address -> holdings block ("partial" ones use the negative TTL)
+_rwa_flight = SingleFlight("rwa")
+
+
+def holdings_code(contracts: Sequence[RwaContract]) -> str:
+    """Pact list with the balance of (read-msg "account") in each module, -1.0 where it has no row."""
+    reads = " ".join(f'(try -1.0 ({c.module}.get-balance (read-msg "account")))' for c in contracts)
+    return f"[{reads}]"
+
+
+async def _chain_holdings(client: httpx.AsyncClient, chain: int, contracts: Sequence[RwaContract],
+                          address: str, deadline: Optional[Deadline]) -> Optional[Dict[str, float]]:
+    """{module: balance} on one chain, or None if the chain did not answer."""
+    res = await pact_local(client, chain, holdings_code(contracts), data={"account": address}, deadline=deadline)
+    result = res.get("result", {}) if isinstance(res, dict) else {}
+    vals = result.get("data")
+    if result.get("status") == "success" and isinstance(vals, list) and len(vals) == len(contracts):
+        return {c.module: normalize_balance(v) for c, v in zip(contracts, vals)}
+    if len(contracts) > 1 and result.get("status") == "failure":
+        # e.g. out of gas with many modules: split the read in two
+        mid = len(contracts) // 2
+        left = await _chain_holdings(client, chain, contracts[:mid], address, deadline)
+        right = await _chain_holdings(client, chain, contracts[mid:], address, deadline)
+        return None if left is None or right is None else {**left, **right}
+    return None
+
+
+async def _fetch_rwa_assets(address: str, deadline: Optional[Deadline]) -> dict:
+    index = modules_by_chain()
+    client = get_client("pact")
+    chains = list(index)
+    results = await asyncio.gather(
+        *(_chain_holdings(client, c, index[c], address, deadline) for c in chains), return_exceptions=True
+    )
+    amounts: Dict[str, float] = {}
+    held_on: Dict[str, list] = {}
+    unavailable = []
+    for chain, res in zip(chains, results):
+        if not isinstance(res, dict):
+            if isinstance(res, Exception):
+                logger.warning("[rwa] chain %d lookup failed for %s: %r", chain, address, res)
+            unavailable.append(chain)
+            continue
+        for module, amount in res.items():
+            if amount > 0:
+                amounts[module] = amounts.get(module, 0.0) + amount
+                held_on.setdefault(module, []).append(chain)
+
+    contracts = registry()
+    assets: List[dict] = []
+    for module in sorted(amounts):
+        contract = contracts[module]
+        asset = {"module": module, "type": contract.type, "amount": amounts[module], "chains": held_on[module]}
+        if contract.unit is not None:
+            asset["unit"] = contract.unit
+        assets.append(asset)
+    block: Dict[str, object] = {"address": address, "assets": assets}
+    if unavailable:
+        block["partial"] = True
+        block["unavailable_chains"] = unavailable
+    return block
+
+
+async def get_rwa_assets(address: str, deadline: Optional[Deadline] = None) -> dict:
+    """
+    {"address", "assets": [{"module", "type", "amount", "unit"?, "chains"}, ...]},
+    one asset per module with a positive balance, summed over chains.
+    With chains that did not answer, "partial" and "unavailable_chains" are set.
+    No network calls while the registry is empty.
+    """
+    if not modules_by_chain():
+        return {"address": address, "assets": []}
+    return await _rwa_cache.get_or_load(
+        address, lambda: _fetch_rwa_assets(address, deadline),
+        is_negative=lambda block: block.get("partial", False), flight=_rwa_flight,
+    )
+
+
+def freshness(address: str) -> float:
+    """Seconds the cached holdings of `address` stay fresh (unbounded while the registry is empty)."""
+    if not modules_by_chain():
+        return float("inf")
+    return _rwa_cache.remaining_ttl(address)
+
+
+def cache_stats() -> dict:
+    return _rwa_cache.stats()
@@ -1,3 +1,82 @@
-def get_rwa_contracts():
-    # Stub: extend with real contract list later
-    return []
\ No newline at end of file
+"""
+Registry of RWA token modules.
+
+Loaded once from the JSON file named by RWA_REGISTRY (empty when unset):
+
+    [{"module": "n_abc.gold-token", "type": "commodity", "unit": "oz", "chains": [1, 8]}]
+
+"chains" defaults to every chain. Module names are interpolated into Pact
+code, so entries whose name is not a plain (namespace.)module identifier
+are rejected.
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ..config import CHAINS, RWA_REGISTRY
+from ..logs import get_logger
+
+logger = get_logger("rwa.contracts")
+
+_MODULE_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_\-]*(\.[A-Za-z_][A-Za-z0-9_\-]*)?$")
+
+
+class RwaContract(NamedTuple):
+    module: str
+    type: str
+    unit: Optional[str]
+    chains: Tuple[int, ...]
+
+
+def _parse(entry) -> Optional[RwaContract]:
+    if not isinstance(entry, dict) or not _MODULE_NAME.match(str(entry.get("module", ""))):
+        return None
+    chains = entry.get("chains", CHAINS)
+    if not isinstance(chains, list) or not all(isinstance(c, int) and c in CHAINS for c in chains):
+        return None
+    unit = entry.get("unit")
+    return RwaContract(entry["module"], str(entry.get("type", "unknown")),
+                       None if unit is None else str(unit), tuple(sorted(set(chains))))
+
+
+def load_registry(path: str) -> Dict[str, RwaContract]:
+    """{module name: contract} from a registry file; invalid entries are skipped."""
+    if not path:
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("[rwa] cannot load registry %s: %r", path, e)
+        return {}
+    if not isinstance(entries, list):
+        logger.warning("[rwa] registry %s must be a JSON array", path)
+        return {}
+    registry: Dict[str, RwaContract] = {}
+    for entry in entries:
+        contract = _parse(entry)
+        if contract is None:
+            logger.warning("[rwa] skipping invalid registry entry %r", entry)
+            continue
+        registry[contract.module] = contract
+    return registry
+
+
+@lru_cache(maxsize=1)
+def registry() -> Dict[str, RwaContract]:
+    return load_registry(RWA_REGISTRY)
+
+
+@lru_cache(maxsize=1)
+def modules_by_chain() -> Dict[int, Tuple[RwaContract, ...]]:
+    """Chain -> contracts deployed there; chains without any are absent."""
+    index: Dict[int, List[RwaContract]] = {}
+    for contract in registry().values():
+        for chain in contract.chains:
+            index.setdefault(chain, []).append(contract)
+    return {chain: tuple(contracts) for chain, contracts in sorted(index.items())}
+
+
+def get_rwa_contracts() -> List[RwaContract]:
+    return list(registry().values())
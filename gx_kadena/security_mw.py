@@ -1,10 +1,80 @@
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import Request, Response, HTTPException
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from collections import OrderedDict
+from typing import Optional, Tuple
+import math
 import time
-from .config import ALLOWED_ORIGIN, RATE_LIMIT_RPS
+from .config import (
+    ALLOWED_ORIGIN, RATE_LIMIT_RPS, RATE_LIMIT_BURST, RATE_LIMIT_CHEAP_RPS, RATE_LIMIT_CHEAP_BURST,
+    RATE_LIMIT_MAX_CLIENTS, RATE_LIMIT_API_KEYS, RATE_LIMIT_WORKERS, RATE_LIMIT_TRUST_FORWARDED
+)
+
+# Routes that fan out to upstream nodes (or hold a watch slot) get the strict
+# limit; everything else (/health, /status, static UI, docs) the cheap one.
+EXPENSIVE_PREFIXES = ("/validate", "/risk", "/iso", "/rwa", "/watch")
+
+
+class GCRALimiter:
+    """
+    Per-client rate limiter (Generic Cell Rate Algorithm).
+
+    One float per client (its theoretical arrival time), O(1) per request.
+    Allows `burst` back-to-back requests, then `rate` per second. At most
+    `max_clients` clients are tracked; the least recently seen are dropped
+    first (an idle client's state is equivalent to a fresh one anyway).
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.interval = 1.0 / rate if rate > 0 else math.inf
+        self.tolerance = self.interval * max(0.0, burst - 1)
+        self.max_clients = max_clients
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+
+    def hit(self, key: str, now: Optional[float] = None) -> Tuple[bool, float]:
+        """Return (allowed, retry_after_seconds)."""
+        if now is None:
+            now = time.monotonic()
+        tat = max(self._tat.get(key, now), now)
+        wait = tat - now - self.tolerance
+        if wait > 0:
+            return False, wait
+        self._tat[key] = tat + self.interval
+        self._tat.move_to_end(key)
+        if len(self._tat) > self.max_clients:
+            self._tat.popitem(last=False)
+        return True, 0.0
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+# With N uvicorn workers each process enforces 1/N of the configured rate.
+_expensive = GCRALimiter(RATE_LIMIT_RPS / RATE_LIMIT_WORKERS, RATE_LIMIT_BURST)
+_cheap = GCRALimiter(RATE_LIMIT_CHEAP_RPS / RATE_LIMIT_WORKERS, RATE_LIMIT_CHEAP_BURST)
+
+
+def client_key(request: Request) -> str:
+    """
+    The caller's API key if it is one of RATE_LIMIT_API_KEYS, else the client
+    IP. Unknown keys are ignored so that rotating them cannot dodge the
+    per-IP limit or flush real clients out of the limiter.
+    """
+    api_key = request.headers.get("x-api-key")
+    if api_key and api_key in RATE_LIMIT_API_KEYS:
+        return "key:" + api_key
+    if RATE_LIMIT_TRUST_FORWARDED:
+        fwd = request.headers.get("x-forwarded-for")
+        if fwd:
+            return "ip:" + fwd.split(",")[0].strip()
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+def limiter_for(path: str) -> GCRALimiter:
+    return _expensive if path.startswith(EXPENSIVE_PREFIXES) else _cheap
 
-_last_ts = time.time()
-_tokens = RATE_LIMIT_RPS
 
 def get_cors_middleware(app):
     app.add_middleware(
@@ -16,14 +86,14 @@ def get_cors_middleware(app):
     )
 
 async def security_headers_mw(request: Request, call_next):
-    global _last_ts, _tokens
-    # Token bucket simple rate limit
-    now = time.time()
-    _tokens = min(RATE_LIMIT_RPS, _tokens + (now - _last_ts) * RATE_LIMIT_RPS)
-    _last_ts = now
-    if _tokens < 1.0:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    _tokens -= 1.0
+    # Per-client GCRA rate limit
+    allowed, retry_after = limiter_for(request.url.path).hit(client_key(request))
+    if not allowed:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded"},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
     response: Response = await call_next(request)
     response.headers["Content-Security-Policy"] = "default-src 'self'"
-    return response
\ No newline at end of file
+    return response
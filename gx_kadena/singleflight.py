@@ -0,0 +1,56 @@
+import asyncio
+from functools import partial
+from typing import Any, Callable, Coroutine, Dict, Hashable, TypeVar
+
+from .metrics import COALESCED
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight task.
+
+    The first caller (leader) starts `fn()` as a task; callers arriving while
+    it runs await the same task. Each caller awaits through asyncio.shield, so
+    a cancelled caller never cancels the shared work for the others. Errors
+    propagate to every waiter and the key is released once the task finishes,
+    so the next call starts a fresh attempt.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        if task is None or task.done() or task.get_loop() is not loop:
+            self.leaders += 1
+            task = loop.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._release, key))
+        else:
+            self.coalesced += 1
+            COALESCED.labels(self.name).inc()
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
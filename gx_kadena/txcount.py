@@ -0,0 +1,149 @@
+import datetime as dt
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .config import TXCOUNT_PAGE_SIZE, TXCOUNT_MAX_PAGES, TXCOUNT_MAX_ADDRESSES
+from .logs import get_logger
+
+logger = get_logger("txcount")
+
+WINDOW = 24 * 3600.0
+
+# fetch_page(offset, limit) -> items, newest first
+FetchPage = Callable[[int, int], Awaitable[List[dict]]]
+
+
+def parse_ts(item: dict) -> Optional[float]:
+    """Epoch seconds of an explorer item (creationTime / timestamp), None if unusable."""
+    ts = item.get("creationTime") or item.get("timestamp")
+    if ts is None:
+        return None
+    if isinstance(ts, str) and ts.isdigit():
+        ts = int(ts)
+    if isinstance(ts, (int, float)):
+        ts = float(ts)
+        return ts / 1000.0 if ts > 1e12 else ts  # milliseconds
+    try:
+        parsed = dt.datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt.timezone.utc)
+    return parsed.timestamp()
+
+
+def item_key(item: dict, ts: float) -> Any:
+    return item.get("requestKey") or item.get("hash") or (ts, repr(sorted(item.items())))
+
+
+class TxWindow:
+    """Transactions of one address seen in the last 24h, oldest first."""
+
+    __slots__ = ("events", "seen", "exact")
+
+    def __init__(self):
+        self.events: Deque[Tuple[float, Any]] = deque()
+        self.seen: Set[Any] = set()
+        # False after a scan stopped at max_pages: older history may be missing.
+        self.exact = False
+
+    @property
+    def newest(self) -> Optional[float]:
+        return self.events[-1][0] if self.events else None
+
+    def add(self, new: List[Tuple[float, Any]]) -> None:
+        for ts, key in sorted(new, key=lambda e: e[0]):
+            if key not in self.seen:
+                self.seen.add(key)
+                self.events.append((ts, key))
+
+    def expire(self, cutoff: float) -> None:
+        while self.events and self.events[0][0] < cutoff:
+            _, key = self.events.popleft()
+            self.seen.discard(key)
+
+
+class TxCounter:
+    """
+    Exact 24h transaction counts from a paginated, newest-first source.
+
+    The first query for an address pages back until it passes the 24h
+    cutoff. The transactions found are kept per address in a sliding window,
+    so later queries only page until they reach a transaction already seen
+    (usually one page) and drop the ones that have aged out. Tracked
+    addresses are bounded by `max_addresses` (least recently queried first).
+    """
+
+    def __init__(self, page_size: int = TXCOUNT_PAGE_SIZE, max_pages: int = TXCOUNT_MAX_PAGES,
+                 max_addresses: int = TXCOUNT_MAX_ADDRESSES):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.max_addresses = max_addresses
+        self._windows: "OrderedDict[str, TxWindow]" = OrderedDict()
+        self.pages_fetched = 0
+        self.queries = 0
+
+    async def count(self, address: str, fetch_page: FetchPage, now: Optional[float] = None) -> int:
+        """
+        Transactions of `address` in the 24h before `now`. Errors from
+        `fetch_page` propagate and leave the stored window untouched.
+        """
+        now = time.time() if now is None else now
+        cutoff = now - WINDOW
+        window = self._windows.get(address)
+        if window is not None and not window.exact:
+            window = None  # gap below the last capped scan: start over
+        newest = window.newest if window is not None else None
+
+        new: List[Tuple[float, Any]] = []
+        offset = 0
+        pages = 0
+        done = False
+        while not done and pages < self.max_pages:
+            items = await fetch_page(offset, self.page_size)
+            pages += 1
+            for it in items:
+                ts = parse_ts(it)
+                if ts is None:
+                    continue
+                if ts < cutoff:
+                    done = True
+                    break
+                key = item_key(it, ts)
+                if window is not None and (key in window.seen or (newest is not None and ts < newest)):
+                    done = True  # everything older is already in the window
+                    break
+                new.append((ts, key))
+            if len(items) < self.page_size:
+                done = True
+            offset += self.page_size
+        self.queries += 1
+        self.pages_fetched += pages
+
+        if window is None:
+            window = TxWindow()
+        window.exact = done
+        if not done:
+            logger.warning("[txcount] %s: stopped after %d pages; count is a lower bound", address, pages)
+        window.add(new)
+        window.expire(cutoff)
+        self._store(address, window)
+        return len(window.events)
+
+    def _store(self, address: str, window: TxWindow) -> None:
+        self._windows[address] = window
+        self._windows.move_to_end(address)
+        while len(self._windows) > self.max_addresses:
+            self._windows.popitem(last=False)
+
+    def forget(self, address: str) -> None:
+        self._windows.pop(address, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "addresses": len(self._windows),
+            "events": sum(len(w.events) for w in self._windows.values()),
+            "queries": self.queries,
+            "pages_fetched": self.pages_fetched,
+        }
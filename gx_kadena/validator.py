@@ -1,9 +1,17 @@
+import asyncio
 import datetime as dt
+import logging
 import time
-from typing import List, Optional, Tuple, Dict
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Deque, Iterable, List, Optional, Set, Tuple, Dict, Union
 from pydantic import BaseModel, Field
-from .kadena_client import get_balance_any_chain, get_tx_count_24h, is_contract_address
+from .config import BATCH_CONCURRENCY, BATCH_PREFETCH, VALIDATE_DEADLINE
+from .kadena_client import get_balance_any_chain, get_balances_batch, get_tx_count_24h, is_contract_address
 from .risk import risk_score
+from .deadline import Deadline, DeadlineExceeded
+from .logs import get_logger
+
+logger = get_logger("validator")
 
 class ValidationResult(BaseModel):
     address: str
@@ -19,6 +27,14 @@ class ValidationResult(BaseModel):
     traction: int = 0
     timestamp: dt.datetime = Field(default_factory=lambda: dt.datetime.utcnow())
 
+def missing_inputs(res: ValidationResult) -> List[str]:
+    """
+    The `<source>-unavailable` flags of a result. A result missing an input
+    is reported as such but never rendered into an ISO document (single or
+    bulk): a statement cannot state a balance or risk score it does not know.
+    """
+    return [f for f in res.flags if f.endswith("-unavailable")]
+
 def is_kadena_address(addr: str) -> bool:
     # Accept "k:<hex>" and hex strings of common lengths. Validate hex chars.
     if addr.startswith("k:") and len(addr) == 66:
@@ -35,14 +51,52 @@ def is_kadena_address(addr: str) -> bool:
             return False
     return False
 
-async def validate_address(address: str) -> ValidationResult:
+async def _gather_sources(address: str, deadline: Deadline) -> Tuple[dict, List[str]]:
+    """
+    Run the balance, tx-count and contract lookups concurrently, passing the
+    deadline down to each, and wait at most until it expires. Returns ({source: value}, missing_flags); a source
+    that timed out or failed is absent from the dict and flagged instead.
+    """
+    tasks = {
+        "balance": asyncio.ensure_future(get_balance_any_chain(address, deadline)),
+        "tx-count": asyncio.ensure_future(get_tx_count_24h(address, deadline)),
+        "contract": asyncio.ensure_future(is_contract_address(address, deadline)),
+    }
+    try:
+        await asyncio.wait(tasks.values(), timeout=deadline.remaining())
+    finally:
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+    values: dict = {}
+    missing: List[str] = []
+    for name, task in tasks.items():
+        if task.done() and not task.cancelled() and task.exception() is None:
+            values[name] = task.result()
+            continue
+        if task.done() and not task.cancelled() and not isinstance(task.exception(), DeadlineExceeded):
+            logger.warning("[validator] %s lookup failed for %s: %r", name, address, task.exception())
+        missing.append(f"{name}-unavailable")
+    return values, missing
+
+async def validate_address(address: str, deadline: Optional[Deadline] = None) -> ValidationResult:
+    """
+    Validate one address within `deadline` (a fresh VALIDATE_DEADLINE budget
+    if not given). Inputs that miss the deadline are flagged as unavailable.
+    """
     if not is_kadena_address(address):
         raise ValueError("Invalid Kadena address format")
+    if deadline is None:
+        deadline = Deadline(VALIDATE_DEADLINE)
     t0 = time.time()
-    total_balance, chain_found, balances_per_chain = await get_balance_any_chain(address)
-    tx24 = await get_tx_count_24h(address)
-    isct = await is_contract_address(address)
+    values, missing = await _gather_sources(address, deadline)
+    total_balance, chain_found, balances_per_chain = values.get("balance", (0.0, None, {}))
+    tx24 = values.get("tx-count")
+    isct = values.get("contract")
     score, flags = risk_score(total_balance, tx24, isct)
+    if missing:
+        # Without every input we cannot tell a dormant account from a slow upstream.
+        flags = [f for f in flags if f != "dormant-or-new"] + missing
     dur = int((time.time() - t0) * 1000)
 
     if not balances_per_chain:
@@ -58,19 +112,20 @@ async def validate_address(address: str) -> ValidationResult:
         except Exception:
             balance = 0.0
 
-    print("DEBUG ValidationResult:", {
-        "address": address,
-        "chain_found": chain_found,
-        "balance": balance,
-        "total_balance": total_balance,
-        "balances_per_chain": balances_per_chain,
-        "tx_total_24h": tx24,
-        "is_contract": isct,
-        "risk_score": score,
-        "flags": flags,
-        "duration_ms": dur,
-        "traction": traction,
-    })
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("ValidationResult: %s", {
+            "address": address,
+            "chain_found": chain_found,
+            "balance": balance,
+            "total_balance": total_balance,
+            "balances_per_chain": balances_per_chain,
+            "tx_total_24h": tx24,
+            "is_contract": isct,
+            "risk_score": score,
+            "flags": flags,
+            "duration_ms": dur,
+            "traction": traction,
+        })
 
     return ValidationResult(
         address=address,
@@ -85,3 +140,75 @@ async def validate_address(address: str) -> ValidationResult:
         duration_ms=dur,
         traction=traction,
     )
+
+
+async def prefetch_balances(addresses: List[str]) -> None:
+    """
+    Warm the balance and guard caches for `addresses` with one batched call
+    per chain, so validating them one by one does not fan out per address.
+    Best effort: anything the batch could not read is looked up normally.
+    """
+    valid = [a for a in addresses if is_kadena_address(a)]
+    if len(valid) < 2:
+        return
+    try:
+        await get_balances_batch(valid)
+    except Exception as e:
+        logger.warning("[validator] balance prefetch of %d addresses failed: %r", len(valid), e)
+
+
+async def validate_many(
+    addresses: Union[Iterable[str], AsyncIterable[str]],
+    concurrency: int = BATCH_CONCURRENCY,
+    lookup: Callable[[str], Awaitable[Any]] = validate_address,
+) -> AsyncIterator[Tuple[int, str, Any]]:
+    """
+    Validate a stream of addresses with at most `concurrency` lookups in flight.
+    Yields (index, address, result_or_exception) in completion order, the
+    result being what `lookup` returns (a ValidationResult by default);
+    invalid addresses yield their ValueError instead of stopping the stream.
+    Addresses are pulled lazily, BATCH_PREFETCH at a time whose balances are
+    read together (prefetch_balances), so memory stays bounded by both.
+    """
+    if hasattr(addresses, "__aiter__"):
+        source = addresses.__aiter__()
+    else:
+        sync_iter = iter(addresses)
+
+        async def _aiter():
+            for a in sync_iter:
+                yield a
+        source = _aiter()
+
+    async def run_one(idx: int, addr: str):
+        try:
+            return idx, addr, await lookup(addr)
+        except Exception as e:
+            return idx, addr, e
+
+    pending: Set[asyncio.Task] = set()
+    queued: Deque[str] = deque()
+    index = 0
+    exhausted = False
+    try:
+        while True:
+            while len(pending) < max(1, concurrency):
+                if not queued and not exhausted:
+                    try:
+                        while len(queued) < max(1, BATCH_PREFETCH):
+                            queued.append(await source.__anext__())
+                    except StopAsyncIteration:
+                        exhausted = True
+                    await prefetch_balances(list(queued))
+                if not queued:
+                    break
+                pending.add(asyncio.ensure_future(run_one(index, queued.popleft())))
+                index += 1
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
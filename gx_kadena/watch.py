@@ -0,0 +1,223 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import (CUT_POLL_INTERVAL, WATCH_INTERVAL, WATCH_MIN_INTERVAL, WATCH_CONCURRENCY, WATCH_MAX_ADDRESSES,
+                     WATCH_MAX_SUBSCRIBERS, WATCH_MAX_STREAMS_PER_CLIENT)
+from .logs import get_logger
+from .kadena_client import cut_watcher
+from .validator import validate_many
+
+logger = get_logger("watch")
+
+# Fields pushed to subscribers, and the flag that marks each one's input as missing.
+WATCHED = {
+    "total_balance": ("balance-unavailable",),
+    "tx_total_24h": ("tx-count-unavailable",),
+    "risk_score": ("balance-unavailable", "tx-count-unavailable", "contract-unavailable"),
+}
+
+
+class WatchLimit(Exception):
+    """Subscribing would exceed WATCH_MAX_ADDRESSES, WATCH_MAX_SUBSCRIBERS or WATCH_MAX_STREAMS_PER_CLIENT."""
+
+
+class Mailbox:
+    """
+    Pending updates of one subscriber: the latest value of each changed
+    field per address, merged until the subscriber takes them. A slow
+    consumer therefore holds at most one entry per watched address, however
+    many refreshes it misses.
+    """
+
+    def __init__(self, addresses: Iterable[str], client: str = ""):
+        self.addresses: Tuple[str, ...] = tuple(dict.fromkeys(addresses))
+        self.client = client
+        self._pending: "OrderedDict[str, dict]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self.merged = 0
+
+    def put(self, address: str, changes: dict) -> None:
+        if address in self._pending:
+            self._pending[address].update(changes)
+            self.merged += 1
+        else:
+            self._pending[address] = dict(changes)
+        self._ready.set()
+
+    async def get(self) -> List[Tuple[str, dict]]:
+        """Wait for updates and take all of them, oldest address first."""
+        await self._ready.wait()
+        self._ready.clear()
+        items = list(self._pending.items())
+        self._pending.clear()
+        return items
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class WatchHub:
+    """
+    One poller for every watch subscription. Addresses are deduplicated
+    across subscribers and refreshed once per `interval`, or sooner when the
+    cut watcher reports new block heights, though at most once per
+    `min_interval` (with 20 chains some height changes on nearly every cut
+    poll). Only fields that changed are fanned out to the subscribers'
+    mailboxes. Newly watched addresses are refreshed right away; ones nobody
+    watches any more are dropped.
+    """
+
+    def __init__(self, interval: float = WATCH_INTERVAL, concurrency: int = WATCH_CONCURRENCY,
+                 max_addresses: int = WATCH_MAX_ADDRESSES, max_subscribers: int = WATCH_MAX_SUBSCRIBERS,
+                 max_per_client: int = WATCH_MAX_STREAMS_PER_CLIENT, heights=None, tick: float = CUT_POLL_INTERVAL,
+                 min_interval: float = WATCH_MIN_INTERVAL):
+        self.interval = interval
+        self.min_interval = min(min_interval, interval)
+        self.tick = tick  # how often `heights` is checked between refreshes
+        self.concurrency = concurrency
+        self.max_addresses = max_addresses
+        self.max_subscribers = max_subscribers
+        self.max_per_client = max_per_client
+        # () -> current chain heights (or None); a change triggers a refresh
+        self.heights = heights
+        self._subs: Dict[str, Set[Mailbox]] = {}
+        self._clients: Dict[str, int] = {}  # client key -> open subscriptions
+        self._state: Dict[str, dict] = {}
+        self._new: Set[str] = set()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.subscribers = 0
+        self.refreshes = 0
+        self.pushes = 0
+
+    # ----- subscriptions -----
+
+    def check(self, addresses: Iterable[str], client: str = "") -> List[str]:
+        """Raise WatchLimit if `client` could not subscribe to `addresses` now; else the ones not yet watched."""
+        added = [a for a in dict.fromkeys(addresses) if a not in self._subs]
+        if self.subscribers >= self.max_subscribers:
+            raise WatchLimit(f"at most {self.max_subscribers} watch subscribers")
+        if self._clients.get(client, 0) >= self.max_per_client:
+            raise WatchLimit(f"at most {self.max_per_client} watch subscriptions per client")
+        if len(self._subs) + len(added) > self.max_addresses:
+            raise WatchLimit(f"at most {self.max_addresses} watched addresses")
+        return added
+
+    def subscribe(self, addresses: Iterable[str], client: str = "") -> Mailbox:
+        """Open a subscription; every call must be paired with unsubscribe()."""
+        box = Mailbox(addresses, client)
+        added = self.check(box.addresses, client)
+        self.start()
+        self.subscribers += 1
+        self._clients[client] = self._clients.get(client, 0) + 1
+        for a in box.addresses:
+            self._subs.setdefault(a, set()).add(box)
+            if a in self._state:
+                box.put(a, self._state[a])  # current values first
+        if added:
+            self._new.update(added)
+            self._wake.set()
+        return box
+
+    def unsubscribe(self, box: Mailbox) -> None:
+        self.subscribers -= 1
+        left = self._clients.pop(box.client, 1) - 1
+        if left:
+            self._clients[box.client] = left
+        for a in box.addresses:
+            subs = self._subs.get(a)
+            if subs is None:
+                continue
+            subs.discard(box)
+            if not subs:
+                del self._subs[a]
+                self._state.pop(a, None)
+                self._new.discard(a)
+
+    # ----- polling -----
+
+    def _current_heights(self):
+        return self.heights() if self.heights is not None else None
+
+    async def refresh(self, addresses: List[str]) -> None:
+        """Validate `addresses` and push what changed to their subscribers."""
+        self.refreshes += 1
+        async for _, address, res in validate_many(addresses, concurrency=self.concurrency):
+            if isinstance(res, Exception) or address not in self._subs:
+                continue
+            prev = self._state.get(address, {})
+            snapshot = dict(prev)
+            for field, missing in WATCHED.items():
+                if not any(flag in res.flags for flag in missing):
+                    snapshot[field] = getattr(res, field)
+            changes = {k: v for k, v in snapshot.items() if prev.get(k, object()) != v}
+            if not changes:
+                continue
+            self._state[address] = snapshot
+            for box in self._subs[address]:
+                box.put(address, changes)
+                self.pushes += 1
+
+    async def run(self) -> None:
+        last_full = -math.inf
+        last_heights = None
+        while True:
+            if not self._subs:
+                self._wake.clear()
+                await self._wake.wait()
+            due = last_full + self.interval - time.monotonic()
+            if due > 0 and not self._new:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=min(due, self.tick))
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            heights = self._current_heights()
+            since = time.monotonic() - last_full
+            moved = heights is not None and heights != last_heights and since >= self.min_interval
+            if moved or since >= self.interval:
+                last_full, last_heights = time.monotonic(), heights
+                self._new.clear()
+                batch = list(self._subs)
+            else:
+                batch = [a for a in self._new if a in self._subs]
+                self._new.clear()
+            if batch:
+                try:
+                    await self.refresh(batch)
+                except Exception as e:
+                    logger.warning("[watch] refresh of %d addresses failed: %r", len(batch), e)
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()  # an Event is bound to the loop that first waits on it
+            self._task = loop.create_task(self.run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "clients": len(self._clients),
+            "addresses": len(self._subs),
+            "refreshes": self.refreshes,
+            "pushes": self.pushes,
+        }
+
+
+def _cut_heights():
+    return cut_watcher.heights if cut_watcher.live() else None
+
+
+hub = WatchHub(heights=_cut_heights)
@@ -0,0 +1,29 @@
+import pytest
+
+import gx_kadena.validator as v
+
+
+def _returning(value):
+    async def lookup(addr, deadline=None):
+        return value
+    return lookup
+
+
+async def _no_batch(addresses, client=None):
+    return {}, set()
+
+
+@pytest.fixture
+def fake_lookups(monkeypatch):
+    """
+    Replace the validator's upstream lookups. Call the fixture with a value
+    per source (balance tuple, 24h tx count, contract verdict) or an async
+    function standing in for it; the batched balance prefetch does nothing
+    unless `batch` is given.
+    """
+    def install(balance=(2.0, 1, {1: 2.0}), tx=3, contract=False, batch=_no_batch):
+        stubs = {"get_balance_any_chain": balance, "get_tx_count_24h": tx, "is_contract_address": contract}
+        for name, stub in stubs.items():
+            monkeypatch.setattr(v, name, stub if callable(stub) else _returning(stub))
+        monkeypatch.setattr(v, "get_balances_batch", batch)
+    return install
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+from gx_kadena import bulk
+import gx_kadena.iso.bulk as iso_bulk
+
+
+def _recording_lookups(fake_lookups, seen, batches=None):
+    """Lookups that record each address (and prefetch batch) and finish out of order."""
+    async def balance(addr, deadline=None):
+        seen.append(addr)
+        await asyncio.sleep(0.001 * (hash(addr) % 5))
+        return 1.0, 0, {0: 1.0}
+
+    async def balances_batch(addresses, client=None):
+        if batches is not None:
+            batches.append(list(addresses))
+        return {}, set()
+
+    fake_lookups(balance=balance, tx=0, batch=balances_batch)
+
+
+def test_bulk_writes_in_order_and_resumes_from_checkpoint(tmp_path, monkeypatch, fake_lookups):
+    seen, batches = [], []
+    _recording_lookups(fake_lookups, seen, batches)
+    monkeypatch.setattr(bulk, "BATCH_PREFETCH", 16)
+    addrs = ["k:" + f"{i:064x}" for i in range(40)]
+    inp = tmp_path / "in.txt"
+    inp.write_text("\n".join(addrs[:10] + ["", "bad"] + addrs[10:]) + "\n")
+    out = tmp_path / "out.ndjson"
+
+    assert asyncio.run(bulk.run(str(inp), str(out), concurrency=4, progress=False)) == 41
+    # balances read 16 input lines at a time; blank and invalid lines are not sent
+    assert [len(b) for b in batches] == [14, 16, 10] and sum(batches, []) == addrs
+    full = out.read_bytes()
+    lines = [json.loads(line) for line in full.splitlines()]
+    assert [d["address"] for d in lines] == addrs[:10] + ["bad"] + addrs[10:]
+
+    # crash after 20 input lines: checkpoint at line 20, plus a torn partial write after it
+    offset = len(b"".join(line + b"\n" for line in full.splitlines()[:19]))  # 19 results in 20 lines
+    with open(out, "r+b") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(b'{"address": "torn')
+    bulk.Checkpoint(str(out) + ".ckpt", str(inp)).save(20, offset)
+    seen.clear()
+
+    assert asyncio.run(bulk.run(str(inp), str(out), concurrency=4, progress=False)) == 22
+    resumed = out.read_bytes()
+    assert resumed[:offset] == full[:offset]
+    assert [json.loads(line)["address"] for line in resumed.splitlines()] == [d["address"] for d in lines]
+    assert sorted(seen) == sorted(addrs[18:])  # lines before the checkpoint are not redone
+    assert json.loads((tmp_path / "out.ndjson.ckpt").read_text())["done"] is True
+
+
+def test_bulk_render_failure_is_an_error_line(tmp_path, monkeypatch, fake_lookups):
+    fake_lookups(balance=(1.0, 0, {0: 1.0}), tx=0)
+
+    budgets = []
+
+    async def broken_rwa(address, deadline=None):
+        budgets.append(deadline.remaining())
+        raise RuntimeError("registry node down")
+
+    monkeypatch.setattr(iso_bulk, "get_rwa_assets", broken_rwa)
+    inp = tmp_path / "in.txt"
+    inp.write_text("k:" + "ab" * 32 + "\n")
+    out = tmp_path / "out.ndjson"
+    assert asyncio.run(bulk.run(str(inp), str(out), iso="camt053", workers=1, progress=False)) == 1
+    assert json.loads(out.read_text()) == {"address": "k:" + "ab" * 32, "error": "registry node down"}
+    assert len(budgets) == 1 and 0 < budgets[0] <= bulk.VALIDATE_DEADLINE  # under the per-address deadline
+
+
+def test_render_iso_formats_pacs_amounts():
+    xml = bulk.render_iso("pacs008", "k:" + "ab" * 32, 1e-05, 50, {"address": "k:ab", "assets": []})
+    assert ">0.00001<" in xml and "e-05" not in xml
+
+
+def test_bulk_starts_over_when_output_is_missing(tmp_path, fake_lookups):
+    seen = []
+    _recording_lookups(fake_lookups, seen)
+    addrs = ["k:" + f"{i:064x}" for i in range(5)]
+    inp = tmp_path / "in.txt"
+    inp.write_text("\n".join(addrs) + "\n")
+    out = tmp_path / "out.ndjson"
+    bulk.Checkpoint(str(out) + ".ckpt", str(inp)).save(3, 500)  # output was deleted since
+
+    assert asyncio.run(bulk.run(str(inp), str(out), concurrency=2, progress=False)) == 5
+    assert not out.read_bytes().startswith(b"\0")
+    assert [json.loads(line)["address"] for line in out.read_text().splitlines()] == addrs
+    assert sorted(seen) == sorted(addrs)
+
+
+def test_bulk_iso_refuses_partial_results(tmp_path, fake_lookups):
+    async def no_contract(addr, deadline=None):
+        raise RuntimeError("guard unknown")
+
+    fake_lookups(balance=(1.0, 0, {0: 1.0}), tx=0, contract=no_contract)
+    addr = "k:" + "ab" * 32
+    inp = tmp_path / "in.txt"
+    inp.write_text(addr + "\n")
+    out = tmp_path / "out.ndjson"
+    assert asyncio.run(bulk.run(str(inp), str(out), iso="camt053", workers=1, progress=False)) == 1
+    assert json.loads(out.read_text()) == {
+        "address": addr, "error": "upstream data unavailable", "flags": ["contract-unavailable"],
+    }
+
+    # without ISO rendering the flagged result is written as is
+    assert asyncio.run(bulk.run(str(inp), str(out), restart=True, progress=False)) == 1
+    assert json.loads(out.read_text())["flags"][-1] == "contract-unavailable"
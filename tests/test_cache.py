@@ -0,0 +1,105 @@
+import asyncio
+
+from gx_kadena.cache import TTLCache, MemoryBackend, SQLiteBackend, FRESH, STALE, MISS
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    c = TTLCache("t", ttl=60, negative_ttl=5, max_entries=3)
+    for k in "abcd":
+        c.set(k, 1)
+    assert len(c) == 3 and c.lookup("a")[0] == MISS
+    c.lookup("b")  # touch -> most recently used
+    c.set("e", 1)
+    assert c.lookup("b")[0] == FRESH and c.lookup("c")[0] == MISS
+    assert c.evictions == 2
+
+    small = TTLCache("t", ttl=60, negative_ttl=5, max_bytes=2000)
+    for i in range(100):
+        small.set(i, {"per_chain": {0: 1.0, 1: 2.0}})
+    assert 0 < len(small) < 100 and small.stats()["bytes"] <= 2000
+
+
+def test_negative_ttl_and_stale_while_revalidate(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(MemoryBackend, "clock", staticmethod(lambda: now[0]))
+    c = TTLCache("t", ttl=10, negative_ttl=2, stale_ttl=30)
+    loads = []
+
+    async def loader():
+        loads.append(now[0])
+        return len(loads)
+
+    async def run():
+        assert await c.get_or_load("k", loader, is_negative=lambda v: False) == 1
+        now[0] += 5
+        assert await c.get_or_load("k", loader, is_negative=lambda v: False) == 1
+        now[0] += 10  # expired but within stale window -> old value, refresh in background
+        assert await c.get_or_load("k", loader, is_negative=lambda v: False) == 1
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert await c.get_or_load("k", loader, is_negative=lambda v: False) == 2
+
+    asyncio.run(run())
+    assert (c.hits, c.stale_hits, c.misses) == (2, 1, 1)
+
+    c.set("neg", 0.0, negative=True)
+    now[0] += 3
+    # negative entries expire after negative_ttl and are never served stale
+    assert c.lookup("neg")[0] == MISS
+    c.set("pos", 1.0)
+    now[0] += 11
+    assert c.lookup("pos")[0] == STALE
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    def decode(v):
+        return v[0], {int(k): x for k, x in v[1].items()}
+
+    worker_a = TTLCache("b", ttl=60, negative_ttl=5, backend=SQLiteBackend("b", path=path, decode=decode))
+    worker_b = TTLCache("b", ttl=60, negative_ttl=5, backend=SQLiteBackend("b", path=path, decode=decode))
+    worker_a.set("k:1", (2.5, {3: 2.5}))
+    assert worker_b.lookup("k:1") == (FRESH, (2.5, {3: 2.5}))
+    assert 59 < worker_b.remaining_ttl("k:1") <= 60
+    worker_b.delete("k:1")
+    assert worker_a.lookup("k:1")[0] == MISS
+
+
+def test_sqlite_errors_are_misses_and_dropped_writes(tmp_path):
+    import sqlite3
+    import time
+    path = str(tmp_path / "cache.db")
+    backend = SQLiteBackend("b", path=path, busy_timeout=0.01)
+    c = TTLCache("b", ttl=60, negative_ttl=5, backend=backend)
+    c.set("k:1", 1.0)
+    locker = sqlite3.connect(path, isolation_level=None)
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        t0 = time.perf_counter()
+        c.set("k:2", 2.0)  # database is locked: the write is dropped, not raised
+        assert time.perf_counter() - t0 < 1.0
+        assert backend.errors == 1
+    finally:
+        locker.execute("ROLLBACK")
+        locker.close()
+    assert c.lookup("k:2")[0] == MISS and c.lookup("k:1") == (FRESH, 1.0)
+
+    broken = TTLCache("x", ttl=60, negative_ttl=5, backend=SQLiteBackend("x", path=str(tmp_path)))  # a directory
+    broken.set("k:1", 1.0)
+    assert broken.lookup("k:1")[0] == MISS and broken.backend.errors == 2
+
+
+def test_sqlite_reads_skip_expired_rows_without_writing(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(SQLiteBackend, "clock", staticmethod(lambda: now[0]))
+    backend = SQLiteBackend("b", path=str(tmp_path / "cache.db"))
+    c = TTLCache("b", ttl=1, negative_ttl=1, backend=backend)
+    c.set("k:1", 1.0)
+    now[0] += 5
+    changes = backend._db().total_changes
+    assert c.lookup("k:1")[0] == MISS and c.remaining_ttl("k:1") == 0
+    assert backend._db().total_changes == changes and len(backend) == 1  # a miss, not a WAL write
+    monkeypatch.setattr(SQLiteBackend, "_TRIM_EVERY", 1)
+    c.set("k:2", 2.0)  # writes sweep expired rows
+    assert len(backend) == 1 and c.lookup("k:2") == (FRESH, 2.0)
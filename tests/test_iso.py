@@ -14,4 +14,126 @@ def test_camt053_xml():
     tree = etree.fromstring(xml)
     assert tree.find(".//{*}BkToCstmrStmt") is not None
     assert tree.find(".//{*}GrpHdr/{*}MsgId") is not None
-    assert tree.find(".//{urn:adcx:rwa:1}Tokenization/{urn:adcx:rwa:1}Address") is not None
\ No newline at end of file
+    assert tree.find(".//{urn:adcx:rwa:1}Tokenization/{urn:adcx:rwa:1}Address") is not None
+
+def test_statement_totals_follow_its_entries():
+    from decimal import Decimal
+    from gx_kadena.iso.camt053 import entry_totals
+    assert entry_totals([("1.5", "CRDT"), ("2", "DBIT")]) == {
+        "NbOfNtries": "2", "Sum": "3.5", "TtlNetNtryAmt": "0.5", "CdtDbtInd": "DBIT",
+    }
+    stmt = etree.fromstring(xml_camt053("k:a", 1, 50, {"assets": []})).find(".//{*}Stmt")
+    amounts = [Decimal(a.text) for a in stmt.findall("{*}Ntry/{*}Amt")]
+    assert stmt.findtext("{*}TxsSummry/{*}TtlNtries/{*}NbOfNtries") == str(len(amounts))
+    assert Decimal(stmt.findtext("{*}TxsSummry/{*}TtlNtries/{*}Sum")) == sum(amounts)
+
+def test_bulk_streams_with_correct_totals():
+    import asyncio
+    from decimal import Decimal
+    from gx_kadena.iso.bulk import camt053_stream, pacs008_stream
+
+    async def entries():
+        for i in range(250):
+            yield f"k:{i:064x}", 1.5 + i / 1000 if i else 1e-05, 50, {"address": f"k:{i}", "assets": []}
+
+    async def collect(gen):
+        chunks = [c async for c in gen]
+        return chunks, b"".join(chunks)
+
+    chunks, camt = asyncio.run(collect(camt053_stream(entries())))
+    assert len(chunks) > 250  # one chunk per Stmt, not one big buffer
+    stmts = etree.fromstring(camt).findall(".//{*}Stmt")
+    assert len(stmts) == 250
+    assert [s.findtext("{*}Bal/{*}Amt") for s in stmts[:2]] == ["0.00001", "1.501"]  # never 1e-05
+    assert all(s.findtext("{*}TxsSummry/{*}TtlNtries/{*}NbOfNtries") == str(len(s.findall("{*}Ntry")))
+               for s in stmts)
+
+    _, pacs = asyncio.run(collect(pacs008_stream(entries(), ref_id="EOD")))
+    tree = etree.fromstring(pacs)
+    amounts = [Decimal(a.text) for a in tree.findall(".//{*}CdtTrfTxInf/{*}Amt/{*}InstdAmt")]
+    assert tree.findtext(".//{*}GrpHdr/{*}NbOfTxs") == "250" and len(amounts) == 250
+    assert Decimal(tree.findtext(".//{*}GrpHdr/{*}CtrlSum")) == sum(amounts)
+    assert tree.find(".//{urn:adcx:rwa:1}Tokenization/{urn:adcx:rwa:1}Address") is not None
+
+def test_fast_path_is_byte_identical():
+    import pytest
+    from gx_kadena.iso.fast import fast_pacs008, fast_camt053
+    now = "2025-01-02T03:04:05Z"
+    blocks = [
+        None,
+        {"address": "k:x", "assets": []},
+        {"assets": [{"type": "bond", "amount": 3.5, "unit": "oz"}]},
+        {"assets": [{"amount": "1"}]},
+        {"assets": [{"type": None, "unit": ""}]},
+        {"assets": [{"module": "n_a.gold", "type": "commodity", "amount": 2.0, "unit": "oz", "chains": [1]},
+                    {"module": "n_b.<bond>", "type": "bond", "amount": 0.5, "chains": [2, 8]}]},
+    ]
+    odd = ["k:" + "ab" * 32, 'a&b<c>"d\'', "tab\tnl\ncr\r", "é ü 日本 \U0001F600", "]]>", ""]
+    for blk in blocks:
+        for s in odd:
+            assert fast_camt053(s, 12.5, 70, blk, now=now) == xml_camt053(s, 12.5, 70, blk, now=now)
+            assert fast_pacs008(s, s, s, s or "KDA", 5, blk, now=now) == \
+                xml_pacs008(s, s, s, s or "KDA", 5, blk, now=now)
+    for bad in ("nul\x00", "bell\x07"):
+        with pytest.raises(ValueError):
+            xml_camt053(bad, 1, 1, None, now=now)
+        with pytest.raises(ValueError):
+            fast_camt053(bad, 1, 1, None, now=now)
+
+def test_schema_is_compiled_once(tmp_path, monkeypatch):
+    from gx_kadena.iso import schema
+    xsd = ('<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="{ns}" '
+           'elementFormDefault="qualified"><xs:element name="Document"><xs:complexType><xs:sequence>'
+           '<xs:any processContents="skip" minOccurs="0" maxOccurs="unbounded"/>'
+           '</xs:sequence></xs:complexType></xs:element></xs:schema>')
+    (tmp_path / "camt.053.001.02.xsd").write_text(xsd.format(ns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"))
+    monkeypatch.setattr(schema, "ISO_XSD_DIR", str(tmp_path))
+    schema.load_schema.cache_clear()
+    try:
+        assert schema.validation_errors("camt053", xml_camt053("k:a", 1, 50, None)) == []
+        assert schema.validation_errors("camt053", b"<Document/>") != []
+        assert schema.load_schema.cache_info().misses == 1
+    finally:
+        schema.load_schema.cache_clear()
+
+def test_tokenization_lists_every_holding():
+    blk = {"assets": [{"module": "n_a.gold", "type": "commodity", "amount": 2.0, "unit": "oz"},
+                      {"module": "n_b.bond", "type": "bond", "amount": 0.5}]}
+    tree = etree.fromstring(xml_camt053("k:a", 1, 50, blk))
+    holdings = tree.findall(".//{urn:adcx:rwa:1}Tokenization/{urn:adcx:rwa:1}Holding")
+    assert [h.findtext("{urn:adcx:rwa:1}Module") for h in holdings] == ["n_a.gold", "n_b.bond"]
+    assert holdings[1].find("{urn:adcx:rwa:1}Unit") is None
+
+def test_bulk_entries_skip_partial_results_and_say_so(monkeypatch, fake_lookups):
+    import asyncio
+    import time
+    from collections import Counter
+    import gx_kadena.iso.bulk as iso_bulk
+    good = ["k:" + f"{i:064x}" for i in range(4)]
+    flaky = "k:" + "fe" * 32
+
+    async def fake_tx(addr, deadline=None):
+        if addr == flaky:
+            raise RuntimeError("explorer down")
+        return 1
+
+    async def slow_rwa(address, deadline=None):
+        await asyncio.sleep(0.1)
+        return {"address": address, "assets": []}
+
+    fake_lookups(balance=(2.0, 0, {0: 2.0}), tx=fake_tx)
+    monkeypatch.setattr(iso_bulk, "get_rwa_assets", slow_rwa)
+
+    async def export(stream, **kw):
+        omitted = Counter()
+        entries = iso_bulk.validated_entries(good + [flaky, "bad"], concurrency=6, omitted=omitted)
+        return b"".join([c async for c in stream(entries, omitted=omitted, **kw)])
+
+    start = time.perf_counter()
+    camt = asyncio.run(export(iso_bulk.camt053_stream))
+    assert time.perf_counter() - start < 0.3  # RWA lookups run alongside, not one after another
+    assert len(etree.fromstring(camt).findall(".//{*}Stmt")) == 4
+    assert b"<!-- 2 accounts omitted: invalid-address=1, tx-count-unavailable=1 -->" in camt
+    pacs = etree.fromstring(asyncio.run(export(iso_bulk.pacs008_stream)))
+    assert pacs.findtext(".//{*}GrpHdr/{*}NbOfTxs") == "4" and pacs.findtext(".//{*}GrpHdr/{*}CtrlSum") == "8"
+    assert "2 accounts omitted" in pacs[-1].text
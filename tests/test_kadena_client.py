@@ -0,0 +1,496 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from gx_kadena import kadena_client as kc
+
+ADDR = "k:" + "ab" * 32
+RTT = 0.2
+
+
+def _mock_node(balances, latency=RTT):
+    """Fake Pact /local endpoint: answers each chain after `latency` seconds."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        body = json.loads(request.content)
+        chain = int(body["meta"]["chainId"])
+        return httpx.Response(200, json={"result": {"status": "success", "data": balances.get(chain, 0.0)}})
+    return httpx.MockTransport(handler)
+
+
+def test_balance_fan_out_is_concurrent():
+    balances = {3: 1.5, 7: {"int": "2"}, 19: 0.25}
+
+    async def run():
+        async with httpx.AsyncClient(transport=_mock_node(balances)) as client:
+            t0 = time.perf_counter()
+            res = await kc._get_balance_from_nodes(ADDR, client=client)
+            return res, time.perf_counter() - t0
+
+    (total, found, per_chain), elapsed = asyncio.run(run())
+    assert total == 3.75
+    assert found == 3
+    assert per_chain == {3: 1.5, 7: 2.0, 19: 0.25}
+    # 20 chains in parallel: close to one RTT, far from twenty.
+    assert elapsed < RTT * 3
+
+
+def test_balance_fan_out_respects_concurrency_limit(monkeypatch):
+    monkeypatch.setattr(kc, "CHAIN_CONCURRENCY", 5)
+
+    async def run():
+        async with httpx.AsyncClient(transport=_mock_node({0: 1.0}, latency=0.05)) as client:
+            t0 = time.perf_counter()
+            res = await kc._get_balance_from_nodes(ADDR, client=client)
+            return res, time.perf_counter() - t0
+
+    (total, found, _), elapsed = asyncio.run(run())
+    assert (total, found) == (1.0, 0)
+    # 20 chains / 5 at a time -> 4 waves
+    assert elapsed >= 0.05 * 4
+
+
+def test_balances_batch_one_call_per_chain():
+    accounts = ["k:" + f"{i:064x}" for i in range(50)]
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        chain = int(body["meta"]["chainId"])
+        accts = body["payload"]["exec"]["data"]["accounts"]
+        calls.append((chain, len(accts)))
+        # every 10th account holds 1.0 KDA on chain 2 only; others are missing
+        data = [1.0 if chain == 2 and int(a[2:], 16) % 10 == 0 else -1.0 for a in accts]
+        return httpx.Response(200, json={"result": {"status": "success", "data": data}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await kc.get_balances_batch(accounts + accounts[:5], client=client)
+
+    out, partial = asyncio.run(run())
+    assert len(calls) == len(kc.CHAINS)
+    assert set(out) == set(accounts) and partial == set()
+    assert out[accounts[10]] == (1.0, 2, {2: 1.0})
+    assert out[accounts[11]] == (0.0, None, {})
+
+
+def test_balances_batch_splits_on_gas_failure():
+    accounts = ["k:" + f"{i:064x}" for i in range(8)]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        accts = json.loads(request.content)["payload"]["exec"]["data"]["accounts"]
+        if len(accts) > 2:
+            return httpx.Response(200, json={"result": {"status": "failure", "error": {"message": "Gas limit exceeded"}}})
+        return httpx.Response(200, json={"result": {"status": "success", "data": [0.5] * len(accts)}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await kc.get_balances_batch(accounts, client=client)
+
+    out, _ = asyncio.run(run())
+    assert all(total == 0.5 * len(kc.CHAINS) and found == 0 for total, found, _ in out.values())
+
+
+def test_balances_batch_primes_caches_only_when_every_chain_answered(monkeypatch):
+    from gx_kadena.node_health import NodeHealth
+    monkeypatch.setattr(kc, "_pact_health", NodeHealth())
+    accounts = ["k:" + "b1" * 32, "k:" + "b2" * 32]
+    keyset = {"keys": ["b1" * 32], "pred": "keys-all"}
+    down = {7}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if int(body["meta"]["chainId"]) in down:
+            return httpx.Response(503, json={"error": "down"})
+        data = [{"account": accounts[0], "balance": 1.0, "guard": keyset}, {}]
+        return httpx.Response(200, json={"result": {"status": "success", "data": data}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await kc.get_balances_batch(accounts, client=client)
+
+    try:
+        for a in accounts:
+            kc._balance_cache.delete(a)
+            kc._guard_cache.delete(a)
+        out, partial = asyncio.run(run())
+        assert partial == set(accounts)
+        assert out[accounts[0]][0] == len(kc.CHAINS) - 1  # a lower bound, not cached
+        assert all(kc._balance_cache.lookup(a)[0] == "miss" for a in accounts)
+
+        down.clear()
+        out, partial = asyncio.run(run())
+        assert partial == set() and out[accounts[0]][0] == len(kc.CHAINS)
+        assert kc._balance_cache.lookup(accounts[0]) == ("fresh", out[accounts[0]])
+        assert kc._guard_cache.lookup(accounts[0]) == ("fresh", False)
+    finally:
+        for a in accounts:
+            kc._balance_cache.delete(a)
+            kc._guard_cache.delete(a)
+
+
+def test_concurrent_balance_lookups_are_coalesced(monkeypatch):
+    addr = "k:" + "cd" * 32
+    calls = []
+
+    async def slow_nodes(address, client=None, deadline=None):
+        calls.append(address)
+        await asyncio.sleep(0.05)
+        return 5.0, 0, {0: 5.0}
+
+    monkeypatch.setattr(kc, "_get_balance_from_nodes", slow_nodes)
+    kc._balance_cache.delete(addr)
+    before = kc._balance_flight.coalesced
+
+    async def run():
+        return await asyncio.gather(*(kc.get_balance_any_chain(addr) for _ in range(50)))
+
+    results = asyncio.run(run())
+    kc._balance_cache.delete(addr)
+    assert calls == [addr]
+    assert all(r == (5.0, 0, {0: 5.0}) for r in results)
+    assert kc._balance_flight.coalesced - before == 49
+
+
+def test_singleflight_errors_and_cancellation():
+    from gx_kadena.singleflight import SingleFlight
+    sf = SingleFlight("test")
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def run():
+        errs = await asyncio.gather(*(sf.do("k", boom) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(e, RuntimeError) for e in errs)
+        # a cancelled waiter must not cancel the shared task for the others
+        first = asyncio.ensure_future(sf.do("k", slow))
+        second = asyncio.ensure_future(sf.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == 42
+        assert first.cancelled()
+
+    asyncio.run(run())
+    assert sf.stats()["in_flight"] == 0
+    assert sf.stats()["coalesced"] == 3
+
+
+def _stub_bases(latencies):
+    """Local stub nodes keyed by host, each with its own latency profile."""
+    hits = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        hits.append(host)
+        await asyncio.sleep(latencies[host])
+        return httpx.Response(200, json={"result": {"status": "success", "data": host}})
+    return httpx.MockTransport(handler), hits
+
+
+def test_bases_ordered_by_observed_latency(monkeypatch):
+    from gx_kadena.node_health import NodeHealth
+    monkeypatch.setattr(kc, "_pact_health", NodeHealth())
+    monkeypatch.setattr(kc, "PACT_HEDGE", False)
+    monkeypatch.setattr(kc, "KADENA_PACT_BASES", ["http://slow.node", "http://fast.node"])
+    transport, hits = _stub_bases({"slow.node": 0.05, "fast.node": 0.005})
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            # first call for each base to seed its health (unmeasured bases go first)
+            await kc.pact_local(client, 0, "(+ 1 1)", base="http://fast.node")
+            return [await kc.pact_local(client, 0, "(+ 1 1)") for _ in range(5)]
+
+    answers = asyncio.run(run())
+    assert answers[0]["result"]["data"] == "slow.node"  # still unmeasured -> tried once
+    assert all(a["result"]["data"] == "fast.node" for a in answers[1:])
+    assert kc.node_stats()["http://fast.node"]["ewma_latency_ms"] < kc.node_stats()["http://slow.node"]["ewma_latency_ms"]
+
+
+def test_hedged_request_beats_stalled_preferred_base(monkeypatch):
+    from gx_kadena.node_health import NodeHealth
+    monkeypatch.setattr(kc, "_pact_health", NodeHealth())
+    monkeypatch.setattr(kc, "PACT_HEDGE", True)
+    monkeypatch.setattr(kc, "PACT_HEDGE_DEFAULT_DELAY", 0.05)
+    monkeypatch.setattr(kc, "KADENA_PACT_BASES", ["http://stalled.node", "http://backup.node"])
+    transport, hits = _stub_bases({"stalled.node": 2.0, "backup.node": 0.01})
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            t0 = time.perf_counter()
+            res = await kc.pact_local(client, 0, "(+ 1 1)")
+            return res, time.perf_counter() - t0
+
+    res, elapsed = asyncio.run(run())
+    assert res["result"]["data"] == "backup.node"
+    assert elapsed < 0.5
+    assert hits == ["stalled.node", "backup.node"]
+
+
+def test_payload_format_is_learned_per_base(monkeypatch):
+    from gx_kadena.node_health import NodeHealth
+    monkeypatch.setattr(kc, "_pact_health", NodeHealth())
+    posts = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        posts.append(body)
+        # gateway that only accepts the stringified {"cmd": "<json>"} shape
+        if not isinstance(body.get("cmd"), str):
+            return httpx.Response(400, text="missing cmd")
+        return httpx.Response(200, json={"result": {"status": "success", "data": 1.0}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await kc.pact_local(client, 0, "(+ 1 1)", base="http://gw.node")
+            n_first = len(posts)
+            await kc.pact_local(client, 0, "(+ 1 1)", base="http://gw.node")
+            return n_first, len(posts) - n_first
+
+    first, second = asyncio.run(run())
+    assert (first, second) == (3, 1)
+    assert kc.node_stats()["http://gw.node"]["payload_format"] == 2
+
+
+def test_circuit_breaker_fails_fast_then_probes(monkeypatch):
+    from gx_kadena.node_health import NodeHealth, CircuitBreaker
+    health = NodeHealth()
+    monkeypatch.setattr(kc, "_pact_health", health)
+    now = [100.0]
+    monkeypatch.setattr("gx_kadena.node_health.time.monotonic", lambda: now[0])
+    health.get("http://down.node").breaker = CircuitBreaker(failures=2, reset_after=10)
+    posts = []
+    up = [False]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        posts.append(1)
+        if not up[0]:
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(200, json={"result": {"status": "success", "data": 1.0}})
+
+    async def call(client):
+        return await kc.pact_local(client, 0, "(+ 1 1)", base="http://down.node")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await call(client) == {} and await call(client) == {}
+            # transport errors are not retried with other body formats
+            assert len(posts) == 2
+            assert await call(client) == {}  # open: no request sent
+            assert len(posts) == 2
+            now[0] += 11
+            up[0] = True
+            assert (await call(client))["result"]["data"] == 1.0  # half-open probe
+            assert health.get("http://down.node").breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_half_open_breaker_does_not_yield_a_partial_balance(monkeypatch):
+    import pytest
+    from gx_kadena.node_health import NodeHealth, CircuitBreaker, HALF_OPEN
+    health = NodeHealth()
+    monkeypatch.setattr(kc, "_pact_health", health)
+    monkeypatch.setattr(kc, "KADENA_PACT_BASES", ["http://probe.node"])
+    monkeypatch.setattr(kc, "KADINDEXER_API_KEY", "")
+    breaker = CircuitBreaker(failures=1, reset_after=10)
+    breaker.state = HALF_OPEN  # only one of the 20 chain calls is let through
+    health.get("http://probe.node").breaker = breaker
+    addr = "k:" + "ce" * 32
+
+    async def run():
+        async with httpx.AsyncClient(transport=_mock_node({c: 1.0 for c in kc.CHAINS}, latency=0.01)) as client:
+            monkeypatch.setattr(kc, "get_client", lambda name: client)
+            return await kc.get_balance_any_chain(addr)
+
+    kc._balance_cache.delete(addr)
+    try:
+        with pytest.raises(kc.IncompleteFanOut):
+            asyncio.run(run())
+        assert kc._balance_cache.lookup(addr)[0] == "miss"
+    finally:
+        kc._balance_cache.delete(addr)
+        kc._guard_cache.delete(addr)
+
+
+def test_deadline_bounds_slow_upstreams(monkeypatch):
+    from gx_kadena.deadline import Deadline, DeadlineExceeded
+    from gx_kadena.node_health import NodeHealth
+    monkeypatch.setattr(kc, "_pact_health", NodeHealth())
+    monkeypatch.setattr(kc, "KADENA_PACT_BASES", ["http://a.node", "http://b.node"])
+    transport, hits = _stub_bases({"a.node": 2.0, "b.node": 2.0})
+    addr = "k:" + "ef" * 32
+    kc._balance_cache.delete(addr)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            monkeypatch.setattr(kc, "get_client", lambda name: client)
+            start = time.perf_counter()
+            single = await kc.pact_local(client, 0, "(+ 1 1)", deadline=Deadline(0.2))
+            single_s = time.perf_counter() - start
+            start = time.perf_counter()
+            try:
+                await kc.get_balance_any_chain(addr, Deadline(0.3))
+                raised = False
+            except DeadlineExceeded:
+                raised = True
+            return single, single_s, raised, time.perf_counter() - start
+
+    single, single_s, raised, fanout_s = asyncio.run(run())
+    assert single == {} and single_s < 0.3
+    assert raised and fanout_s < 0.45
+    assert kc._balance_cache.lookup(addr)[0] == "miss"  # partial result not cached
+    # running out of budget is not held against the bases
+    assert all(s["breaker"] == "closed" for s in kc.node_stats().values())
+
+
+def test_tx_counter_pages_to_cutoff_then_counts_incrementally():
+    from gx_kadena.txcount import TxCounter
+    now = 1_700_000_000.0
+    # newest first: 450 transactions in the last 24h, then older history
+    txs = [{"requestKey": f"rk{i}", "creationTime": int(now - 190 * i)} for i in range(450)]
+    txs += [{"requestKey": f"old{i}", "creationTime": int(now - 90000 - i)} for i in range(500)]
+    offsets = []
+
+    async def fetch_page(offset, limit):
+        offsets.append(offset)
+        return txs[offset:offset + limit]
+
+    counter = TxCounter(page_size=100, max_pages=50)
+    assert asyncio.run(counter.count("k:x", fetch_page, now=now)) == 450  # not capped at one page
+    assert offsets == [0, 100, 200, 300, 400]
+
+    # an hour later: 3 new transactions, the oldest ones have aged out
+    later = now + 3600
+    txs[:0] = [{"requestKey": f"new{i}", "creationTime": int(later - i)} for i in range(3)]
+    offsets.clear()
+    expected = sum(1 for t in txs if t["creationTime"] >= later - 86400)
+    assert expected < 453
+    assert asyncio.run(counter.count("k:x", fetch_page, now=later)) == expected
+    assert offsets == [0]  # stopped at the first transaction already seen
+
+
+def test_cut_heights_drive_per_chain_balance_refresh(monkeypatch):
+    from gx_kadena import cut_watcher as cw
+    from gx_kadena.node_health import NodeHealth
+    base = "http://stub.node"
+    heights = {c: 1000 for c in kc.CHAINS}
+    local_calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/cut"):
+            return httpx.Response(200, json={"hashes": {str(c): {"height": h, "hash": "x"} for c, h in heights.items()}})
+        chain = int(json.loads(request.content)["meta"]["chainId"])
+        local_calls.append(chain)
+        return httpx.Response(200, json={"result": {"status": "success", "data": 1.0 if chain == 3 else 0.0}})
+
+    addr = "k:" + "12" * 32
+    watcher = cw.CutWatcher(bases=[base], interval=60, max_age=60)
+    monkeypatch.setattr(kc, "cut_watcher", watcher)
+    monkeypatch.setattr(kc, "_chain_balances", cw.HeightCache("test"))
+    monkeypatch.setattr(kc, "_pact_health", NodeHealth())
+    monkeypatch.setattr(kc, "KADENA_PACT_BASES", [base])
+    kc._balance_cache.delete(addr)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(kc, "get_client", lambda name: client)
+            monkeypatch.setattr(cw, "get_client", lambda name: client)
+            assert await watcher.poll_once()
+            first = await kc.get_balance_any_chain(addr)
+            n_first = len(local_calls)
+            again = await kc.get_balance_any_chain(addr)
+            heights[5] += 1  # a block on a chain the account holds nothing on
+            await watcher.poll_once()
+            again = await kc.get_balance_any_chain(addr)
+            n_again = len(local_calls) - n_first
+            heights[3] += 1  # a block on chain 3 only
+            await watcher.poll_once()
+            moved = await kc.get_balance_any_chain(addr)
+            return first, n_first, again, n_again, moved
+
+    first, n_first, again, n_again, moved = asyncio.run(run())
+    kc._balance_cache.delete(addr)
+    assert first == again == moved == (1.0, 3, {3: 1.0})
+    assert n_first == len(kc.CHAINS)
+    assert n_again == 0  # no block on the account's chains: served from the balance cache
+    assert sorted(local_calls[n_first:]) == [3, 5]  # then only the chains that moved are re-read
+
+
+def test_guard_kinds():
+    assert kc.guard_kind({"keys": ["ab"], "pred": "keys-all"}) == "keyset"
+    assert kc.guard_kind({"keysetref": {"ksn": "ks", "ns": "n_x"}}) == "keyset-ref"
+    assert kc.guard_kind({"cgName": "n_x.dex.BANK", "cgArgs": [], "cgPactId": None}) == "capability"
+    assert kc.guard_kind({"moduleName": {"name": "dex", "namespace": "n_x"}, "name": "bank"}) == "module"
+    assert kc.guard_kind({"pactId": "abc", "name": "escrow"}) == "pact"
+    assert kc.guard_kind({"fun": "n_x.bridge.enforce", "args": []}) == "user"
+    assert kc.guard_kind(None) is None
+
+
+def test_balance_and_contract_share_one_fan_out(monkeypatch):
+    from gx_kadena.node_health import NodeHealth
+    monkeypatch.setattr(kc, "_pact_health", NodeHealth())
+    addr = "k:" + "ef" * 32
+    calls = []
+    accounts = {
+        2: {"account": addr, "balance": 1.5, "guard": {"keys": ["ef" * 32], "pred": "keys-all"}},
+        5: {"account": addr, "balance": {"decimal": "0.25"},
+            "guard": {"moduleName": {"name": "dex", "namespace": "n_x"}, "name": "bank"}},
+    }
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        chain = int(body["meta"]["chainId"])
+        assert body["payload"]["exec"]["data"] == {"account": addr}
+        calls.append(chain)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"result": {"status": "success", "data": accounts.get(chain, {})}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(kc, "get_client", lambda name: client)
+            return await asyncio.gather(kc.get_balance_any_chain(addr), kc.is_contract_address(addr))
+
+    for cache in (kc._balance_cache, kc._guard_cache):
+        cache.delete(addr)
+    try:
+        balance, contract = asyncio.run(run())
+    finally:
+        for cache in (kc._balance_cache, kc._guard_cache):
+            cache.delete(addr)
+    assert balance == (1.75, 2, {2: 1.5, 5: 0.25})
+    assert contract is True
+    assert sorted(calls) == list(kc.CHAINS)  # one call per chain for both lookups
+
+
+def test_contract_verdict_unknown_when_a_chain_fails(monkeypatch):
+    import pytest
+    from gx_kadena.node_health import NodeHealth
+    monkeypatch.setattr(kc, "_pact_health", NodeHealth())
+    addr = "k:" + "fa" * 32
+    keyset = {"account": addr, "balance": 1.0, "guard": {"keys": ["fa" * 32], "pred": "keys-all"}}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if int(json.loads(request.content)["meta"]["chainId"]) == 7:
+            return httpx.Response(503, json={"error": "down"})
+        return httpx.Response(200, json={"result": {"status": "success", "data": keyset}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(kc, "get_client", lambda name: client)
+            return await kc.is_contract_address(addr)
+
+    kc._guard_cache.delete(addr)
+    kc._balance_cache.delete(addr)
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(run())
+    finally:
+        kc._guard_cache.delete(addr)
+        kc._balance_cache.delete(addr)
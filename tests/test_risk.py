@@ -0,0 +1,22 @@
+import math
+import random
+
+from gx_kadena.risk import RULES, LogScale, flag_lists, log_thresholds, risk_score, risk_score_batch
+
+
+def test_batch_matches_scalar_exactly():
+    rng = random.Random(7)
+    balances = [0.0, 0, 1e-9, 0.5, 1, 9, 10, 1e6, 1e300, -3.0, float("nan")]
+    for rule in RULES:
+        if isinstance(rule, LogScale):
+            for t in log_thresholds(rule):
+                balances += [t, math.nextafter(t, 0), math.nextafter(t, math.inf)]
+    balances += [10 ** rng.uniform(-6, 9) for _ in range(5000)]
+    n = len(balances)
+    tx24 = [rng.choice([None, 0, 1, 4, 5, 6, 19, 20, 21, rng.randint(0, 500)]) for _ in range(n)]
+    is_contract = [rng.choice([None, False, True]) for _ in range(n)]
+
+    scores, flags = risk_score_batch(balances, tx24, is_contract)
+    lists = flag_lists(flags, n)
+    for i in range(n):
+        assert (int(scores[i]), lists[i]) == risk_score(balances[i], tx24[i], is_contract[i]), i
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+from gx_kadena.rwa import assets, contracts
+
+ADDR = "k:" + "ab" * 32
+
+
+def test_registry_skips_invalid_entries_and_indexes_chains(tmp_path):
+    path = tmp_path / "rwa.json"
+    path.write_text(json.dumps([
+        {"module": "n_a.gold", "type": "commodity", "unit": "oz", "chains": [1, 8]},
+        {"module": "n_b.bond", "type": "bond", "chains": [8]},
+        {"module": "coin) (drop", "chains": [0]},
+        {"module": "n_c.x", "chains": [99]},
+    ]))
+    registry = contracts.load_registry(str(path))
+    assert sorted(registry) == ["n_a.gold", "n_b.bond"]
+    assert registry["n_a.gold"].chains == (1, 8)
+    assert contracts.load_registry("") == {} and contracts.load_registry(str(tmp_path / "missing.json")) == {}
+
+
+def test_rwa_assets_one_call_per_chain_with_modules(monkeypatch):
+    gold = contracts.RwaContract("n_a.gold", "commodity", "oz", (1, 8))
+    bond = contracts.RwaContract("n_b.bond", "bond", None, (8,))
+    monkeypatch.setattr(assets, "registry", lambda: {c.module: c for c in (gold, bond)})
+    monkeypatch.setattr(assets, "modules_by_chain", lambda: {1: (gold,), 8: (gold, bond)})
+    calls = []
+
+    async def fake_local(client, chain, code, data=None, deadline=None, **kw):
+        calls.append((chain, code.count("get-balance"), data["account"]))
+        vals = {1: [1.5], 8: [{"decimal": "0.5"}, -1.0]}[chain]
+        return {"result": {"status": "success", "data": vals}}
+
+    monkeypatch.setattr(assets, "pact_local", fake_local)
+    assets._rwa_cache.clear()
+    try:
+        block = asyncio.run(assets.get_rwa_assets(ADDR))
+        assert sorted(calls) == [(1, 1, ADDR), (8, 2, ADDR)]
+        assert block == {"address": ADDR, "assets": [
+            {"module": "n_a.gold", "type": "commodity", "amount": 2.0, "chains": [1, 8], "unit": "oz"},
+        ]}
+        asyncio.run(assets.get_rwa_assets(ADDR))
+        assert len(calls) == 2  # served from cache
+    finally:
+        assets._rwa_cache.clear()
+
+
+def test_iso_documents_with_partial_holdings_are_not_cached(monkeypatch, fake_lookups):
+    from fastapi.testclient import TestClient
+    import gx_kadena.main as main
+    import gx_kadena.iso.bulk as iso_bulk
+
+    async def partial_rwa(address, deadline=None):
+        return {"address": address, "assets": [], "partial": True, "unavailable_chains": [8]}
+
+    fake_lookups(balance=(1.0, 1, {1: 1.0}), tx=0)
+    monkeypatch.setattr(iso_bulk, "get_rwa_assets", partial_rwa)
+    client = TestClient(main.app)
+    for path in (f"/iso/camt053.xml?address={ADDR}", f"/iso/pacs008.xml?address={ADDR}"):
+        r = client.get(path)
+        assert r.status_code == 200 and r.headers["cache-control"] == "no-store"
+
+
+def test_iso_max_age_is_bounded_by_the_rwa_cache(monkeypatch):
+    from gx_kadena import http_cache
+    monkeypatch.setattr(http_cache, "freshness", lambda address: 20.0)
+    monkeypatch.setattr(http_cache, "rwa_freshness", lambda address: 5.0)
+    assert http_cache.cache_headers('"e"', ADDR)["Cache-Control"] == "max-age=20"
+    assert http_cache.cache_headers('"e"', ADDR, with_rwa=True)["Cache-Control"] == "max-age=5"
+    monkeypatch.setattr(assets, "modules_by_chain", lambda: {})
+    assert assets.freshness(ADDR) == float("inf")  # no registry: no holdings to go stale
@@ -1,4 +1,3 @@
-import pytest
 from fastapi.testclient import TestClient
 from gx_kadena.main import app
 
@@ -14,10 +13,215 @@ def test_invalid_address():
     assert r.status_code == 400
 
 def test_rate_limit(monkeypatch):
-    # Simulate token bucket empty
+    # One request per 10s, no burst: the second call from the same client is limited
     import gx_kadena.security_mw as smw
-    monkeypatch.setattr(smw, "_tokens", 0)
+    monkeypatch.setattr(smw, "_expensive", smw.GCRALimiter(rate=0.1, burst=1))
+    monkeypatch.setattr(smw, "RATE_LIMIT_API_KEYS", frozenset({"partner"}))
+    assert client.get("/validate/k:abcdef...").status_code == 400
     r = client.get("/validate/k:abcdef...")
     assert r.status_code == 429
+    assert 1 <= int(r.headers["Retry-After"]) <= 10
+    # an unknown API key does not get a fresh limit ...
+    assert client.get("/validate/k:abcdef...", headers={"X-API-Key": "other"}).status_code == 429
+    # ... but configured keys and cheap routes are unaffected
+    assert client.get("/validate/k:abcdef...", headers={"X-API-Key": "partner"}).status_code == 400
+    assert client.get("/health").status_code == 200
 
-# Add more tests for happy path with mock kadena_client if needed
\ No newline at end of file
+def test_gcra_limiter_burst_and_eviction():
+    from gx_kadena.security_mw import GCRALimiter
+    lim = GCRALimiter(rate=2, burst=3, max_clients=2)
+    assert [lim.hit("a", now=0.0)[0] for _ in range(4)] == [True, True, True, False]
+    assert lim.hit("a", now=0.5)[0]  # one interval later one more slot
+    lim.hit("b", now=0.5)
+    lim.hit("c", now=0.5)
+    assert len(lim) == 2
+
+def test_validate_batch_streams_ndjson(fake_lookups):
+    import json
+    fake_lookups()
+    good = "k:" + "ab" * 32
+    r = client.post("/validate/batch", json=[good, "notanaddress", good])
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert len(lines) == 2
+    by_addr = {line["address"]: line for line in lines}
+    assert by_addr[good]["total_balance"] == 2.0
+    assert "error" in by_addr["notanaddress"]
+
+    r = client.post("/validate/batch", content=f"{good}\n\nnotanaddress\n", headers={"content-type": "text/plain"})
+    assert len(r.text.splitlines()) == 2
+
+def test_validate_many_prefetches_balances_in_batches(monkeypatch, fake_lookups):
+    import asyncio
+    import gx_kadena.validator as v
+    batches = []
+
+    async def fake_batch(addresses, client=None):
+        batches.append(list(addresses))
+        return {}, set()
+
+    fake_lookups(batch=fake_batch)
+    monkeypatch.setattr(v, "BATCH_PREFETCH", 3)
+    addrs = ["k:" + f"{i:064x}" for i in range(7)]
+
+    async def run():
+        return [res async for _, _, res in v.validate_many(addrs[:2] + ["bad"] + addrs[2:], concurrency=2)]
+
+    results = asyncio.run(run())
+    assert len(results) == 8
+    assert batches == [addrs[:2], addrs[2:5], addrs[5:]]
+
+def test_metrics_use_route_templates():
+    client.get("/validate/not-a-kadena-address")
+    body = client.get("/metrics").text
+    assert 'route="/validate/{address}"' in body
+    assert "not-a-kadena-address" not in body
+
+def test_streamed_response_stays_in_flight_until_its_body_ends():
+    import asyncio
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from prometheus_client import REGISTRY
+    from gx_kadena.metrics import metrics_mw
+
+    def in_flight():
+        return REGISTRY.get_sample_value("gx_requests_in_flight", {"route": "/stream"})
+
+    async def run():
+        finish = asyncio.Event()
+        sent = asyncio.Event()
+        app = FastAPI()
+        app.middleware("http")(metrics_mw)
+
+        async def body():
+            yield b"first"
+            await finish.wait()
+            yield b"last"
+
+        @app.get("/stream")
+        async def stream():
+            return StreamingResponse(body())
+
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                 "scheme": "http", "path": "/stream", "raw_path": b"/stream", "root_path": "",
+                 "query_string": b"", "headers": [], "client": ("test", 1), "server": ("test", 80)}
+
+        async def receive():
+            await finish.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message.get("body") == b"first":
+                sent.set()
+
+        task = asyncio.ensure_future(app(scope, receive, send))
+        await asyncio.wait_for(sent.wait(), 2)
+        during = in_flight()
+        finish.set()
+        await asyncio.wait_for(task, 2)
+        return during, in_flight()
+
+    during, after = asyncio.run(run())
+    assert (during, after) == (1.0, 0.0)
+
+
+def test_validate_address_returns_partial_result_on_deadline(fake_lookups):
+    import asyncio
+    import time
+    import gx_kadena.validator as v
+    from gx_kadena.deadline import Deadline
+
+    async def fake_balance(addr, deadline=None):
+        await asyncio.sleep(0.05)
+        return 2.0, 1, {1: 2.0}
+
+    async def slow_tx(addr, deadline=None):
+        await asyncio.sleep(5)
+        return 3
+
+    fake_lookups(balance=fake_balance, tx=slow_tx)
+    start = time.perf_counter()
+    res = asyncio.run(v.validate_address("k:" + "ab" * 32, deadline=Deadline(0.3)))
+    assert time.perf_counter() - start < 1.0
+    assert res.total_balance == 2.0
+    assert res.tx_total_24h is None
+    assert res.flags == ["tx-count-unavailable"]
+
+def test_conditional_get_returns_304_until_inputs_change(monkeypatch, fake_lookups):
+    balance = {"total": 2.0}
+
+    async def fake_balance(addr, deadline=None):
+        return balance["total"], 1, {1: balance["total"]}
+
+    fake_lookups(balance=fake_balance)
+    import gx_kadena.security_mw as smw
+    monkeypatch.setattr(smw, "_expensive", smw.GCRALimiter(rate=1000, burst=1000))
+    addr = "k:" + "cd" * 32
+    for path in (f"/validate/{addr}", f"/iso/camt053.xml?address={addr}"):
+        first = client.get(path)
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and "cache-control" in first.headers
+        again = client.get(path, headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+        balance["total"] = 5.0  # new upstream data: new ETag, full body
+        changed = client.get(path, headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+        balance["total"] = 2.0
+
+
+def test_iso_refuses_partial_results(fake_lookups):
+    from gx_kadena.deadline import DeadlineExceeded
+
+    async def no_balance(addr, deadline=None):
+        raise DeadlineExceeded("balance")
+
+    fake_lookups(balance=no_balance)
+    addr = "k:" + "ef" * 32
+    for path in (f"/iso/camt053.xml?address={addr}", f"/iso/pacs008.xml?address={addr}"):
+        r = client.get(path)
+        assert r.status_code == 503
+        assert r.json()["detail"]["flags"] == ["balance-unavailable"]
+
+
+def test_status_pool_reports_each_upstream(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+    from gx_kadena import http_pool
+
+    for name in http_pool.UPSTREAMS:
+        http_pool.get_client(name)
+    try:
+        stats = client.get("/status/pool").json()["pools"]
+        assert set(stats) == set(http_pool.UPSTREAMS)
+        assert all(s["connections"] == 0 and s["waiting"] == 0 for s in stats.values())
+        # pool internals changed by an httpx/httpcore upgrade: reported, not a 500
+        broken = SimpleNamespace(_pool=SimpleNamespace(connections=[object()]))
+        monkeypatch.setattr(http_pool.get_client("pact"), "_transport", broken)
+        r = client.get("/status/pool")
+        assert r.status_code == 200 and r.json()["pools"]["pact"]["unavailable"] is True
+        assert "in_use" in r.json()["pools"]["explorer"]
+    finally:
+        monkeypatch.undo()
+        asyncio.run(http_pool.shutdown())
+
+
+def test_client_from_another_loop_is_replaced_and_closed():
+    import asyncio
+    from gx_kadena import http_pool
+
+    async def get():
+        return http_pool.get_client("explorer")
+
+    async def replace():
+        client = http_pool.get_client("explorer")
+        await asyncio.sleep(0)  # let the scheduled close run
+        return client
+
+    asyncio.run(http_pool.shutdown())
+    try:
+        old = asyncio.run(get())
+        new = asyncio.run(replace())
+        assert new is not old and old.is_closed and not new.is_closed
+    finally:
+        asyncio.run(http_pool.shutdown())
@@ -0,0 +1,165 @@
+import asyncio
+import json
+
+import pytest
+
+from gx_kadena import main, watch
+from gx_kadena.main import app
+from gx_kadena.validator import ValidationResult
+
+A = "k:" + "aa" * 32
+B = "k:" + "bb" * 32
+
+
+def _fake_validate_many(monkeypatch, balances, refreshed):
+    async def fake_validate_many(addresses, concurrency=8):
+        refreshed.append(sorted(addresses))
+        for i, a in enumerate(addresses):
+            yield i, a, ValidationResult(address=a, balance=balances[a], total_balance=balances[a],
+                                         tx_total_24h=1, risk_score=50, flags=[], duration_ms=1)
+
+    monkeypatch.setattr(watch, "validate_many", fake_validate_many)
+
+
+def test_hub_dedupes_and_pushes_only_changes(monkeypatch):
+    balances = {A: 1.0, B: 2.0}
+    refreshed = []
+    _fake_validate_many(monkeypatch, balances, refreshed)
+
+    async def run():
+        hub = watch.WatchHub(interval=3600, max_addresses=2)
+        one = hub.subscribe([A, B])
+        two = hub.subscribe([A])
+        first = await asyncio.wait_for(one.get(), 1)
+        assert refreshed == [[A, B]]  # one lookup per address, not per subscriber
+        assert dict(first)[A] == {"total_balance": 1.0, "tx_total_24h": 1, "risk_score": 50}
+        await asyncio.wait_for(two.get(), 1)
+
+        await hub.refresh([A, B])  # nothing changed: nothing queued
+        assert len(one) == 0 and len(two) == 0
+        for value in (3.0, 4.0):  # a slow consumer keeps only the latest value
+            balances[A] = value
+            await hub.refresh([A])
+        assert await one.get() == [(A, {"total_balance": 4.0})] and one.merged == 1
+
+        with pytest.raises(watch.WatchLimit):
+            hub.subscribe(["k:" + "cc" * 32])
+        hub.unsubscribe(one)
+        hub.unsubscribe(two)
+        assert hub.stats()["addresses"] == 0
+        await hub.stop()
+
+    asyncio.run(run())
+
+
+def test_hub_limits_subscriptions_per_client(monkeypatch):
+    _fake_validate_many(monkeypatch, {A: 1.0}, [])
+
+    async def run():
+        hub = watch.WatchHub(interval=3600, max_per_client=2)
+        boxes = [hub.subscribe([A], client="ip:1") for _ in range(2)]
+        with pytest.raises(watch.WatchLimit):
+            hub.subscribe([A], client="ip:1")
+        other = hub.subscribe([A], client="ip:2")
+        hub.unsubscribe(boxes.pop())
+        boxes.append(hub.subscribe([A], client="ip:1"))  # a freed slot can be reused
+        for box in boxes + [other]:
+            hub.unsubscribe(box)
+        assert hub.stats()["subscribers"] == 0 and hub.stats()["clients"] == 0
+        await hub.stop()
+
+    asyncio.run(run())
+
+
+def test_hub_throttles_height_triggered_refreshes(monkeypatch):
+    refreshed = []
+    _fake_validate_many(monkeypatch, {A: 1.0}, refreshed)
+    height = [0]
+
+    def heights():
+        height[0] += 1  # a new block on every tick
+        return {0: height[0]}
+
+    async def run():
+        hub = watch.WatchHub(interval=3600, min_interval=0.2, heights=heights, tick=0.01)
+        box = hub.subscribe([A])
+        await asyncio.sleep(0.3)
+        hub.unsubscribe(box)
+        await hub.stop()
+
+    asyncio.run(run())
+    assert 2 <= len(refreshed) <= 3  # first refresh plus one per min_interval, not one per tick
+
+
+class _Stream:
+    """One raw ASGI GET /watch request whose client can disconnect at will."""
+
+    def __init__(self, query: str, updates: int = 1, client_ip: str = "10.0.0.1"):
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/watch", "raw_path": b"/watch", "root_path": "",
+            "query_string": query.encode(), "headers": [(b"host", b"test")],
+            "client": (client_ip, 1234), "server": ("test", 80),
+        }
+        self.status = None
+        self.body = b""
+        self.disconnect = asyncio.Event()
+        self.received = asyncio.Event()
+        self._requested = False
+        self._updates = updates
+
+    async def _receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body":
+            self.body += message.get("body", b"")
+            if self.body.count(b"event: update") >= self._updates:
+                self.received.set()
+
+    def start(self) -> asyncio.Task:
+        return asyncio.ensure_future(app(self.scope, self._receive, self._send))
+
+    def events(self):
+        return [json.loads(line[6:]) for line in self.body.decode().splitlines() if line.startswith("data: ")]
+
+
+def test_watch_endpoint_streams_updates_and_unsubscribes_on_disconnect(monkeypatch):
+    import gx_kadena.security_mw as smw
+    monkeypatch.setattr(smw, "_expensive", smw.GCRALimiter(rate=1000, burst=1000))
+    _fake_validate_many(monkeypatch, {A: 1.0, B: 2.0}, [])
+
+    async def run():
+        hub = watch.WatchHub(interval=3600, max_per_client=1)
+        monkeypatch.setattr(main, "watch_hub", hub)
+        first = _Stream(f"address={A}&address={B}", updates=2)
+        task = first.start()
+        await asyncio.wait_for(first.received.wait(), 2)
+        assert first.status == 200
+        assert {e["address"]: e["total_balance"] for e in first.events()} == {A: 1.0, B: 2.0}
+        assert hub.stats()["subscribers"] == 1
+
+        second = _Stream(f"address={A}")  # same client, over its limit
+        await asyncio.wait_for(second.start(), 2)
+        assert second.status == 503 and hub.stats()["subscribers"] == 1
+
+        first.disconnect.set()
+        await asyncio.wait_for(task, 2)
+        stats = hub.stats()
+        assert (stats["subscribers"], stats["clients"], stats["addresses"]) == (0, 0, 0)
+        await hub.stop()
+
+    asyncio.run(run())
+
+
+def test_watch_endpoint_rejects_bad_requests():
+    from fastapi.testclient import TestClient
+    client = TestClient(app)
+    assert client.get("/watch", params={"address": "notanaddress"}).status_code == 400
+    assert client.get("/watch", params={"address": " "}).status_code == 400